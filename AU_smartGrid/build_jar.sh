@@ -0,0 +1,16 @@
+#!/bin/sh
+# 重新构建博弈模型JAR：以现有JAR为classpath（已打包jackson/poi依赖）编译src，再把新的class更新进JAR
+# 需要JDK 17+（javac/jar）；用法：sh AU_smartGrid/build_jar.sh [JAR路径，默认Version/v2/app/game-model-1.0.jar]
+set -e
+cd "$(dirname "$0")"
+JAR="${1:-../Version/v2/app/game-model-1.0.jar}"
+BUILD_DIR=build
+
+rm -rf "$BUILD_DIR"
+mkdir -p "$BUILD_DIR/classes"
+javac -encoding UTF-8 -cp "$JAR" -d "$BUILD_DIR/classes" $(find src/main/java -name '*.java')
+cp "$JAR" "$BUILD_DIR/game-model.jar"
+jar uf "$BUILD_DIR/game-model.jar" -C "$BUILD_DIR/classes" main
+mv "$BUILD_DIR/game-model.jar" "$JAR"
+rm -rf "$BUILD_DIR"
+echo "已更新 $JAR"
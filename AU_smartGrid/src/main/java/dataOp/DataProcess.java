@@ -16,6 +16,35 @@ import org.apache.poi.ss.usermodel.*;
 import org.apache.poi.xssf.usermodel.XSSFWorkbook;
 
 public class DataProcess {
+    // price.xlsx按小时缓存的电价（单位已换算），常驻求解进程只解析一次
+    private static ArrayList<Double> hourlyPrices = null;
+
+    public static synchronized ArrayList<Double> loadHourlyPrices() {
+        if (hourlyPrices != null) {
+            return hourlyPrices;
+        }
+        // 读取price.xlsx（目前是放在模型同目录），第1行为表头，第2~25行对应0~23点
+        ArrayList<Double> prices = new ArrayList<>();
+        try (FileInputStream fis = new FileInputStream(new File("price.xlsx"));
+             Workbook workbook = new XSSFWorkbook(fis)) {
+            Sheet sheet = workbook.getSheetAt(0);
+            for (int hour = 0; hour < 24; hour++) {
+                Row row = sheet.getRow(hour + 1);
+                if (row != null) {
+                    // 单位换算
+                    prices.add(row.getCell(2).getNumericCellValue() / 1000);
+                } else {
+                    prices.add(0.0);
+                }
+            }
+        } catch (Throwable e) {
+            System.err.println("读取 price.xlsx 失败，回退至随机电价。");
+            return null;
+        }
+        hourlyPrices = prices;
+        return hourlyPrices;
+    }
+
     public static Station getStation(Random rad) {
         Station station = new Station();
         ArrayList<Double> prices = new ArrayList<>();
@@ -29,17 +58,14 @@ public class DataProcess {
         int currentHour = shanghaiTime.getHour();
         int currentMinute = shanghaiTime.getMinute();
 
-        // 再读取price.xlsx（目前是放在模型同目录）
-        try (FileInputStream fis = new FileInputStream(new File("price.xlsx"));
-             Workbook workbook = new XSSFWorkbook(fis)) {
-            Sheet sheet = workbook.getSheetAt(0);
-
+        ArrayList<Double> hourly = loadHourlyPrices();
+        if (hourly != null) {
             // timeSlots长度
             for (int i = 0; i < ConstNum.timeSlots; i++) {
 
                 // minutes偏移量
                 // 例如 i=0 是偏移0分钟，i=1 是偏移15分钟，i=2 是偏移30分钟
-                int offsetMinutes = i * 15;
+                int offsetMinutes = i * ConstNum.longPerTime;
 
                 // 先算出总分钟 然后加上偏移量
                 // 这样可以处理分钟进位导致小时改变的情况（如 13:45 + 15min = 14:00）
@@ -47,20 +73,11 @@ public class DataProcess {
                 int totalMinutes = (currentHour * 60 + currentMinute) + offsetMinutes;
                 int targetHour = (totalMinutes / 60) % 24; // 换算成 0-23 小时
 
-                // 根据换算后的 targetHour 去 Excel 找对应的行
-                // 然后填入prices中
-                Row row = sheet.getRow(targetHour + 1);
-                if (row != null) {
-                    // 单位换算
-                    double priceValue = row.getCell(2).getNumericCellValue() / 1000;
-                    prices.add(priceValue);
-                } else {
-                    prices.add(0.0);
-                }
+                // 根据换算后的 targetHour 取对应小时的电价
+                prices.add(hourly.get(targetHour));
             }
-        } catch (Exception e) {
+        } else {
             //若读取excel失败，就用之前的方法
-            System.err.println("读取 price.xlsx 失败，回退至随机电价。");
             for(int i = 0; i < ConstNum.timeSlots; i++) {
                 prices.add(rad.nextDouble());
             }
@@ -0,0 +1,130 @@
+package main.java.dataOp;
+
+import com.fasterxml.jackson.databind.JsonNode;
+import com.fasterxml.jackson.databind.MappingIterator;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import com.fasterxml.jackson.databind.node.JsonNodeFactory;
+import main.java.model.ConstNum;
+import main.java.model.Device;
+import main.java.model.Station;
+
+import java.io.IOException;
+import java.io.InputStream;
+import java.util.ArrayList;
+import java.util.Random;
+
+/**
+ * 求解输入：头信息 + 设备列表
+ * NDJSON格式下首行为头信息（"type":"header"），其后每行一台设备，逐条解析不整体缓存原始文本
+ */
+public class SolverInput {
+    private JsonNode header = JsonNodeFactory.instance.objectNode();
+    private ArrayList<Device> devices = new ArrayList<>();
+
+    public JsonNode getHeader() {
+        return header;
+    }
+
+    public void setHeader(JsonNode header) {
+        this.header = header;
+    }
+
+    public ArrayList<Device> getDevices() {
+        return devices;
+    }
+
+    public void addDevice(Device device) {
+        this.devices.add(device);
+    }
+
+    // 按请求头配置站点：分片求解时按设备占比分得站点充放电容量，保证各分片合并后不超过站点总容量
+    public void configureStation(Station station) {
+        double capacityShare = header.path("capacityShare").asDouble(1.0);
+        if (capacityShare > 0 && capacityShare < 1) {
+            station.setMaxCharge(station.getMaxCharge() * capacityShare);
+            station.setMaxDischarge(station.getMaxDischarge() * capacityShare);
+        }
+        // sumMode=scan时逐设备累加各时间片占用（对照基准），默认cached使用汇总占用
+        station.setCachedSums(!"scan".equals(header.path("sumMode").asText("cached")));
+    }
+
+    // 请求头seed指定随机种子（复现求解），未指定时随机生成；种子随汇总返回，调用方可据此重放
+    public long getSeed() {
+        JsonNode seed = header.path("seed");
+        return seed.isIntegralNumber() ? seed.asLong() : new Random().nextLong();
+    }
+
+    // 请求头prices指定各时间片电价时覆盖按当前时间读取price.xlsx得到的电价（复现求解）
+    public void configurePrices(Station station) {
+        JsonNode prices = header.path("prices");
+        if (!prices.isArray()) {
+            return;
+        }
+        if (prices.size() < ConstNum.timeSlots) {
+            throw new IllegalArgumentException("prices长度" + prices.size() + "少于timeSlots=" + ConstNum.timeSlots);
+        }
+        ArrayList<Double> values = new ArrayList<>(prices.size());
+        for (JsonNode price : prices) {
+            values.add(price.asDouble());
+        }
+        station.setPrice(values);
+    }
+
+    // schedule=batch时每轮批量接受互不冲突的改进决策，默认single每轮单个胜者
+    public boolean isBatchSchedule() {
+        return "batch".equals(header.path("schedule").asText("single"));
+    }
+
+    // 按请求头的params块设置本次求解参数（时间片数/种群规模/FOA迭代次数/收敛容差/时间预算）
+    public void applyParams() {
+        ConstNum.configure(header.path("params"));
+    }
+
+    // 按时间片取值的字段长度不足timeSlots时拒绝求解，避免与调用方时间片配置不一致时越界或静默截断
+    public void checkDevices(ArrayList<Device> devices) {
+        for (Device device : devices) {
+            if (device.getCurrentStorage().size() < ConstNum.timeSlots
+                    || device.getDemands().size() < ConstNum.timeSlots
+                    || device.getProduce().size() < ConstNum.timeSlots) {
+                throw new IllegalArgumentException("设备" + device.getId() + "的时间片数据少于timeSlots=" + ConstNum.timeSlots);
+            }
+        }
+    }
+
+    public static boolean isHeader(JsonNode node) {
+        return node.has("type") && "header".equals(node.get("type").asText());
+    }
+
+    // 流式读取NDJSON（stdin或文件）
+    public static SolverInput readNdjson(ObjectMapper mapper, InputStream in) throws IOException {
+        SolverInput input = new SolverInput();
+        try (MappingIterator<JsonNode> it = mapper.readerFor(JsonNode.class).readValues(in)) {
+            while (it.hasNextValue()) {
+                JsonNode node = it.nextValue();
+                if (isHeader(node)) {
+                    input.setHeader(node);
+                    int expected = node.path("deviceCount").asInt(0);
+                    if (expected > 0) {
+                        input.devices.ensureCapacity(expected);
+                    }
+                    continue;
+                }
+                input.addDevice(mapper.treeToValue(node, Device.class));
+            }
+        }
+        return input;
+    }
+
+    // 兼容旧调用方式：整体JSON数组
+    public static SolverInput readJsonArray(ObjectMapper mapper, String devicesJson) throws IOException {
+        SolverInput input = new SolverInput();
+        ArrayList<Device> devices = mapper.readValue(
+                devicesJson,
+                mapper.getTypeFactory().constructCollectionType(ArrayList.class, Device.class)
+        );
+        if (devices != null) {
+            input.devices = devices;
+        }
+        return input;
+    }
+}
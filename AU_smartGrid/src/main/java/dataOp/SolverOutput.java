@@ -0,0 +1,99 @@
+package main.java.dataOp;
+
+import com.fasterxml.jackson.databind.ObjectMapper;
+import main.java.model.Decision;
+import main.java.model.Result;
+
+import java.io.IOException;
+import java.io.OutputStream;
+import java.util.ArrayList;
+import java.util.LinkedHashMap;
+import java.util.Map;
+
+/**
+ * 求解输出：逐条输出决策记录（"type":"decision"），最后输出一条汇总记录（"type":"summary"）
+ * 与stdout日志完全分离，调用方可边读边解析，无需在整段输出中查找JSON
+ */
+public class SolverOutput {
+
+    public interface RecordSink {
+        void write(byte[] record) throws IOException;
+    }
+
+    public static void emit(ObjectMapper mapper, Result result, RecordSink sink) throws IOException {
+        emitDecisions(mapper, result, sink);
+        sink.write(mapper.writeValueAsBytes(summary(result)));
+    }
+
+    public static void emitDecisions(ObjectMapper mapper, Result result, RecordSink sink) throws IOException {
+        ArrayList<Decision> decisions = result.getDecisions();
+        for (int i = 0; i < decisions.size(); i++) {
+            Decision decision = decisions.get(i);
+            // 决策顺序与输入设备顺序一致，deviceId即输入设备的连续ID
+            decision.setDeviceId(i);
+            Map<String, Object> record = new LinkedHashMap<>();
+            record.put("type", "decision");
+            record.put("deviceId", decision.getDeviceId());
+            record.put("dc", decision.getDc());
+            record.put("speed", decision.getSpeed());
+            record.put("cost", decision.getCost());
+            record.put("benefit", decision.getBenefit());
+            sink.write(mapper.writeValueAsBytes(record));
+        }
+    }
+
+    // 求解过程中的决策快照（"type":"snapshot"）：调用方保留最新一帧，求解超时/失败时以其作为结果
+    public static byte[] snapshot(ObjectMapper mapper, ArrayList<Decision> decisions, Result result) throws IOException {
+        Map<String, Object> record = new LinkedHashMap<>();
+        ArrayList<Map<String, Object>> items = new ArrayList<>(decisions.size());
+        double benefit = 0;
+        for (int i = 0; i < decisions.size(); i++) {
+            Decision decision = decisions.get(i);
+            Map<String, Object> item = new LinkedHashMap<>();
+            item.put("deviceId", i);
+            item.put("dc", decision.getDc());
+            item.put("speed", decision.getSpeed());
+            item.put("cost", decision.getCost());
+            item.put("benefit", decision.getBenefit());
+            items.add(item);
+            benefit += decision.getBenefit();
+        }
+        record.put("type", "snapshot");
+        record.put("benefit", benefit);
+        record.put("iteration", result.getIteration());
+        record.put("rounds", result.getRounds());
+        record.put("schedule", result.getSchedule());
+        record.put("warmStartDevices", result.getWarmStartDevices());
+        record.put("warmStartKept", result.getWarmStartKept());
+        record.put("decisions", items);
+        return mapper.writeValueAsBytes(record);
+    }
+
+    public static Map<String, Object> summary(Result result) {
+        Map<String, Object> record = new LinkedHashMap<>();
+        record.put("type", "summary");
+        record.put("benefit", result.getBenefit());
+        record.put("cost", result.getCost());
+        record.put("iteration", result.getIteration());
+        record.put("timeConsumption", result.getTimeConsumption());
+        record.put("revenue", result.getRevenue());
+        record.put("decisionCount", result.getDecisions().size());
+        record.put("warmStartDevices", result.getWarmStartDevices());
+        record.put("warmStartKept", result.getWarmStartKept());
+        record.put("schedule", result.getSchedule());
+        record.put("rounds", result.getRounds());
+        record.put("solveMillis", result.getSolveMillis());
+        record.put("deadlineReached", result.isDeadlineReached());
+        record.put("seed", result.getSeed());
+        record.put("prices", result.getPrices());
+        return record;
+    }
+
+    // NDJSON结果文件：每条记录一行
+    public static RecordSink ndjsonSink(OutputStream out) {
+        return record -> {
+            out.write(record);
+            out.write('\n');
+        };
+    }
+}
@@ -1,18 +1,38 @@
 package main.java.method;
 
 import java.util.ArrayList;
+import java.util.Collections;
 import java.util.Random;
 import main.java.model.Station;
 import main.java.model.Device;
 import main.java.model.ConstNum;
 import main.java.model.Decision;
 import main.java.model.Result;
+import main.java.model.SlotUsage;
 
 public class AU_SmartGrid_Game {
 
+    // 求解过程中的决策快照回调（按params.snapshotMs间隔调用）
+    public interface SnapshotListener {
+        void onSnapshot(ArrayList<Decision> decisions, Result result);
+    }
+
     public static Result getResult(Station station, ArrayList<Device> devices, Random rad) {
+        return getResult(station, devices, rad, false);
+    }
 
+    // batchSchedule=false：每轮随机选一个胜者更新（原方式）；true：每轮在站点容量内接受所有互不冲突的改进决策
+    public static Result getResult(Station station, ArrayList<Device> devices, Random rad, boolean batchSchedule) {
+        return getResult(station, devices, rad, batchSchedule, null);
+    }
+
+    public static Result getResult(Station station, ArrayList<Device> devices, Random rad, boolean batchSchedule, SnapshotListener listener) {
+
+        long start = System.currentTimeMillis();
+        // 时间预算用尽时以当前决策（截止前最后一次更新后的均衡近似）作为结果
+        long deadline = ConstNum.timeBudgetMs > 0 ? start + ConstNum.timeBudgetMs : Long.MAX_VALUE;
         Result result = new Result();
+        result.setSchedule(batchSchedule ? "batch" : "single");
 
         System.out.println("Game Start: userNum: "+ devices.size());
         // initialize result
@@ -39,10 +59,52 @@ public class AU_SmartGrid_Game {
         // avg price
         double avgPrice = Station.getAvgPrice(station.getPrice());
 
+        // warm start: 以上一周期的均衡决策为初始决策，按设备顺序逐个占用站点容量
+        double[] chargeUsed = new double[ConstNum.timeSlots];
+        double[] dischargeUsed = new double[ConstNum.timeSlots];
+        for(int i=0;i<devices.size();i++) {
+            if(devices.get(i).getWarmStart() == null) {
+                continue;
+            }
+            result.setWarmStartDevices(result.getWarmStartDevices()+1);
+            Decision warmDecision = getWarmStartDecision(station, devices.get(i), chargeUsed, dischargeUsed, avgPrice);
+            if(warmDecision != null) {
+                decisions.set(i, warmDecision);
+                addUsage(warmDecision, chargeUsed, dischargeUsed);
+                result.setWarmStartKept(result.getWarmStartKept()+1);
+            }
+        }
+
+        // 各时间片占用汇总，胜者更新时增量维护（批量更新的容量校验同样依赖汇总）
+        SlotUsage usage = null;
+        if(station.isCachedSums() || batchSchedule) {
+            usage = new SlotUsage(decisions);
+        }
+        if(station.isCachedSums()) {
+            station.setUsage(usage);
+        }
+
         //game part
+        long lastSnapshot = start;
         while(true) {
-            ArrayList<Decision> tempDecisions = getUpdateRequest(station, devices, decisions, result, avgPrice, rad);
+            if(listener != null && ConstNum.snapshotMs > 0 && System.currentTimeMillis() - lastSnapshot >= ConstNum.snapshotMs) {
+                listener.onSnapshot(decisions, result);
+                lastSnapshot = System.currentTimeMillis();
+            }
+            if(System.currentTimeMillis() >= deadline) {
+                result.setDeadlineReached(true);
+                break;
+            }
+            ArrayList<Decision> tempDecisions = getUpdateRequest(station, devices, decisions, result, avgPrice, rad, deadline);
+            result.setRounds(result.getRounds()+1);
             //System.out.println("Decision ready");
+            if(batchSchedule) {
+                // 没有可接受的更新（无改进请求，或改进请求均与当前决策相同/超出站点容量）时再迭代结果也不会变化，视为收敛
+                if(applyBatch(tempDecisions, decisions, usage, station, result, rad) <= 0) {
+                    break;
+                }
+                continue;
+            }
             int winner = getWinner(tempDecisions, rad);
 
             if(winner == -1) {
@@ -55,13 +117,56 @@ public class AU_SmartGrid_Game {
                     continue;
                 }
                 //update result
+                if(usage != null) {
+                    usage.replace(previousDecision, newDecision);
+                }
                 decisions.set(winner, newDecision);
                 result.setIteration(result.getIteration()+1);
 
                 //System.out.println("Iter: " +result.getIteration() + " Winner: " + winner + " Benefit: " + decisions.get(winner).getBenefit());
             }
         }
-        //calculate the benefit, cost and revenue
+        // 截止时的最后一轮可能只搜索了部分设备，未更新不代表已收敛
+        if(System.currentTimeMillis() >= deadline) {
+            result.setDeadlineReached(true);
+        }
+        station.setUsage(null);
+        finishResult(result, decisions, station);
+        result.setSolveMillis(System.currentTimeMillis() - start);
+        return result;
+    }
+
+    // 批量更新（Jacobi式）：设备收益只取决于自身决策，设备间只通过站点容量相互影响
+    // 按随机顺序逐个接受改进决策，替换后各时间片占用仍不超过maxCharge/maxDischarge的才接受，冲突的留待下一轮
+    // 返回本轮接受的更新数，无改进请求时返回-1；调用方对<=0均按收敛处理（0表示改进请求都无法接受）
+    public static int applyBatch(ArrayList<Decision> tempDecisions, ArrayList<Decision> decisions, SlotUsage usage, Station station, Result result, Random rad) {
+        ArrayList<Integer> candidates = new ArrayList<>();
+        for(int i=0;i<tempDecisions.size();i++) {
+            if(!Decision.isUnallocated(tempDecisions.get(i))) {
+                candidates.add(i);
+            }
+        }
+        if(candidates.isEmpty()) {
+            return -1;
+        }
+        Collections.shuffle(candidates, rad);
+        int applied = 0;
+        for(int index : candidates) {
+            Decision previousDecision = decisions.get(index);
+            Decision newDecision = tempDecisions.get(index);
+            if(isSameDecision(previousDecision, newDecision) || !usage.fits(previousDecision, newDecision, station)) {
+                continue;
+            }
+            usage.replace(previousDecision, newDecision);
+            decisions.set(index, newDecision);
+            result.setIteration(result.getIteration()+1);
+            applied++;
+        }
+        return applied;
+    }
+
+    // calculate the benefit, cost and revenue（单次求解与增量会话共用）
+    public static void finishResult(Result result, ArrayList<Decision> decisions, Station station) {
         double overallBenefit = 0;
         for(int i=0;i<decisions.size();i++) {
             overallBenefit += decisions.get(i).getBenefit();
@@ -72,11 +177,74 @@ public class AU_SmartGrid_Game {
         double revenue = 0;
         revenue = Result.getOverallRevenue(result, station);
         result.setRevenue(revenue);
+    }
 
-        return result;
+    // 热启动决策校验：逐时间片检查档位、储能与站点剩余容量（与flyGenerate一致），不可行的时间片置为空闲
+    // 校验后无有效时间片或收益不为正时返回null（从空闲开始）
+    public static Decision getWarmStartDecision(Station station, Device device, double[] chargeUsed, double[] dischargeUsed, double avgPrice) {
+        Decision warmStart = device.getWarmStart();
+        if(warmStart == null || warmStart.getDc() == null || warmStart.getSpeed() == null) {
+            return null;
+        }
+        Decision decision = new Decision();
+        int slots = Math.min(ConstNum.timeSlots, Math.min(warmStart.getDc().length, warmStart.getSpeed().length));
+        for(int i=0;i<slots;i++) {
+            int dc = warmStart.getDc()[i];
+            double speed = warmStart.getSpeed()[i];
+            int level;
+            double cost;
+            if(dc == -1) {
+                level = device.getChargeSpeed().indexOf(speed);
+                if(level < 0 || chargeUsed[i] + speed > station.getMaxCharge()) {
+                    continue;
+                }
+                if(device.getProduce().get(i)*ConstNum.longPerTime + speed*ConstNum.longPerTime + device.getCurrentStorage().get(i) - device.getDemands().get(i) > device.getOverallCapacity()) {
+                    continue;
+                }
+                cost = device.getChargeCost().get(level);
+            }else if(dc == 1) {
+                level = device.getDischargeSpeed().indexOf(speed);
+                if(level < 0 || dischargeUsed[i] + speed > station.getMaxDischarge()) {
+                    continue;
+                }
+                if(device.getProduce().get(i)*ConstNum.longPerTime - speed*ConstNum.longPerTime + device.getCurrentStorage().get(i) < device.getDemands().get(i)) {
+                    continue;
+                }
+                cost = device.getDischargeCost().get(level);
+            }else {
+                continue;
+            }
+            decision.getDc()[i] = dc;
+            decision.getSpeed()[i] = speed;
+            decision.getCost()[i] = cost;
+        }
+        if(Decision.isUnallocated(decision)) {
+            return null;
+        }
+        decision.setBenefit(Decision.getOverallBenefit(device, decision, station, avgPrice));
+        if(decision.getBenefit() <= 0) {
+            return null;
+        }
+        return decision;
+    }
+
+    // 累加决策占用的站点充放电容量
+    public static void addUsage(Decision decision, double[] chargeUsed, double[] dischargeUsed) {
+        for(int i=0;i<ConstNum.timeSlots;i++) {
+            if(decision.getDc()[i] == -1) {
+                chargeUsed[i] += decision.getSpeed()[i];
+            }else if(decision.getDc()[i] == 1) {
+                dischargeUsed[i] += decision.getSpeed()[i];
+            }
+        }
     }
 
     public static ArrayList<Decision> getUpdateRequest(Station station, ArrayList<Device> devices, ArrayList<Decision> decisions, Result result, double avgPrice, Random rad){
+        return getUpdateRequest(station, devices, decisions, result, avgPrice, rad, Long.MAX_VALUE);
+    }
+
+    // 超过deadline后其余设备不再搜索（保持空闲请求），本轮只在已完成搜索的设备中更新
+    public static ArrayList<Decision> getUpdateRequest(Station station, ArrayList<Device> devices, ArrayList<Decision> decisions, Result result, double avgPrice, Random rad, long deadline){
         ArrayList<Decision> tempDecisions = new ArrayList<>();
         for(int i=0;i<decisions.size();i++) {
             tempDecisions.add(new Decision());
@@ -89,6 +257,9 @@ public class AU_SmartGrid_Game {
 
         }
         for(int i=0;i<devices.size();i++) {
+            if(deadline != Long.MAX_VALUE && System.currentTimeMillis() >= deadline) {
+                break;
+            }
 
             Decision maxBenefitDecision = FOA_Best_Decision.getFOADecisionPerDevice(station, devices.get(i), decisions, avgPrice, rad);
             //update play_i's update request
@@ -18,7 +18,8 @@ public class FOA_Best_Decision {
             bestDecision.getSpeed()[j] = 0.0;
             bestDecision.getCost()[j] = 0.0;
         }
-        double bestFitness = decisions.get(device.getId()).getBenefit();
+        // 收益须超过当前决策tolerance以上才视为改进
+        double bestFitness = decisions.get(device.getId()).getBenefit() + ConstNum.tolerance;
 
 
         for(int t=0;t<ConstNum.iterationFoA;t++) {
@@ -108,7 +109,7 @@ public class FOA_Best_Decision {
                 dc = 1;
             }
 
-            double sumIExceptIndex = Station.getSumIPerTimeExceptIndex(decisions, device.getId(), index, dc);
+            double sumIExceptIndex = station.getSumExceptIndex(decisions, device.getId(), index, dc);
             if(dc == -1 && (device.getProduce().get(index)*ConstNum.longPerTime + speed*ConstNum.longPerTime + device.getCurrentStorage().get(index) - device.getDemands().get(index)> device.getOverallCapacity()) ) {
                 continue;
             }
@@ -0,0 +1,54 @@
+package main.java.method;
+
+import main.java.dataOp.DataProcess;
+import main.java.dataOp.SolverInput;
+import main.java.model.Result;
+import main.java.model.Station;
+
+import java.util.Random;
+
+/**
+ * 单次求解入口（MainMethod与SolverServer共用）：按请求头设置求解参数、配置站点后执行博弈
+ * 随机数只来自以seed初始化的Random，seed与电价相同的单次求解结果可复现（增量会话受设备加入时机影响，不保证复现）
+ */
+public class GameSolver {
+
+    public static Result solve(SolverInput input) {
+        return solve(input, null);
+    }
+
+    public static Result solve(SolverInput input, AU_SmartGrid_Game.SnapshotListener listener) {
+        if (input.getDevices() == null || input.getDevices().isEmpty()) {
+            throw new IllegalArgumentException("devices列表为空！");
+        }
+        // 求解参数须在生成站点电价、创建决策之前设置（时间片数决定数组长度）
+        input.applyParams();
+        input.checkDevices(input.getDevices());
+        long seed = input.getSeed();
+        Random rad = new Random(seed);
+        Station station = DataProcess.getStation(rad);
+        input.configurePrices(station);
+        input.configureStation(station);
+        Result result = AU_SmartGrid_Game.getResult(station, input.getDevices(), rad, input.isBatchSchedule(), listener);
+        result.setSeed(seed);
+        result.setPrices(station.getPrice());
+        return result;
+    }
+
+    // 增量求解会话：站点配置与solve一致，设备由admit逐批加入（首批可为空）
+    public static IncrementalGame openSession(SolverInput input) {
+        input.applyParams();
+        input.checkDevices(input.getDevices());
+        long seed = input.getSeed();
+        Random rad = new Random(seed);
+        Station station = DataProcess.getStation(rad);
+        input.configurePrices(station);
+        input.configureStation(station);
+        IncrementalGame session = new IncrementalGame(station, rad, seed, input.isBatchSchedule());
+        session.start();
+        if (!input.getDevices().isEmpty()) {
+            session.admit(input.getDevices());
+        }
+        return session;
+    }
+}
@@ -0,0 +1,253 @@
+package main.java.method;
+
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Random;
+import main.java.model.ConstNum;
+import main.java.model.Decision;
+import main.java.model.Device;
+import main.java.model.Result;
+import main.java.model.SlotUsage;
+import main.java.model.Station;
+
+/**
+ * 增量博弈会话：上传窗口内先对已到达的设备开始最优响应迭代，后到的设备以空闲决策加入后继续迭代
+ * 后台线程每轮对当前设备集合的快照计算更新请求，只在应用胜者时加锁，接收设备不必等待整轮结束
+ * 当前设备集合收敛后线程等待新设备；finish后不再接收设备，迭代至收敛后返回结果
+ */
+public class IncrementalGame {
+
+    private final Station station;
+    private final Random rad;
+    private final boolean batchSchedule;
+    private final double avgPrice;
+    private final ArrayList<Device> devices = new ArrayList<>();
+    private final ArrayList<Decision> decisions = new ArrayList<>();
+    // 设备最近一次加入/替换时的代数，本轮开始后被替换的设备不应用本轮结果
+    private final ArrayList<Integer> admittedGeneration = new ArrayList<>();
+    private final Result result = new Result();
+
+    private int generation = 0;
+    private boolean converged = true;
+    private boolean finished = false;
+    private boolean aborted = false;
+    private int earlyRounds = 0;
+    private int rounds = 0;
+    private int admissions = 0;
+    private Throwable error = null;
+    private final Thread worker;
+    private final long start = System.currentTimeMillis();
+    // finish后的时间预算截止时间（params.timeBudgetMs，上传窗口内不限制）
+    private long deadline = Long.MAX_VALUE;
+    // finish后的决策快照回调（上传窗口内主线程仍在收发帧，不输出快照）
+    private AU_SmartGrid_Game.SnapshotListener listener = null;
+    private long lastSnapshot = 0;
+
+    public IncrementalGame(Station station, Random rad, long seed, boolean batchSchedule) {
+        this.station = station;
+        this.rad = rad;
+        this.batchSchedule = batchSchedule;
+        this.result.setSchedule(batchSchedule ? "batch" : "single");
+        this.result.setSeed(seed);
+        this.result.setPrices(station.getPrice());
+        this.avgPrice = Station.getAvgPrice(station.getPrice());
+        this.worker = new Thread(this::runRounds, "incremental-game");
+        this.worker.setDaemon(true);
+    }
+
+    public void start() {
+        System.out.println("Incremental Game Start");
+        worker.start();
+    }
+
+    /**
+     * 加入设备：id等于当前设备数为新设备（空闲决策），小于当前设备数为重复上传（替换数据并重置为空闲决策）
+     * 设备携带warmStart时以校验后的上一周期决策代替空闲决策
+     */
+    public synchronized int admit(List<Device> newDevices) {
+        if (finished) {
+            throw new IllegalStateException("会话已结束，不能再加入设备");
+        }
+        generation++;
+        for (Device device : newDevices) {
+            int id = device.getId();
+            if (id == devices.size()) {
+                devices.add(device);
+                decisions.add(new Decision());
+                admittedGeneration.add(generation);
+            } else if (id >= 0 && id < devices.size()) {
+                devices.set(id, device);
+                decisions.set(id, new Decision());
+                admittedGeneration.set(id, generation);
+            } else {
+                throw new IllegalArgumentException("设备id不连续：" + id + "，当前设备数" + devices.size());
+            }
+            if (device.getWarmStart() != null) {
+                warmStart(device);
+            }
+        }
+        admissions++;
+        converged = false;
+        notifyAll();
+        return devices.size();
+    }
+
+    // 热启动：在其余设备当前决策占用的容量之外校验上一周期决策（调用方持有锁）
+    private void warmStart(Device device) {
+        result.setWarmStartDevices(result.getWarmStartDevices() + 1);
+        double[] chargeUsed = new double[ConstNum.timeSlots];
+        double[] dischargeUsed = new double[ConstNum.timeSlots];
+        for (int i = 0; i < decisions.size(); i++) {
+            if (i != device.getId()) {
+                AU_SmartGrid_Game.addUsage(decisions.get(i), chargeUsed, dischargeUsed);
+            }
+        }
+        Decision warmDecision = AU_SmartGrid_Game.getWarmStartDecision(station, device, chargeUsed, dischargeUsed, avgPrice);
+        if (warmDecision != null) {
+            decisions.set(device.getId(), warmDecision);
+            result.setWarmStartKept(result.getWarmStartKept() + 1);
+        }
+    }
+
+    public synchronized int getDeviceCount() {
+        return devices.size();
+    }
+
+    private void runRounds() {
+        try {
+            while (true) {
+                ArrayList<Device> roundDevices;
+                ArrayList<Decision> roundDecisions;
+                int startGeneration;
+                long roundDeadline;
+                synchronized (this) {
+                    while (converged && !finished && !aborted) {
+                        wait();
+                    }
+                    if (aborted || (converged && finished)) {
+                        return;
+                    }
+                    if (finished && System.currentTimeMillis() >= deadline) {
+                        result.setDeadlineReached(true);
+                        return;
+                    }
+                    if (finished && listener != null && ConstNum.snapshotMs > 0
+                            && System.currentTimeMillis() - lastSnapshot >= ConstNum.snapshotMs) {
+                        result.setRounds(rounds);
+                        listener.onSnapshot(decisions, result);
+                        lastSnapshot = System.currentTimeMillis();
+                    }
+                    roundDevices = new ArrayList<>(devices);
+                    roundDecisions = new ArrayList<>(decisions);
+                    startGeneration = generation;
+                    roundDeadline = deadline;
+                }
+                // 本轮快照的占用汇总（设备随时可能加入，每轮按快照重建，O(n)）
+                station.setUsage(station.isCachedSums() ? new SlotUsage(roundDecisions) : null);
+
+                ArrayList<Decision> tempDecisions = AU_SmartGrid_Game.getUpdateRequest(
+                        station, roundDevices, roundDecisions, result, avgPrice, rad, roundDeadline);
+
+                synchronized (this) {
+                    rounds++;
+                    if (!finished) {
+                        earlyRounds++;
+                    }
+                    if (batchSchedule) {
+                        // 本轮开始后被替换的设备不参与本轮更新，容量按当前全部决策校验
+                        for (int i = 0; i < tempDecisions.size(); i++) {
+                            if (admittedGeneration.get(i) > startGeneration) {
+                                tempDecisions.set(i, new Decision());
+                            }
+                        }
+                        int applied = AU_SmartGrid_Game.applyBatch(
+                                tempDecisions, decisions, new SlotUsage(decisions), station, result, rad);
+                        // 本轮没有接受任何更新且期间无设备加入时已收敛（0表示改进请求都无法接受，继续迭代也不会变化）
+                        if (applied <= 0 && generation == startGeneration) {
+                            converged = true;
+                            notifyAll();
+                        }
+                        continue;
+                    }
+                    int winner = AU_SmartGrid_Game.getWinner(tempDecisions, rad);
+                    if (winner == -1) {
+                        // 本轮期间有新设备加入时继续迭代，否则当前设备集合已收敛
+                        if (generation == startGeneration) {
+                            converged = true;
+                            notifyAll();
+                        }
+                        continue;
+                    }
+                    if (admittedGeneration.get(winner) > startGeneration) {
+                        continue;
+                    }
+                    Decision newDecision = tempDecisions.get(winner);
+                    if (AU_SmartGrid_Game.isSameDecision(decisions.get(winner), newDecision)) {
+                        continue;
+                    }
+                    // 本轮期间有设备加入（可能带热启动决策占用容量）时，按当前全部决策重新校验容量
+                    if (generation != startGeneration
+                            && !new SlotUsage(decisions).fits(decisions.get(winner), newDecision, station)) {
+                        continue;
+                    }
+                    decisions.set(winner, newDecision);
+                    result.setIteration(result.getIteration() + 1);
+                }
+            }
+        } catch (Throwable e) {
+            synchronized (this) {
+                error = e;
+                converged = true;
+                notifyAll();
+            }
+        }
+    }
+
+    /**
+     * 结束接收设备，等待迭代收敛后返回结果；等待期间按params.snapshotMs间隔由迭代线程回调listener
+     */
+    public Result finish(AU_SmartGrid_Game.SnapshotListener listener) throws Exception {
+        synchronized (this) {
+            finished = true;
+            this.listener = listener;
+            this.lastSnapshot = System.currentTimeMillis();
+            if (ConstNum.timeBudgetMs > 0) {
+                deadline = System.currentTimeMillis() + ConstNum.timeBudgetMs;
+            }
+            notifyAll();
+        }
+        worker.join();
+        // 截止时的最后一轮可能只搜索了部分设备，未更新不代表已收敛
+        if (System.currentTimeMillis() >= deadline) {
+            result.setDeadlineReached(true);
+        }
+        if (error != null) {
+            throw new IllegalStateException("增量博弈异常：" + error, error);
+        }
+        synchronized (this) {
+            AU_SmartGrid_Game.finishResult(result, decisions, station);
+            result.setRounds(rounds);
+            result.setSolveMillis(System.currentTimeMillis() - start);
+            return result;
+        }
+    }
+
+    public void abort() {
+        synchronized (this) {
+            aborted = true;
+            notifyAll();
+        }
+    }
+
+    public synchronized int getEarlyRounds() {
+        return earlyRounds;
+    }
+
+    public synchronized int getRounds() {
+        return rounds;
+    }
+
+    public synchronized int getAdmissions() {
+        return admissions;
+    }
+}
@@ -1,33 +1,64 @@
 package main.java.method;
 
 import com.fasterxml.jackson.databind.ObjectMapper;
-import main.java.model.Device;
 import main.java.model.Result;
-import main.java.model.Station;
-import main.java.dataOp.DataProcess;
-import java.util.ArrayList;
-import java.util.Random;
+import main.java.dataOp.SolverInput;
+import main.java.dataOp.SolverOutput;
+
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.UncheckedIOException;
 
 public class MainMethod {
 
     public static void main(String[] args) throws Exception {
 
-        String devicesJson = args[0];
         ObjectMapper mapper = new ObjectMapper();
-        ArrayList<Device> devices = mapper.readValue(
-                devicesJson,
-                mapper.getTypeFactory().constructCollectionType(ArrayList.class, Device.class)
-        );
+        SolverInput input;
 
-        if (devices == null || devices.isEmpty()) {
-            throw new IllegalArgumentException("devices列表为空！");
+        // --input=- 从stdin读取NDJSON；--input=<路径> 从文件读取NDJSON；否则args[0]为整体JSON数组（旧方式）
+        // --output=<路径> 将结果以NDJSON写入结果文件（求解中的快照 + 逐条决策 + 汇总）；否则整体JSON打印到stdout（旧方式）
+        String inputArg = null;
+        String outputArg = null;
+        for (String arg : args) {
+            if (arg.startsWith("--input=")) {
+                inputArg = arg.substring("--input=".length());
+            } else if (arg.startsWith("--output=")) {
+                outputArg = arg.substring("--output=".length());
+            }
+        }
+        if (inputArg == null) {
+            input = SolverInput.readJsonArray(mapper, args[0]);
+        } else if ("-".equals(inputArg)) {
+            input = SolverInput.readNdjson(mapper, new BufferedInputStream(System.in));
+        } else {
+            try (InputStream in = new BufferedInputStream(new FileInputStream(inputArg))) {
+                input = SolverInput.readNdjson(mapper, in);
+            }
         }
 
-        Random rad = new Random();
-        Station station = DataProcess.getStation(rad);
-
-        Result result = AU_SmartGrid_Game.getResult(station, devices, rad);
-
-        System.out.println(mapper.writeValueAsString(result));
+        if (outputArg == null) {
+            Result result = GameSolver.solve(input);
+            System.out.println(mapper.writeValueAsString(result));
+            return;
+        }
+        try (OutputStream out = new BufferedOutputStream(new FileOutputStream(outputArg))) {
+            SolverOutput.RecordSink sink = SolverOutput.ndjsonSink(out);
+            // 求解过程中的快照逐行写入并刷新，进程被超时终止时调用方仍可读到最新快照
+            Result result = GameSolver.solve(input, (decisions, partial) -> {
+                try {
+                    sink.write(SolverOutput.snapshot(mapper, decisions, partial));
+                    out.flush();
+                } catch (IOException e) {
+                    throw new UncheckedIOException(e);
+                }
+            });
+            SolverOutput.emit(mapper, result, sink);
+        }
     }
-}
\ No newline at end of file
+}
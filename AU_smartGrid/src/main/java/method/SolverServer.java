@@ -0,0 +1,163 @@
+package main.java.method;
+
+import com.fasterxml.jackson.databind.JsonNode;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import main.java.dataOp.DataProcess;
+import main.java.dataOp.SolverInput;
+import main.java.dataOp.SolverOutput;
+import main.java.model.Device;
+import main.java.model.Result;
+
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.UncheckedIOException;
+import java.util.ArrayList;
+import java.util.LinkedHashMap;
+import java.util.Map;
+
+/**
+ * 常驻求解进程：JVM只启动一次，循环处理Python端发来的求解请求
+ * 协议：stdin/stdout上的长度前缀JSON帧（4字节大端长度 + UTF-8 JSON正文）
+ * 请求 op: ping / solve / shutdown，响应 op: pong / result / error / bye
+ * solve 头帧携带 deviceCount，其后逐帧发送设备数据；响应为逐帧决策（type=decision）+ 汇总帧（op=result）
+ * 求解过程中按params.snapshotMs间隔输出决策快照帧（type=snapshot），调用方保留最新一帧作为超时时的结果
+ * 增量求解会话 op: open / admit / finish / abort（响应 opened / admitted / result / aborted）
+ * open、admit 同样在头帧后逐帧发送 deviceCount 个设备，会话在后台线程迭代；finish 的响应格式与 solve 相同
+ */
+public class SolverServer {
+
+    public static void main(String[] args) throws Exception {
+        ObjectMapper mapper = new ObjectMapper();
+        DataInputStream in = new DataInputStream(new BufferedInputStream(System.in));
+        DataOutputStream out = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(FileDescriptor.out)));
+        // stdout只用于帧协议，博弈过程中的打印全部改到stderr
+        System.setOut(System.err);
+
+        // 预加载电价表，后续请求不再解析price.xlsx
+        DataProcess.loadHourlyPrices();
+
+        // 同一进程同一时间只有一个增量会话（Python端会话独占一个求解进程）
+        IncrementalGame session = null;
+
+        while (true) {
+            byte[] body;
+            try {
+                body = readFrame(in);
+            } catch (EOFException e) {
+                break;
+            }
+
+            Map<String, Object> response = new LinkedHashMap<>();
+            boolean shutdown = false;
+            try {
+                JsonNode request = mapper.readTree(body);
+                String op = request.path("op").asText("solve");
+                if ("ping".equals(op)) {
+                    response.put("op", "pong");
+                } else if ("shutdown".equals(op)) {
+                    response.put("op", "bye");
+                    shutdown = true;
+                } else if ("solve".equals(op)) {
+                    // 头帧之后紧跟deviceCount个设备帧，逐帧解析
+                    SolverInput input = new SolverInput();
+                    input.setHeader(request);
+                    int deviceCount = request.path("deviceCount").asInt(0);
+                    for (int i = 0; i < deviceCount; i++) {
+                        input.addDevice(mapper.readValue(readFrame(in), Device.class));
+                    }
+                    Result result = GameSolver.solve(input, snapshotWriter(mapper, out));
+                    // 先逐帧输出决策，最后一帧为汇总（op=result）
+                    SolverOutput.emitDecisions(mapper, result, record -> writeFrame(out, record));
+                    response.put("op", "result");
+                    response.putAll(SolverOutput.summary(result));
+                } else if ("open".equals(op)) {
+                    if (session != null) {
+                        session.abort();
+                    }
+                    SolverInput input = new SolverInput();
+                    input.setHeader(request);
+                    int deviceCount = request.path("deviceCount").asInt(0);
+                    for (int i = 0; i < deviceCount; i++) {
+                        input.addDevice(mapper.readValue(readFrame(in), Device.class));
+                    }
+                    session = GameSolver.openSession(input);
+                    response.put("op", "opened");
+                    response.put("deviceCount", session.getDeviceCount());
+                } else if ("admit".equals(op)) {
+                    int deviceCount = request.path("deviceCount").asInt(0);
+                    ArrayList<Device> devices = new ArrayList<>(deviceCount);
+                    for (int i = 0; i < deviceCount; i++) {
+                        devices.add(mapper.readValue(readFrame(in), Device.class));
+                    }
+                    if (session == null) {
+                        throw new IllegalStateException("无进行中的增量会话");
+                    }
+                    new SolverInput().checkDevices(devices);
+                    response.put("op", "admitted");
+                    response.put("deviceCount", session.admit(devices));
+                } else if ("finish".equals(op)) {
+                    if (session == null) {
+                        throw new IllegalStateException("无进行中的增量会话");
+                    }
+                    IncrementalGame finishing = session;
+                    session = null;
+                    long start = System.currentTimeMillis();
+                    Result result = finishing.finish(snapshotWriter(mapper, out));
+                    SolverOutput.emitDecisions(mapper, result, record -> writeFrame(out, record));
+                    response.put("op", "result");
+                    response.putAll(SolverOutput.summary(result));
+                    response.put("admissions", finishing.getAdmissions());
+                    response.put("earlyRounds", finishing.getEarlyRounds());
+                    response.put("finishMillis", System.currentTimeMillis() - start);
+                } else if ("abort".equals(op)) {
+                    if (session != null) {
+                        session.abort();
+                        session = null;
+                    }
+                    response.put("op", "aborted");
+                } else {
+                    throw new IllegalArgumentException("未知op：" + op);
+                }
+            } catch (Exception e) {
+                response.clear();
+                response.put("op", "error");
+                response.put("msg", e.getClass().getSimpleName() + ": " + e.getMessage());
+            }
+
+            writeFrame(out, mapper.writeValueAsBytes(response));
+            if (shutdown) {
+                break;
+            }
+        }
+    }
+
+    // 快照帧与决策帧、汇总帧写入同一输出流：solve在主线程中回调；增量会话只在finish期间（主线程阻塞等待）由迭代线程回调
+    private static AU_SmartGrid_Game.SnapshotListener snapshotWriter(ObjectMapper mapper, DataOutputStream out) {
+        return (decisions, result) -> {
+            try {
+                writeFrame(out, SolverOutput.snapshot(mapper, decisions, result));
+            } catch (IOException e) {
+                throw new UncheckedIOException(e);
+            }
+        };
+    }
+
+    private static byte[] readFrame(DataInputStream in) throws IOException {
+        int length = in.readInt();
+        byte[] body = new byte[length];
+        in.readFully(body);
+        return body;
+    }
+
+    private static void writeFrame(DataOutputStream out, byte[] body) throws IOException {
+        out.writeInt(body.length);
+        out.write(body);
+        out.flush();
+    }
+}
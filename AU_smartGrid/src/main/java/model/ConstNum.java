@@ -1,5 +1,7 @@
 package main.java.model;
 
+import com.fasterxml.jackson.databind.JsonNode;
+
 public class ConstNum {
 
 
@@ -12,4 +14,51 @@ public class ConstNum {
     public static int popSize = 50;
     public static int iterationFoA = 20;
 
+    // 最优响应的最小改进量：新决策收益须超过当前收益tolerance以上才视为改进
+    public static double tolerance = 0.0;
+    // 单次求解的时间预算（毫秒，0=不限制），到时以当前决策作为结果返回
+    public static long timeBudgetMs = 0;
+    // 求解过程中输出当前决策快照的间隔（毫秒，0=不输出）
+    public static long snapshotMs = 0;
+
+    public static final int DEFAULT_TIME_SLOTS = 3;
+    public static final int DEFAULT_LONG_PER_TIME = 15;
+    public static final int DEFAULT_POP_SIZE = 50;
+    public static final int DEFAULT_ITERATION_FOA = 20;
+
+    // 恢复默认参数（请求未携带params时）
+    public static void reset() {
+        timeSlots = DEFAULT_TIME_SLOTS;
+        longPerTime = DEFAULT_LONG_PER_TIME;
+        popSize = DEFAULT_POP_SIZE;
+        iterationFoA = DEFAULT_ITERATION_FOA;
+        tolerance = 0.0;
+        timeBudgetMs = 0;
+        snapshotMs = 0;
+    }
+
+    // 按请求头的params块设置本次求解参数，缺省项取默认值
+    // 常驻求解进程逐个处理请求（增量会话独占进程），求解期间参数不会被其他请求修改
+    public static void configure(JsonNode params) {
+        reset();
+        if (params == null || params.isMissingNode() || params.isNull()) {
+            return;
+        }
+        timeSlots = positive(params, "timeSlots", DEFAULT_TIME_SLOTS);
+        longPerTime = positive(params, "slotMinutes", DEFAULT_LONG_PER_TIME);
+        popSize = positive(params, "popSize", DEFAULT_POP_SIZE);
+        iterationFoA = positive(params, "iterationFoA", DEFAULT_ITERATION_FOA);
+        tolerance = Math.max(0.0, params.path("tolerance").asDouble(0.0));
+        timeBudgetMs = Math.max(0L, params.path("timeBudgetMs").asLong(0L));
+        snapshotMs = Math.max(0L, params.path("snapshotMs").asLong(0L));
+    }
+
+    private static int positive(JsonNode params, String name, int defaultValue) {
+        int value = params.path(name).asInt(defaultValue);
+        if (value <= 0) {
+            throw new IllegalArgumentException("params." + name + "应为正整数：" + params.path(name));
+        }
+        return value;
+    }
+
 }
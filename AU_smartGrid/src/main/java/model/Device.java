@@ -13,6 +13,8 @@ public class Device {
     private ArrayList<Double> dischargeSpeed = new ArrayList<>();
     private ArrayList<Double> chargeCost = new ArrayList<>();
     private ArrayList<Double> dischargeCost = new ArrayList<>();
+    // 上一周期的均衡决策（热启动初始值），可为空
+    private Decision warmStart = null;
 
     public int getId() {
         return id;
@@ -86,6 +88,14 @@ public class Device {
         this.dischargeCost = dischargeCost;
     }
 
+    public Decision getWarmStart() {
+        return warmStart;
+    }
+
+    public void setWarmStart(Decision warmStart) {
+        this.warmStart = warmStart;
+    }
+
     public Device() {
 
     }
@@ -94,6 +104,7 @@ public class Device {
         this.id = device.id;
         this.overallCapacity = device.overallCapacity;
         this.agreementPrice = device.agreementPrice;
+        this.warmStart = device.warmStart;
 
         for(int i=0;i<device.demands.size();i++) {
             this.currentStorage.add(device.currentStorage.get(i));
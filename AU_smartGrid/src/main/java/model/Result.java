@@ -8,6 +8,14 @@ public class Result {
     private int iteration = 0;
     private double timeConsumption = 0;
     private double revenue = 0;
+    private int warmStartDevices = 0; // 携带热启动决策的设备数
+    private int warmStartKept = 0; // 热启动决策校验后仍有效（非空闲且收益为正）的设备数
+    private String schedule = "single"; // 更新方式：single=每轮单个胜者，batch=每轮批量更新
+    private int rounds = 0; // 博弈轮数（每轮对全部设备求一次最优响应）
+    private long solveMillis = 0; // 博弈耗时（毫秒）
+    private boolean deadlineReached = false; // 是否因时间预算用尽提前结束（结果为截止时的当前决策）
+    private long seed = 0; // 本次求解的随机种子（请求头seed，未指定时随机生成），与prices一起可复现本次求解
+    private ArrayList<Double> prices = new ArrayList<>(); // 本次求解使用的各时间片电价
     private ArrayList<Decision> decisions = new ArrayList<>();
 
     public double getBenefit() {
@@ -40,6 +48,54 @@ public class Result {
     public void setRevenue(double revenue) {
         this.revenue = revenue;
     }
+    public int getWarmStartDevices() {
+        return warmStartDevices;
+    }
+    public void setWarmStartDevices(int warmStartDevices) {
+        this.warmStartDevices = warmStartDevices;
+    }
+    public int getWarmStartKept() {
+        return warmStartKept;
+    }
+    public void setWarmStartKept(int warmStartKept) {
+        this.warmStartKept = warmStartKept;
+    }
+    public String getSchedule() {
+        return schedule;
+    }
+    public void setSchedule(String schedule) {
+        this.schedule = schedule;
+    }
+    public int getRounds() {
+        return rounds;
+    }
+    public void setRounds(int rounds) {
+        this.rounds = rounds;
+    }
+    public long getSolveMillis() {
+        return solveMillis;
+    }
+    public void setSolveMillis(long solveMillis) {
+        this.solveMillis = solveMillis;
+    }
+    public boolean isDeadlineReached() {
+        return deadlineReached;
+    }
+    public void setDeadlineReached(boolean deadlineReached) {
+        this.deadlineReached = deadlineReached;
+    }
+    public long getSeed() {
+        return seed;
+    }
+    public void setSeed(long seed) {
+        this.seed = seed;
+    }
+    public ArrayList<Double> getPrices() {
+        return prices;
+    }
+    public void setPrices(ArrayList<Double> prices) {
+        this.prices = prices;
+    }
     public ArrayList<Decision> getDecisions() {
         return decisions;
     }
@@ -58,6 +114,14 @@ public class Result {
         this.iteration = result.iteration;
         this.timeConsumption = result.timeConsumption;
         this.revenue = result.revenue;
+        this.warmStartDevices = result.warmStartDevices;
+        this.warmStartKept = result.warmStartKept;
+        this.schedule = result.schedule;
+        this.rounds = result.rounds;
+        this.solveMillis = result.solveMillis;
+        this.deadlineReached = result.deadlineReached;
+        this.seed = result.seed;
+        this.prices = new ArrayList<>(result.prices);
         for(int i=0;i<result.decisions.size();i++) {
             this.decisions.add(new Decision(result.decisions.get(i)));
         }
@@ -0,0 +1,72 @@
+package main.java.model;
+
+import java.util.ArrayList;
+
+/**
+ * 站点各时间片的充放电占用汇总（所有设备当前决策的speed之和）
+ * 博弈中只有胜者更新决策时才修改，排除某一设备的占用为O(1)减法，替代逐设备累加
+ */
+public class SlotUsage {
+    private final double[] charge = new double[ConstNum.timeSlots];
+    private final double[] discharge = new double[ConstNum.timeSlots];
+    // 增减累积的浮点误差容差
+    private static final double EPSILON = 1e-9;
+
+    public SlotUsage(ArrayList<Decision> decisions) {
+        for(int i=0;i<decisions.size();i++) {
+            add(decisions.get(i), 1);
+        }
+    }
+
+    // 决策从oldDecision变为newDecision时更新汇总
+    public void replace(Decision oldDecision, Decision newDecision) {
+        add(oldDecision, -1);
+        add(newDecision, 1);
+    }
+
+    private void add(Decision decision, int sign) {
+        for(int i=0;i<ConstNum.timeSlots;i++) {
+            if(decision.getDc()[i] == -1) {
+                charge[i] += sign * decision.getSpeed()[i];
+            }else if(decision.getDc()[i] == 1) {
+                discharge[i] += sign * decision.getSpeed()[i];
+            }
+        }
+    }
+
+    // 决策由oldDecision替换为newDecision后，各时间片占用是否仍在站点充放电容量内
+    public boolean fits(Decision oldDecision, Decision newDecision, Station station) {
+        for(int i=0;i<ConstNum.timeSlots;i++) {
+            int dc = newDecision.getDc()[i];
+            if(dc == 0) {
+                continue;
+            }
+            double used = dc == -1 ? charge[i] : discharge[i];
+            if(oldDecision.getDc()[i] == dc) {
+                used -= oldDecision.getSpeed()[i];
+            }
+            double max = dc == -1 ? station.getMaxCharge() : station.getMaxDischarge();
+            if(used + newDecision.getSpeed()[i] > max + EPSILON) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    // 与Station.getSumIPerTimeExceptIndex结果一致：时间片time上与dc同向、除index外所有设备的speed之和
+    public double getSumExceptIndex(ArrayList<Decision> decisions, int index, int time, int dc) {
+        double sum;
+        if(dc == -1) {
+            sum = charge[time];
+        }else if(dc == 1) {
+            sum = discharge[time];
+        }else {
+            return Station.getSumIPerTimeExceptIndex(decisions, index, time, dc);
+        }
+        if(index >= 0 && index < decisions.size() && decisions.get(index).getDc()[time] == dc) {
+            sum -= decisions.get(index).getSpeed()[time];
+        }
+        // 增减累积的浮点误差不应使占用为负
+        return Math.max(0.0, sum);
+    }
+}
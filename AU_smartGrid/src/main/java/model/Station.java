@@ -6,6 +6,10 @@ public class Station {
     private ArrayList<Double> price = new ArrayList<>();
     private double maxCharge = 0;
     private double maxDischarge = 0;
+    // 是否使用汇总占用（cached）代替逐设备累加（scan），由请求头sumMode决定
+    private boolean cachedSums = true;
+    // 当前博弈决策的各时间片占用汇总，由博弈循环维护
+    private SlotUsage usage = null;
 
     public ArrayList<Double> getPrice() {
         return price;
@@ -26,6 +30,19 @@ public class Station {
         this.maxDischarge = maxDischarge;
     }
 
+    public boolean isCachedSums() {
+        return cachedSums;
+    }
+    public void setCachedSums(boolean cachedSums) {
+        this.cachedSums = cachedSums;
+    }
+    public SlotUsage getUsage() {
+        return usage;
+    }
+    public void setUsage(SlotUsage usage) {
+        this.usage = usage;
+    }
+
     public Station() {
 
     }
@@ -36,6 +53,7 @@ public class Station {
         }
         this.maxCharge = s.maxCharge;
         this.maxDischarge = s.maxDischarge;
+        this.cachedSums = s.cachedSums;
     }
 
     public static double getAvgPrice (ArrayList<Double> price) {
@@ -48,6 +66,14 @@ public class Station {
 
 
 
+    // 有汇总占用时O(1)求得，否则逐设备累加
+    public double getSumExceptIndex(ArrayList<Decision> decisions, int index, int time, int dc) {
+        if(usage != null) {
+            return usage.getSumExceptIndex(decisions, index, time, dc);
+        }
+        return getSumIPerTimeExceptIndex(decisions, index, time, dc);
+    }
+
     public static double getSumIPerTimeExceptIndex(ArrayList<Decision> decisions, int index, int time, int dc) {
         double sum = 0;
         for(int i=0;i<decisions.size();i++) {
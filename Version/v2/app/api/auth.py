@@ -1,10 +1,11 @@
 import logging
+import uuid
 from datetime import datetime, timedelta  # 新增：导入timedelta
 import pytz
 import jwt
 from jwt.exceptions import InvalidTokenError
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, g, make_response
-from app.utils import SessionLocal, login_required, page_login_required
+from app.utils import SessionLocal, login_required, page_login_required, token_digest, TOKEN_CACHE, PRESENCE
 from app.models import YstcUser, Device, UserAuthToken
 from sqlalchemy.exc import OperationalError
 from ..config import config
@@ -163,8 +164,9 @@ def device_login():
                 return jsonify({"code": 401, "msg": "账号或密码错误"}), 401
             log.info(f"登录校验通过：账号{data['username']}，用户ID={user.id}")
 
-            # 生成Token
-            payload = {"user_id": user.id}
+            # 生成Token（iat + jti保证每次登录的Token唯一，摘要唯一索引不冲突）
+            issued_at = int(time.time())
+            payload = {"user_id": user.id, "iat": issued_at, "jti": uuid.uuid4().hex}
             access_token = jwt.encode(
                 payload,
                 config.JWT_SECRET_KEY.encode("utf-8") if isinstance(config.JWT_SECRET_KEY,
@@ -172,7 +174,7 @@ def device_login():
                 algorithm="HS256"
             )
             refresh_token = jwt.encode(
-                {"user_id": user.id, "refresh": True},
+                {"user_id": user.id, "refresh": True, "iat": issued_at, "jti": uuid.uuid4().hex},
                 config.JWT_SECRET_KEY.encode("utf-8") if isinstance(config.JWT_SECRET_KEY,
                                                                     str) else config.JWT_SECRET_KEY,
                 algorithm="HS256"
@@ -181,8 +183,9 @@ def device_login():
             # 转为字符串
             access_token = access_token.decode("utf-8") if isinstance(access_token, bytes) else access_token
             refresh_token = refresh_token.decode("utf-8") if isinstance(refresh_token, bytes) else refresh_token
-            token_hash = access_token
-            refresh_token_hash = refresh_token
+            # 数据库只保存摘要
+            token_hash = token_digest(access_token)
+            refresh_token_hash = token_digest(refresh_token)
 
             # 减少锁竞争
             # 只锁定当前用户的有效Token
@@ -221,8 +224,10 @@ def device_login():
 
             # 快速提交事务，减少锁持有时间
             db.commit()
+            # 旧Token已失效，同步清除鉴权缓存
+            TOKEN_CACHE.invalidate_user(user.id)
 
-            log.info(f"登录成功：账号={data['username']}，生成Token哈希前10位={token_hash[:10]}")
+            log.info(f"登录成功：账号={data['username']}，生成Token摘要前10位={token_hash[:10]}")
 
             # 返回结果
             response = make_response(jsonify({
@@ -281,18 +286,17 @@ def verify_token():
             if not user_id:
                 return jsonify({"code": 401, "msg": "Token中无用户ID"}), 401
 
-            # 简化token_hash生成
-            token_hash = token
+            token_hash = token_digest(token)
 
-            # 检查Token是否在数据库中且有效
-            auth_token = db.query(UserAuthToken).filter(
-                UserAuthToken.user_id == user_id,
+            # 检查Token是否在数据库中且有效（按摘要唯一索引点查）
+            auth_token_id = db.query(UserAuthToken.id).filter(
                 UserAuthToken.token_hash == token_hash,
+                UserAuthToken.user_id == user_id,
                 UserAuthToken.is_valid == True
-            ).first()
+            ).scalar()
 
-            if not auth_token:
-                log.warning(f"Token失效：用户ID={user_id}，Token前10位={token_hash[:10]}")
+            if not auth_token_id:
+                log.warning(f"Token失效：用户ID={user_id}，Token摘要前10位={token_hash[:10]}")
                 return jsonify({"code": 401, "msg": "Token已失效"}), 401
 
             # 检查用户和设备是否存在
@@ -343,13 +347,10 @@ def device_logout():
                 options={"verify_exp": False}
             )
 
-            # 简化token_hash生成
-            token_hash = token
-
-            # 失效Token
+            # 失效Token（按摘要唯一索引定位）
             update_count = db.query(UserAuthToken).filter(
+                UserAuthToken.token_hash == token_digest(token),
                 UserAuthToken.user_id == user_id,
-                UserAuthToken.token_hash == token_hash,
                 UserAuthToken.is_valid == True
             ).update({
                 "is_valid": False,
@@ -357,11 +358,10 @@ def device_logout():
                 "update_time": datetime.now(AUS_TZ)
             })
 
-            # 更新设备状态为离线
-            g.device.status = "offline"
-            g.device.update_by = g.user.username
-            g.device.update_time = datetime.now(AUS_TZ)
             db.commit()
+            TOKEN_CACHE.invalidate(token)
+            # 设备离线状态随下一次在线状态批量落库写入
+            PRESENCE.mark_offline(g.device.id)
 
             # 清除Cookie
             response = make_response(jsonify({
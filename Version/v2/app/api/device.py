@@ -1,10 +1,12 @@
 import logging
 from flask import Blueprint, request, jsonify, g
 from app.utils import (
-    login_required, get_current_cycle, is_upload_window_open,
-    DEVICE_DATA, STORAGE_LOCK, SessionLocal
+    login_required, get_current_cycle, cycle_key, is_upload_window_open,
+    CYCLE_STORE, SessionLocal
 )
-from app.models import GameStrategy, StrategyDetail, ControlCommand
+from app.utils.device_schema import DeviceSchemaError
+from app.models import CycleResult, GameStrategy, StrategyDetail, ControlCommand
+from app.models.strategy import decode_legacy_json
 
 device_bp = Blueprint("device", __name__, url_prefix="/api/device")
 log = logging.getLogger("pt.api.device")
@@ -27,21 +29,28 @@ def upload_device_data():
                 "current_cycle": current_cycle
             }), 400
 
-        if not is_upload_window_open(current_cycle):
-            with STORAGE_LOCK:
-                cycle_status = DEVICE_DATA.get(current_cycle, {}).get("status", "unknown")
+        # 窗口已关闭或周期已封存（已交给求解器）时拒绝上传
+        # 写入只锁设备序列号所在分片，不同设备的并发上传互不阻塞
+        # 上传数据写入时按DEVICE_SCHEMA校验并转换为列式存储，不合法直接拒绝并返回出错字段
+        try:
+            accepted = is_upload_window_open(current_cycle) and \
+                CYCLE_STORE.append(current_cycle, device_id_str, device_data)
+        except DeviceSchemaError as e:
+            return jsonify({
+                "code": 400,
+                "msg": f"device_data校验失败：{str(e)}",
+                "field": e.field,
+                "current_cycle": current_cycle
+            }), 400
+
+        if not accepted:
+            cycle_status = CYCLE_STORE.get_status(current_cycle) or "unknown"
             return jsonify({
                 "code": 403,
                 "msg": f"上传窗口已关闭（周期状态：{cycle_status}）",
                 "current_cycle": current_cycle
             }), 403
 
-        # 初始化当前周期的DEVICE_DATA字典
-        with STORAGE_LOCK:
-            if current_cycle not in DEVICE_DATA:
-                DEVICE_DATA[current_cycle] = {}  # 先创建空字典
-            DEVICE_DATA[current_cycle][device_id_str] = device_data
-
         log.info(f"数据上传成功：设备{device_id_str}，周期{current_cycle}")
         return jsonify({
             "code": 200,
@@ -66,18 +75,30 @@ def get_strategy():
         if not cycle_time:
             return jsonify({"code": 400, "msg": "缺少cycle_time参数"}), 400
 
+        try:
+            strategy_cycle_time = cycle_key(cycle_time)
+        except ValueError:
+            return jsonify({"code": 400, "msg": "cycle_time格式错误，应为ISO时间"}), 400
+
         db = SessionLocal()
         try:
-            # GameStrategy按user_id关联
+            # 按(user_id, cycle_time)索引精确查询，耗时与历史策略数量无关
             game_strategy = db.query(GameStrategy).filter(
                 GameStrategy.user_id == g.user.id,
-                GameStrategy.strategy_name.like(f"%{cycle_time}%")  # 按周期时间模糊匹配
-            ).first()
+                GameStrategy.cycle_time == strategy_cycle_time
+            ).order_by(GameStrategy.id.desc()).first()
 
             if not game_strategy:
                 return jsonify({"code": 404, "msg": "未找到该周期策略"}), 404
 
-            details = db.query(StrategyDetail).filter(
+            # 查询列均包含在(strategy_id, time_slice_index, ...)索引中，无需回表
+            details = db.query(
+                StrategyDetail.time_slice_index,
+                StrategyDetail.time_point,
+                StrategyDetail.action_type,
+                StrategyDetail.power_setpoint,
+                StrategyDetail.expected_benefit
+            ).filter(
                 StrategyDetail.strategy_id == game_strategy.id
             ).order_by(StrategyDetail.time_slice_index).all()
 
@@ -91,10 +112,18 @@ def get_strategy():
                     "expected_benefit": detail.expected_benefit
                 })
 
-            command = db.query(ControlCommand).filter(
+            # 全局收益存于周期结果表；旧数据仍保存在策略自身的strategy_params中
+            if game_strategy.cycle_result_id:
+                expected_benefit = db.query(CycleResult.total_benefit).filter(
+                    CycleResult.id == game_strategy.cycle_result_id
+                ).scalar()
+            else:
+                expected_benefit = GameStrategy.legacy_total_benefit(game_strategy.strategy_params)
+
+            command_params = db.query(ControlCommand.command_params).filter(
                 ControlCommand.strategy_id == game_strategy.id,
                 ControlCommand.device_id == device.id
-            ).first()
+            ).limit(1).scalar()
 
             return jsonify({
                 "code": 200,
@@ -104,9 +133,9 @@ def get_strategy():
                     "strategy_id": game_strategy.id,
                     "start_time": game_strategy.start_time.isoformat(),
                     "end_time": game_strategy.end_time.isoformat(),
-                    "expected_benefit": game_strategy.strategy_params.get("total_benefit"),
+                    "expected_benefit": expected_benefit,
                     "details": strategy_details,
-                    "command_params": command.command_params if command else None
+                    "command_params": decode_legacy_json(command_params)
                 }
             }), 200
 
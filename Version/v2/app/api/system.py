@@ -1,7 +1,7 @@
 import logging
 from flask import Blueprint, request, jsonify, render_template
-from app.utils import SessionLocal
-from app.models import YstcUser, Device, UserAuthToken, GameStrategy, StrategyDetail, ControlCommand
+from app.utils import SessionLocal, TOKEN_CACHE
+from app.models import YstcUser, Device, UserAuthToken, CycleResult, GameStrategy, StrategyDetail, ControlCommand
 
 # 创建蓝图
 system_bp = Blueprint("system", __name__, url_prefix="")
@@ -21,11 +21,13 @@ def reset_data():
             db.query(ControlCommand).delete()
             db.query(StrategyDetail).delete()
             db.query(GameStrategy).delete()
+            db.query(CycleResult).delete()
             db.query(UserAuthToken).delete()
             db.query(Device).delete()
             db.query(YstcUser).delete()
 
             db.commit()
+            TOKEN_CACHE.clear()
             log.info("所有数据已重置")
             return jsonify({"code": 200, "msg": "重置成功"}), 200
 
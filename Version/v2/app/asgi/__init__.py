@@ -0,0 +1,52 @@
+"""
+ASGI服务模式：auth_bp/device_bp的API接口由异步处理函数承接（路由与返回结构与Flask版一致，数据库访问为异步），
+页面、/reset等其余路由转交原Flask应用处理
+"""
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from a2wsgi import WSGIMiddleware
+from app.asgi import auth, device
+
+log = logging.getLogger("pt.asgi")
+
+
+def _run_cycle_service():
+    """周期循环在独立线程的事件循环中运行，不占用ASGI事件循环"""
+    from app.core.cycle_manager import service_loop
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(service_loop())
+    except Exception as e:
+        log.error(f"周期服务异常退出：{str(e)}", exc_info=True)
+    finally:
+        loop.close()
+
+
+def create_asgi_app(start_cycle_service=True):
+    # 原Flask应用负责页面/系统接口，同时完成数据库初始化
+    from app import create_app
+    flask_app = create_app()
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        if start_cycle_service:
+            log.info("启动周期后台服务...")
+            threading.Thread(target=_run_cycle_service, name="cycle-service", daemon=True).start()
+        yield
+
+    return Starlette(
+        routes=[
+            *auth.routes,
+            *device.routes,
+            Mount("/", app=WSGIMiddleware(flask_app)),
+        ],
+        lifespan=lifespan
+    )
+
+
+__all__ = ["create_asgi_app"]
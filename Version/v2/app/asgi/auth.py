@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+import pytz
+import jwt
+from jwt.exceptions import InvalidTokenError
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from starlette.routing import Route
+from app.utils import TOKEN_CACHE, PRESENCE, token_digest
+from app.utils.db import get_async_session_factory
+from app.models import YstcUser, Device, UserAuthToken
+from app.asgi.common import json_response, read_json, get_bearer_token, login_required, store_call
+from ..config import config
+
+log = logging.getLogger("pt.asgi.auth")
+AUS_TZ = pytz.timezone(config.TZ)
+
+DEADLOCK_RETRIES = 3
+DEADLOCK_DELAY = 1
+
+
+def _secret():
+    return config.JWT_SECRET_KEY.encode("utf-8") if isinstance(config.JWT_SECRET_KEY, str) else config.JWT_SECRET_KEY
+
+
+# 注册接口
+async def device_register(request):
+    try:
+        data = await read_json(request)
+        required_fields = ["username", "password", "serial_number", "device_name", "device_type"]
+
+        if not all(field in data for field in required_fields):
+            return json_response({
+                "code": 400,
+                "msg": "缺少必填字段：username/password/serial_number/device_name/device_type"
+            }, 400)
+
+        async with get_async_session_factory()() as db:
+            try:
+                # 校验唯一性
+                if (await db.execute(select(YstcUser.id).where(YstcUser.username == data["username"]))).first():
+                    return json_response({"code": 400, "msg": "账号已存在"}, 400)
+
+                if (await db.execute(select(Device.id).where(Device.serial_number == data["serial_number"]))).first():
+                    return json_response({"code": 400, "msg": "设备序列号已注册"}, 400)
+
+                # 创建用户
+                user = YstcUser(
+                    username=data["username"],
+                    password_hash=data["password"],  # 生产环境需用bcrypt加密
+                    name=data["device_name"],
+                    phone=data.get("phone"),
+                    email=data.get("email"),
+                    address=data.get("address"),
+                    create_by=data["username"],
+                    create_time=datetime.now(AUS_TZ),
+                    is_active=True
+                )
+                db.add(user)
+                await db.flush()
+
+                # 创建设备（与用户同一事务提交）
+                device = Device(
+                    serial_number=data["serial_number"],
+                    type=data["device_type"],
+                    model=data.get("model"),
+                    firmware_version=data.get("firmware_version"),
+                    user_id=user.id,
+                    location=data.get("address"),
+                    create_by=data["username"],
+                    create_time=datetime.now(AUS_TZ),
+                    is_active=True
+                )
+                db.add(device)
+                await db.commit()
+
+                log.info(f"注册成功：账号={data['username']}，设备SN={data['serial_number']}，用户ID={user.id}")
+                return json_response({
+                    "code": 200,
+                    "msg": "注册成功，请登录",
+                    "user_id": user.id,
+                    "device_id": device.id,
+                    "serial_number": device.serial_number
+                }, 200)
+
+            except Exception as e:
+                await db.rollback()
+                log.error(f"注册失败：{str(e)}", exc_info=True)
+                return json_response({"code": 500, "msg": f"注册失败：{str(e)}"}, 500)
+
+    except Exception as e:
+        log.error(f"注册接口异常：{str(e)}", exc_info=True)
+        return json_response({"code": 500, "msg": f"接口异常：{str(e)}"}, 500)
+
+
+async def _login(data, request):
+    async with get_async_session_factory()() as db:
+        # 校验账号密码
+        user = (await db.execute(select(YstcUser).where(YstcUser.username == data["username"]))).scalars().first()
+        if not user:
+            log.warning(f"登录失败：账号{data['username']}不存在")
+            return json_response({"code": 401, "msg": "账号或密码错误"}, 401)
+        if user.password_hash != data["password"]:
+            log.warning(f"登录失败：账号{data['username']}密码错误")
+            return json_response({"code": 401, "msg": "账号或密码错误"}, 401)
+        log.info(f"登录校验通过：账号{data['username']}，用户ID={user.id}")
+
+        # 生成Token（iat + jti保证每次登录的Token唯一）
+        issued_at = int(time.time())
+        access_token = jwt.encode(
+            {"user_id": user.id, "iat": issued_at, "jti": uuid.uuid4().hex}, _secret(), algorithm="HS256"
+        )
+        refresh_token = jwt.encode(
+            {"user_id": user.id, "refresh": True, "iat": issued_at, "jti": uuid.uuid4().hex},
+            _secret(), algorithm="HS256"
+        )
+        access_token = access_token.decode("utf-8") if isinstance(access_token, bytes) else access_token
+        refresh_token = refresh_token.decode("utf-8") if isinstance(refresh_token, bytes) else refresh_token
+        token_hash = token_digest(access_token)
+        now = datetime.now(AUS_TZ)
+
+        try:
+            # 失效该用户的旧Token
+            result = await db.execute(
+                update(UserAuthToken).where(
+                    UserAuthToken.user_id == user.id,
+                    UserAuthToken.is_valid == True
+                ).values(is_valid=False, update_by=user.username, update_time=now)
+            )
+            log.info(f"失效旧Token：用户ID={user.id}，失效数量={result.rowcount}")
+
+            db.add(UserAuthToken(
+                user_id=user.id,
+                token_hash=token_hash,
+                refresh_token_hash=token_digest(refresh_token),
+                expires_at=now + timedelta(days=365 * 100),
+                refresh_expires_at=now + timedelta(days=365 * 100),
+                client_info=f"IP:{request.client.host if request.client else ''};"
+                            f"UA:{request.headers.get('user-agent', '')}",
+                is_valid=True,
+                create_by=user.username,
+                create_time=now,
+                update_by=user.username,
+                update_time=now
+            ))
+
+            # 更新最后登录时间
+            user.last_login = now
+            user.update_by = user.username
+            user.update_time = now
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        await store_call(TOKEN_CACHE.invalidate_user, user.id)
+        log.info(f"登录成功：账号={data['username']}，生成Token摘要前10位={token_hash[:10]}")
+
+        response = json_response({
+            "code": 200,
+            "msg": "登录成功",
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "redirect": "/dashboard"
+        }, 200)
+        response.set_cookie(
+            "access_token",
+            access_token,
+            httponly=True,
+            samesite="lax",
+            max_age=365 * 100 * 24 * 3600
+        )
+        return response
+
+
+# 登录接口
+async def device_login(request):
+    try:
+        data = await read_json(request)
+        if not data.get("username") or not data.get("password"):
+            return json_response({"code": 400, "msg": "缺少账号/密码"}, 400)
+
+        # 死锁（1213）重试，与同步版retry_on_deadlock一致
+        for retries in range(1, DEADLOCK_RETRIES + 1):
+            try:
+                return await _login(data, request)
+            except OperationalError as e:
+                if e.orig.args[0] != 1213:
+                    raise
+                log.warning(f"捕获死锁异常，第{retries}次重试（延迟{DEADLOCK_DELAY * retries}秒）")
+                await asyncio.sleep(DEADLOCK_DELAY * retries)
+        return json_response({"code": 500, "msg": f"登录失败：超过{DEADLOCK_RETRIES}次重试仍死锁"}, 500)
+
+    except Exception as e:
+        log.error(f"登录失败：{str(e)}", exc_info=True)
+        return json_response({"code": 500, "msg": f"登录失败：{str(e)}"}, 500)
+
+
+# Token 校验接口
+async def verify_token(request):
+    """校验Token是否有效（无需登录装饰器）"""
+    try:
+        data = await read_json(request)
+        token = data.get("access_token")
+
+        if not token:
+            return json_response({"code": 401, "msg": "Token为空"}, 401)
+
+        try:
+            payload = jwt.decode(token, _secret(), algorithms=["HS256"], options={"verify_exp": False})
+        except InvalidTokenError as e:
+            log.error(f"Token格式错误：{str(e)}")
+            return json_response({"code": 401, "msg": "Token格式错误"}, 401)
+
+        user_id = payload.get("user_id")
+        if not user_id:
+            return json_response({"code": 401, "msg": "Token中无用户ID"}, 401)
+
+        token_hash = token_digest(token)
+        async with get_async_session_factory()() as db:
+            # 检查Token是否在数据库中且有效（按摘要唯一索引点查）
+            auth_token_id = (await db.execute(
+                select(UserAuthToken.id).where(
+                    UserAuthToken.token_hash == token_hash,
+                    UserAuthToken.user_id == user_id,
+                    UserAuthToken.is_valid == True
+                )
+            )).scalar()
+
+            if not auth_token_id:
+                log.warning(f"Token失效：用户ID={user_id}，Token摘要前10位={token_hash[:10]}")
+                return json_response({"code": 401, "msg": "Token已失效"}, 401)
+
+            # 检查用户和设备是否存在
+            username = (await db.execute(select(YstcUser.username).where(YstcUser.id == user_id))).scalar()
+            serial_number = (await db.execute(
+                select(Device.serial_number).where(Device.user_id == user_id).limit(1)
+            )).scalar()
+
+            if not username or not serial_number:
+                return json_response({"code": 401, "msg": "账号/设备不存在"}, 401)
+
+            return json_response({
+                "code": 200,
+                "msg": "Token有效",
+                "data": {
+                    "username": username,
+                    "serial_number": serial_number
+                }
+            }, 200)
+
+    except Exception as e:
+        log.error(f"Token校验异常：{str(e)}", exc_info=True)
+        return json_response({"code": 500, "msg": "服务器异常"}, 500)
+
+
+# 退出登录接口
+@login_required
+async def device_logout(request):
+    user = request.state.user
+    token = get_bearer_token(request)
+    try:
+        async with get_async_session_factory()() as db:
+            try:
+                # 失效Token（按摘要唯一索引定位）
+                result = await db.execute(
+                    update(UserAuthToken).where(
+                        UserAuthToken.token_hash == token_digest(token),
+                        UserAuthToken.user_id == user.id,
+                        UserAuthToken.is_valid == True
+                    ).values(is_valid=False, update_by=user.username, update_time=datetime.now(AUS_TZ))
+                )
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                log.error(f"退出失败：{str(e)}", exc_info=True)
+                return json_response({"code": 500, "msg": f"退出失败：{str(e)}"}, 500)
+
+        update_count = result.rowcount
+        await store_call(TOKEN_CACHE.invalidate, token)
+        PRESENCE.mark_offline(request.state.device.id)
+
+        # 清除Cookie
+        response = json_response({
+            "code": 200 if update_count > 0 else 400,
+            "msg": "退出成功" if update_count > 0 else "未找到有效登录状态",
+            "redirect": "/login"
+        })
+        response.set_cookie("access_token", "", expires=0)
+
+        if update_count > 0:
+            log.info(f"退出成功：账号={user.username}")
+        else:
+            log.warning(f"退出失败：账号={user.username}，无有效Token")
+        return response
+
+    except Exception as e:
+        log.error(f"退出接口异常：{str(e)}", exc_info=True)
+        return json_response({"code": 500, "msg": f"接口异常：{str(e)}"}, 500)
+
+
+routes = [
+    Route("/api/device/register", device_register, methods=["POST"]),
+    Route("/api/device/login", device_login, methods=["POST"]),
+    Route("/api/device/verify_token", verify_token, methods=["POST"]),
+    Route("/api/device/logout", device_logout, methods=["POST"]),
+]
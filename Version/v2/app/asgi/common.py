@@ -0,0 +1,114 @@
+import logging
+from functools import wraps
+import jwt
+from jwt.exceptions import InvalidTokenError
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from app.utils import TOKEN_CACHE, PRESENCE, CYCLE_STORE, token_digest, json_codec
+from app.utils.db import get_async_session_factory
+from app.utils.token_cache import snapshot
+from app.models import YstcUser, Device, UserAuthToken
+from ..config import config
+
+log = logging.getLogger("pt.asgi")
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSON响应统一走可插拔编解码器"""
+
+    def render(self, content):
+        return json_codec.dumps_bytes(content)
+
+
+def json_response(payload, status_code=200):
+    return CodecJSONResponse(payload, status_code=status_code)
+
+
+async def read_json(request):
+    """读取JSON请求体，格式错误或为空时返回空字典"""
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def store_call(func, *args):
+    """
+    调用周期存储或经其广播的操作（Token缓存失效/订阅）：Redis存储为阻塞网络IO，放到线程池执行，避免阻塞事件循环；
+    进程内存储直接调用
+    """
+    if CYCLE_STORE.blocking_io:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+def get_bearer_token(request):
+    token = request.headers.get("Authorization")
+    if not token or not token.startswith("Bearer "):
+        return None
+    return token[7:]
+
+
+def login_required(handler):
+    """
+    异步鉴权装饰器，与app.utils.auth.login_required逻辑一致：
+    先查已校验Token缓存（命中不访问数据库），未命中时按Token摘要点查，用户/设备快照存入request.state
+    """
+
+    @wraps(handler)
+    async def wrapper(request):
+        token = get_bearer_token(request)
+        if not token:
+            return json_response({"code": 401, "msg": "未提供有效认证Token"}, 401)
+
+        cached = TOKEN_CACHE.get(token)
+        if cached is None:
+            try:
+                payload = jwt.decode(
+                    token,
+                    config.JWT_SECRET_KEY,
+                    algorithms=["HS256"],
+                    options={"verify_exp": False}
+                )
+                user_id = payload.get("user_id")
+
+                async with get_async_session_factory()() as db:
+                    auth_token_id = (await db.execute(
+                        select(UserAuthToken.id).where(
+                            UserAuthToken.token_hash == token_digest(token),
+                            UserAuthToken.user_id == user_id,
+                            UserAuthToken.is_valid == True
+                        )
+                    )).scalar()
+                    if not auth_token_id:
+                        return json_response({"code": 401, "msg": "Token无效或已注销"}, 401)
+
+                    user = (await db.execute(select(YstcUser).where(YstcUser.id == user_id))).scalars().first()
+                    device = (await db.execute(
+                        select(Device).where(Device.user_id == user_id).limit(1)
+                    )).scalars().first()
+
+                    if not user or not device:
+                        await db.execute(
+                            update(UserAuthToken).where(UserAuthToken.id == auth_token_id).values(is_valid=False)
+                        )
+                        await db.commit()
+                        return json_response({"code": 401, "msg": "账号/设备已失效"}, 401)
+
+                    cached = (snapshot(user), snapshot(device))
+                    await store_call(TOKEN_CACHE.put, token, *cached)
+
+            except InvalidTokenError as e:
+                return json_response({"code": 401, "msg": f"Token解析失败：{str(e)}"}, 401)
+            except Exception as e:
+                log.error(f"鉴权异常：{str(e)}")
+                return json_response({"code": 500, "msg": f"鉴权失败：{str(e)}"}, 500)
+
+        request.state.user, request.state.device = cached
+        request.state.token = token
+        PRESENCE.mark_online(request.state.device.id)
+        return await handler(request)
+
+    return wrapper
@@ -0,0 +1,179 @@
+import logging
+from sqlalchemy import select
+from starlette.routing import Route
+from app.utils import (
+    get_current_cycle, cycle_key, is_upload_window_open,
+    CYCLE_STORE
+)
+from app.utils.db import get_async_session_factory
+from app.utils.device_schema import DeviceSchemaError
+from app.models import CycleResult, GameStrategy, StrategyDetail, ControlCommand
+from app.models.strategy import decode_legacy_json
+from app.asgi.common import json_response, read_json, login_required, store_call
+
+log = logging.getLogger("pt.asgi.device")
+
+
+# 数据上传接口
+@login_required
+async def upload_device_data(request):
+    try:
+        req_data = await read_json(request)
+        device_data = req_data.get("device_data")
+        current_cycle = get_current_cycle()
+        device_id_str = str(request.state.device.serial_number)
+
+        if not device_data:
+            return json_response({
+                "code": 400,
+                "msg": "缺少device_data参数",
+                "current_cycle": current_cycle
+            }, 400)
+
+        # 窗口已关闭或周期已封存（已交给求解器）时拒绝上传
+        # 写入只锁设备序列号所在分片，不同设备的并发上传互不阻塞
+        # 上传数据写入时按DEVICE_SCHEMA校验并转换为列式存储，不合法直接拒绝并返回出错字段
+        try:
+            accepted = is_upload_window_open(current_cycle) and \
+                await store_call(CYCLE_STORE.append, current_cycle, device_id_str, device_data)
+        except DeviceSchemaError as e:
+            return json_response({
+                "code": 400,
+                "msg": f"device_data校验失败：{str(e)}",
+                "field": e.field,
+                "current_cycle": current_cycle
+            }, 400)
+
+        if not accepted:
+            cycle_status = await store_call(CYCLE_STORE.get_status, current_cycle) or "unknown"
+            return json_response({
+                "code": 403,
+                "msg": f"上传窗口已关闭（周期状态：{cycle_status}）",
+                "current_cycle": current_cycle
+            }, 403)
+
+        log.info(f"数据上传成功：设备{device_id_str}，周期{current_cycle}")
+        return json_response({
+            "code": 200,
+            "msg": "上传成功",
+            "cycle_time": current_cycle,
+            "serial_number": device_id_str
+        }, 200)
+
+    except Exception as e:
+        log.error(f"数据上传失败：{str(e)}", exc_info=True)
+        return json_response({"code": 500, "msg": f"上传失败：{str(e)}"}, 500)
+
+
+# 策略查询接口
+@login_required
+async def get_strategy(request):
+    try:
+        cycle_time = request.query_params.get("cycle_time")
+        user = request.state.user
+        device = request.state.device
+
+        if not cycle_time:
+            return json_response({"code": 400, "msg": "缺少cycle_time参数"}, 400)
+
+        try:
+            strategy_cycle_time = cycle_key(cycle_time)
+        except ValueError:
+            return json_response({"code": 400, "msg": "cycle_time格式错误，应为ISO时间"}, 400)
+
+        async with get_async_session_factory()() as db:
+            # 按(user_id, cycle_time)索引精确查询
+            game_strategy = (await db.execute(
+                select(
+                    GameStrategy.id,
+                    GameStrategy.cycle_result_id,
+                    GameStrategy.start_time,
+                    GameStrategy.end_time,
+                    GameStrategy.strategy_params
+                ).where(
+                    GameStrategy.user_id == user.id,
+                    GameStrategy.cycle_time == strategy_cycle_time
+                ).order_by(GameStrategy.id.desc()).limit(1)
+            )).first()
+
+            if not game_strategy:
+                return json_response({"code": 404, "msg": "未找到该周期策略"}, 404)
+
+            details = (await db.execute(
+                select(
+                    StrategyDetail.time_slice_index,
+                    StrategyDetail.time_point,
+                    StrategyDetail.action_type,
+                    StrategyDetail.power_setpoint,
+                    StrategyDetail.expected_benefit
+                ).where(
+                    StrategyDetail.strategy_id == game_strategy.id
+                ).order_by(StrategyDetail.time_slice_index)
+            )).all()
+
+            # 全局收益存于周期结果表；旧数据仍保存在策略自身的strategy_params中
+            if game_strategy.cycle_result_id:
+                expected_benefit = (await db.execute(
+                    select(CycleResult.total_benefit).where(CycleResult.id == game_strategy.cycle_result_id)
+                )).scalar()
+            else:
+                expected_benefit = GameStrategy.legacy_total_benefit(game_strategy.strategy_params)
+
+            command_params = (await db.execute(
+                select(ControlCommand.command_params).where(
+                    ControlCommand.strategy_id == game_strategy.id,
+                    ControlCommand.device_id == device.id
+                ).limit(1)
+            )).scalar()
+
+        return json_response({
+            "code": 200,
+            "serial_number": device.serial_number,
+            "cycle_time": cycle_time,
+            "strategy": {
+                "strategy_id": game_strategy.id,
+                "start_time": game_strategy.start_time.isoformat(),
+                "end_time": game_strategy.end_time.isoformat(),
+                "expected_benefit": expected_benefit,
+                "details": [
+                    {
+                        "time_slice_index": detail.time_slice_index,
+                        "time_point": detail.time_point.isoformat(),
+                        "action_type": detail.action_type,
+                        "power_setpoint": detail.power_setpoint,
+                        "expected_benefit": detail.expected_benefit
+                    }
+                    for detail in details
+                ],
+                "command_params": decode_legacy_json(command_params)
+            }
+        }, 200)
+
+    except Exception as e:
+        log.error(f"策略查询接口异常：{str(e)}", exc_info=True)
+        return json_response({"code": 500, "msg": f"查询失败：{str(e)}"}, 500)
+
+
+# 当前周期接口
+@login_required
+async def get_current_cycle_api(request):
+    try:
+        return json_response({
+            "code": 200,
+            "msg": "获取成功",
+            "current_cycle": get_current_cycle()
+        }, 200)
+    except Exception as e:
+        log.error(f"获取当前周期失败：{str(e)}", exc_info=True)
+        return json_response({
+            "code": 500,
+            "msg": "获取当前周期失败",
+            "error": str(e)
+        }, 500)
+
+
+routes = [
+    Route("/api/device/upload", upload_device_data, methods=["POST"]),
+    Route("/api/device/get_strategy", get_strategy, methods=["GET"]),
+    Route("/api/device/current_cycle", get_current_cycle_api, methods=["GET"]),
+]
@@ -0,0 +1,24 @@
+import logging
+import uvicorn
+from app.asgi import create_asgi_app
+from app.config import config
+
+log = logging.getLogger("pt.asgi_main")
+
+# ASGI应用（uvicorn app.asgi_main:application）
+# CYCLE_STORE_BACKEND=memory时周期数据保存在进程内存中，只能以单worker运行；
+# 多worker需CYCLE_STORE_BACKEND=redis（每个周期由抢到执行权的worker封存并求解）
+application = create_asgi_app()
+
+# 主入口
+if __name__ == "__main__":
+    log.info("启动Power Terminal服务（ASGI模式）...")
+    workers = config.ASGI_WORKERS if config.CYCLE_STORE_BACKEND == "redis" else 1
+    uvicorn.run(
+        # 多worker时uvicorn需要以导入字符串加载应用
+        "app.asgi_main:application" if workers > 1 else application,
+        host="0.0.0.0",
+        port=config.ASGI_PORT,
+        workers=workers,
+        log_level="info"
+    )
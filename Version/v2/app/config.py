@@ -29,9 +29,54 @@ class Config:
     # JWT配置（移除有效期限制）
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "device-auth-secret-永久有效")
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 60))  # 已校验Token缓存有效期（秒，0=不缓存）
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))  # 已校验Token缓存最大条数（LRU淘汰）
+    PRESENCE_FLUSH_INTERVAL = int(os.getenv("PRESENCE_FLUSH_INTERVAL", 10))  # 设备在线状态批量落库间隔（秒）
+
+    # ASGI服务配置（asgi_main.py，异步数据库访问需安装aiomysql）
+    ASGI_PORT = int(os.getenv("ASGI_PORT", 8081))  # ASGI服务端口（与Flask服务8080区分）
+    ASGI_WORKERS = int(os.getenv("ASGI_WORKERS", 1))  # ASGI worker进程数（>1需CYCLE_STORE_BACKEND=redis）
+    ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 50))  # 异步连接池大小
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 50))  # 异步连接池溢出上限
 
     CYCLE_INTERVAL = int(os.getenv("CYCLE_INTERVAL", 120))  # 2分钟周期
     UPLOAD_WINDOW = int(os.getenv("UPLOAD_WINDOW", 20))  # 20秒上传窗口
     TIME_SLOTS = int(os.getenv("TIME_SLOTS", 3))  # 时间片数量
+    CYCLE_STORE_SHARDS = int(os.getenv("CYCLE_STORE_SHARDS", 16))  # 周期数据存储分片数（每片独立锁）
+    CYCLE_STORE_BACKEND = os.getenv("CYCLE_STORE_BACKEND", "memory")  # 周期存储后端：memory=进程内（单worker），redis=共享（多worker）
+    REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")  # CYCLE_STORE_BACKEND=redis时的连接地址
+    CYCLE_STORE_PREFIX = os.getenv("CYCLE_STORE_PREFIX", "pt")  # Redis键前缀（多套环境共用Redis时区分）
+    CYCLE_STORE_TTL = int(os.getenv("CYCLE_STORE_TTL", CYCLE_INTERVAL * 3))  # Redis周期键过期时间（秒）
+    JSON_CODEC = os.getenv("JSON_CODEC", "auto")  # JSON编解码器：auto/orjson/json
+
+    # 博弈求解器配置
+    SOLVER_JAR_PATH = os.getenv("SOLVER_JAR_PATH", "game-model-1.0.jar")  # 博弈模型JAR路径
+    SOLVER_MODE = os.getenv("SOLVER_MODE", "pool")  # pool=常驻求解进程池，subprocess=每周期启动一次java -jar
+    SOLVER_POOL_SIZE = int(os.getenv("SOLVER_POOL_SIZE", 2))  # 常驻求解进程数量
+    SOLVER_INPUT_MODE = os.getenv("SOLVER_INPUT_MODE", "stdin")  # 单次调用的输入传输方式：stdin/file/argv
+    SOLVER_TIMEOUT = int(os.getenv("SOLVER_TIMEOUT", 30))  # 单次求解超时（秒）
+    SOLVER_SHARD_MODE = os.getenv("SOLVER_SHARD_MODE", "none")  # 分片方式：none/powerline（按母线）/size（按固定大小）
+    SOLVER_SHARD_SIZE = int(os.getenv("SOLVER_SHARD_SIZE", 200))  # 单个分片最大设备数（0=不限制）
+    SOLVER_MAX_PARALLEL = int(os.getenv("SOLVER_MAX_PARALLEL", SOLVER_POOL_SIZE))  # 分片最大并发求解数
+    SOLVER_STARTUP_TIMEOUT = int(os.getenv("SOLVER_STARTUP_TIMEOUT", 15))  # 求解进程启动/健康检查超时（秒）
+    SOLVER_ADMISSION = os.getenv("SOLVER_ADMISSION", "sealed")  # 设备接入方式：sealed=窗口关闭后整体求解，incremental=周期开始即求解、上传窗口内增量加入设备
+    SOLVER_ADMIT_INTERVAL = float(os.getenv("SOLVER_ADMIT_INTERVAL", 1.0))  # 增量接入时轮询新上传设备的间隔（秒）
+    SOLVER_WARM_START = os.getenv("SOLVER_WARM_START", "on")  # 热启动：on=以设备上一周期的决策为博弈初始决策，off=每周期从空闲决策开始
+    SOLVER_WARM_START_MAX_AGE = int(os.getenv("SOLVER_WARM_START_MAX_AGE", CYCLE_INTERVAL * 2))  # 超过该时长（秒）的历史决策不用于热启动
+    SOLVER_SUM_MODE = os.getenv("SOLVER_SUM_MODE", "cached")  # 站点时间片占用计算：cached=维护汇总，排除单设备O(1)；scan=逐设备累加（对照基准）
+    SOLVER_SCHEDULE = os.getenv("SOLVER_SCHEDULE", "single")  # 博弈更新方式：single=每轮单个随机胜者；batch=每轮在站点容量内批量接受互不冲突的改进决策
+    # 求解参数（随每次请求的params块发送，时间片数取TIME_SLOTS）
+    SOLVER_SLOT_MINUTES = int(os.getenv("SOLVER_SLOT_MINUTES", 15))  # 每个时间片的时长（分钟），用于电量换算与电价时段
+    SOLVER_POP_SIZE = int(os.getenv("SOLVER_POP_SIZE", 50))  # FOA种群规模
+    SOLVER_FOA_ITERATIONS = int(os.getenv("SOLVER_FOA_ITERATIONS", 20))  # FOA迭代次数
+    SOLVER_TOLERANCE = float(os.getenv("SOLVER_TOLERANCE", 0.0))  # 收敛容差：收益改进不超过该值的最优响应不再更新
+    SOLVER_TIME_BUDGET = float(os.getenv("SOLVER_TIME_BUDGET", SOLVER_TIMEOUT * 0.8))  # 求解时间预算（秒，0=不限制），到时返回当前决策
+    SOLVER_SNAPSHOT_INTERVAL = float(os.getenv("SOLVER_SNAPSHOT_INTERVAL", 2.0))  # 决策快照输出间隔（秒，0=不输出），求解超时/异常时以最新快照作为结果
+    SOLVER_SEED = os.getenv("SOLVER_SEED", "")  # 求解随机种子：空=每周期随机生成（随汇总记录），设为整数时每周期固定
+    SOLVER_ARCHIVE_DIR = os.getenv("SOLVER_ARCHIVE_DIR", "")  # 求解输入归档目录（空=不归档），供app/test/replay_cycles.py离线重放
+    SOLVER_ARCHIVE_KEEP = int(os.getenv("SOLVER_ARCHIVE_KEEP", 500))  # 最多保留的归档周期数（0=不清理）
+    SOLVER_LARGE_CYCLE_DEVICES = int(os.getenv("SOLVER_LARGE_CYCLE_DEVICES", 0))  # 大周期设备数阈值（0=不区分）
+    SOLVER_LARGE_POP_SIZE = int(os.getenv("SOLVER_LARGE_POP_SIZE", 30))  # 大周期FOA种群规模
+    SOLVER_LARGE_FOA_ITERATIONS = int(os.getenv("SOLVER_LARGE_FOA_ITERATIONS", 10))  # 大周期FOA迭代次数
 # 创建配置实例，供其他文件导入
 config = Config()
\ No newline at end of file
@@ -1,7 +1,9 @@
 from app.core.jar_executor import call_jar_model, write_strategy_to_db
 from app.core.cycle_manager import run_cycle, service_loop
+from app.core.solver_pool import SolverPool, SolverError, get_solver_pool
 
 __all__ = [
     "call_jar_model", "write_strategy_to_db",
-    "run_cycle", "service_loop"
+    "run_cycle", "service_loop",
+    "SolverPool", "SolverError", "get_solver_pool"
 ]
\ No newline at end of file
@@ -3,9 +3,10 @@ import time
 import asyncio
 from datetime import datetime
 import pytz
-from app.core.jar_executor import call_jar_model
+from app.core.jar_executor import call_jar_model, incremental_admission_enabled, solver_mode
+from app.core.solver_pool import SolverError, get_solver_pool
 from app.utils import (
-    STATE, DEVICE_DATA, STORAGE_LOCK,
+    STATE, CYCLE_STORE,
     get_current_cycle, clean_expired_data, clean_cycle_data, SessionLocal
 )
 from app.models import Device
@@ -21,21 +22,26 @@ EXECUTED_CYCLES = set()  # 记录已执行的周期
 IS_LOOP_RUNNING = False  # 标记循环是否已启动
 
 
-async def run_cycle(cycle_time):
-    """执行单个周期逻辑（增加防重复执行）"""
+async def run_cycle(cycle_time, upload_deadline=None):
+    """执行单个周期逻辑（增加防重复执行），传入upload_deadline时为增量接入：上传窗口内即开始求解"""
     # 1. 防重复执行：同一个周期只执行一次
     if cycle_time in EXECUTED_CYCLES:
         log.warning(f"周期{cycle_time}已执行过，跳过重复执行")
         return
     EXECUTED_CYCLES.add(cycle_time)
 
+    # 多worker部署时每个周期只由一个worker封存并求解，其余worker只负责接收上传
+    if not CYCLE_STORE.claim(cycle_time):
+        log.info(f"周期{cycle_time}已由其他worker执行，跳过")
+        EXECUTED_CYCLES.discard(cycle_time)
+        return
+
     STATE["last_cycle_start"] = datetime.now(AUS_TZ).isoformat()
     log.info(f"\n=== 周期启动：{cycle_time} ===")
 
     try:
-        # 检查当前周期是否有设备上传数据
-        with STORAGE_LOCK:
-            has_device_data = bool(DEVICE_DATA.get(cycle_time, {}))
+        # 检查当前周期是否有设备上传数据（增量接入时周期刚开始，由求解流程在截止时判断）
+        has_device_data = upload_deadline is not None or CYCLE_STORE.device_count(cycle_time) > 0
 
         # 无设备数据 就直接跳过博弈+清理
         if not has_device_data:
@@ -47,7 +53,7 @@ async def run_cycle(cycle_time):
             return
 
         # 有设备数据 就调用JAR博弈
-        await call_jar_model(cycle_time)
+        await call_jar_model(cycle_time, upload_deadline)
 
         # 博弈完成后 清理当前周期数据
         clean_cycle_data(cycle_time)
@@ -86,8 +92,16 @@ async def service_loop():
         db.close()
         log.info("检测到已注册设备，启动周期循环")
 
+        # 预热常驻求解进程池，避免首个周期承担JVM冷启动
+        if solver_mode() == "pool":
+            try:
+                await asyncio.to_thread(get_solver_pool().start)
+            except SolverError as e:
+                log.error(f"求解进程池预热失败（周期内将回退为单次JAR调用）：{str(e)}")
+
         # 初始化周期起始时间
-        current_start_time = time.time()
+        # 共享存储下沿用最先启动的worker写入的基准时间，各worker周期对齐
+        current_start_time = CYCLE_STORE.shared_epoch(time.time())
         get_current_cycle.start_time = current_start_time
 
         # 正确修改全局周期起始时间
@@ -101,20 +115,29 @@ async def service_loop():
             current_cycle = get_current_cycle()  # 此时基准时间已初始化
             cycle_start_ts = datetime.fromisoformat(current_cycle).timestamp()
 
-            # 等待上传窗口关闭
             upload_deadline = cycle_start_ts + config.UPLOAD_WINDOW
             current_ts = time.time()
-            if current_ts < upload_deadline:
-                wait_time = upload_deadline - current_ts
-                log.info(f"周期{current_cycle}上传窗口开启，剩余{wait_time:.1f}秒")
-                await asyncio.sleep(wait_time)
-
-            # 执行周期逻辑
-            await run_cycle(current_cycle)
+            if incremental_admission_enabled() and current_ts < upload_deadline:
+                # 增量接入：立即开始求解，上传窗口内到达的设备陆续加入，截止时封存
+                log.info(f"周期{current_cycle}上传窗口开启（增量接入），剩余{upload_deadline - current_ts:.1f}秒")
+                await run_cycle(current_cycle, upload_deadline)
+            else:
+                # 等待上传窗口关闭
+                if current_ts < upload_deadline:
+                    wait_time = upload_deadline - current_ts
+                    log.info(f"周期{current_cycle}上传窗口开启，剩余{wait_time:.1f}秒")
+                    await asyncio.sleep(wait_time)
+
+                # 执行周期逻辑
+                await run_cycle(current_cycle)
 
             # 清理过期数据
             clean_expired_data()
 
+            # 周期间隙对求解进程做健康检查，崩溃的进程在下个周期前重启
+            if solver_mode() == "pool":
+                await asyncio.to_thread(get_solver_pool().health_check)
+
             # 等待下一个周期
             next_cycle_ts = cycle_start_ts + config.CYCLE_INTERVAL
             current_ts = time.time()
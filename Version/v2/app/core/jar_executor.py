@@ -1,17 +1,24 @@
-import json
-import re
+import os
+import time
+import random
 import logging
+import tempfile
+import threading
 import subprocess
 import asyncio
 from datetime import datetime, timedelta
 import pytz
 from app.utils import (
-    DEVICE_DATA, DEVICE_STRATEGIES, CYCLE_STATUS, STORAGE_LOCK,
-    SessionLocal
+    CYCLE_STORE, SessionLocal, cycle_key
 )
+from app.utils import json_codec
 from app.models import (
-    GameStrategy, StrategyDetail, ControlCommand, Device, YstcUser
+    CycleResult, GameStrategy, StrategyDetail, ControlCommand, Device, YstcUser
 )
+from app.core.solver_pool import SolverError, get_solver_pool, is_legacy_jar
+from app.core.sharding import partition_devices, merge_summaries
+from app.core.warm_start import WARM_STARTS
+from app.core.solver_archive import archive_enabled, archive_cycle
 from ..config import config
 
 log = logging.getLogger("pt.jar")
@@ -27,355 +34,785 @@ async def get_db_session():
         db.close()
 
 
-async def call_jar_model(cycle_time):
-    """调用JAR模型（修复produce字段+ID校验）"""
+class CycleDevices:
+    """
+    周期内设备映射：序列号→求解用连续编号（0开始，跳过的设备不占编号，求解器按编号下标访问决策列表）
+    同时保存编号→原ID、原ID→(序列号, 数据库Device主键ID)、序列号→用户ID，用于还原决策并按用户归组
+    增量接入时同一设备重复上传沿用原编号，求解输入以最新数据替换
+    开启热启动时求解输入携带设备上一周期的决策（warmStart）
+    """
+
+    def __init__(self):
+        self.solver_ids = {}  # {serial_number: 新ID}
+        self.devices = []  # 求解输入，下标即新ID
+        self.powerlines = []  # 与devices一一对应的用户母线信息
+        self.new_id_original_id_map = {}  # {新ID: 原device.id}
+        self.original_id_serial_map = {}  # {原ID: (序列号, 数据库Device ID)}
+        self.serial_user_map = {}  # {serial_number: user_id}
+        self.decisions = []
+        self.user_decision_map = {}
+        self.serial_decisions = {}  # {serial_number: 决策}，供下一周期热启动
+        self._owners = {}  # 已解析的序列号→(设备ID, 用户ID, 母线信息)，未注册为None
+
+    def add(self, rows):
+        """加入一批设备（SealedCycle.rows()），返回本批新增/替换的求解输入"""
+        rows = list(rows)
+        unresolved = [serial for serial, _, _, _ in rows if serial not in self._owners]
+        if unresolved:
+            db = SessionLocal()
+            try:
+                # 一次IN查询解析本批序列号→(设备ID, 用户ID, 母线信息)，与设备数量无关
+                owners = resolve_device_owners(db, unresolved)
+            finally:
+                db.close()
+            for serial in unresolved:
+                self._owners[serial] = owners.get(serial)
+
+        admitted = []
+        admitted_serials = {}  # {serial_number: 数据库Device ID}
+        for serial_num, original_device_id, columns, slot in rows:
+            # 关联设备→用户ID + 数据库Device主键ID
+            owner = self._owners.get(serial_num)
+            if not owner or not owner[1]:
+                log.warning(f"设备{serial_num}未关联用户，跳过")
+                continue
+            db_device_id, user_id, powerline_info = owner
+            self.serial_user_map[serial_num] = user_id
+            # 核心修改：存储「原ID→(序列号, 数据库Device主键ID)」
+            self.original_id_serial_map[original_device_id] = (serial_num, db_device_id)
+
+            new_device_id = self.solver_ids.get(serial_num)
+            if new_device_id is None:
+                new_device_id = len(self.devices)  # 新ID从0开始
+                self.solver_ids[serial_num] = new_device_id
+                self.devices.append(None)
+                self.powerlines.append(powerline_info)
+            self.new_id_original_id_map[new_device_id] = original_device_id  # 新ID→原ID 构造映射
+
+            # 设备数据已在上传时按DEVICE_SCHEMA校验，直接由列式存储切片生成JAR输入
+            clean_device = columns.solver_device(slot, new_device_id)
+            self.devices[new_device_id] = clean_device
+            admitted.append(clean_device)
+            admitted_serials[serial_num] = db_device_id
+            log.debug(f"设备映射：新ID={new_device_id} → 原ID={original_device_id} → 序列号={serial_num} → 数据库Device ID={db_device_id}")
+
+        if admitted and warm_start_enabled():
+            warm_starts = WARM_STARTS.lookup(admitted_serials)
+            for serial_num, warm_start in warm_starts.items():
+                self.devices[self.solver_ids[serial_num]]["warmStart"] = warm_start
+        return admitted
+
+    def on_decision(self, decision):
+        """决策逐条回调：还原设备ID并按用户归组"""
+        decision.pop("type", None)
+        self.decisions.append(decision)
+        new_device_id = decision.get("deviceId")  # JAR返回的是新ID
+        original_device_id = self.new_id_original_id_map.get(new_device_id)  # 新ID→原ID
+        # 从映射表获取序列号+数据库Device ID
+        serial_db_tuple = self.original_id_serial_map.get(original_device_id)
+        if not serial_db_tuple:
+            log.warning(f"决策新ID={new_device_id}（原ID={original_device_id}）无对应设备信息，跳过落库")
+            return
+        serial_num, db_device_id = serial_db_tuple  # 解包序列号+数据库ID
+        user_id = self.serial_user_map.get(serial_num)  # 序列号→用户ID
+        self.serial_decisions[serial_num] = decision
+
+        if not user_id:
+            log.warning(f"决策新ID={new_device_id}（原ID={original_device_id}）无法关联用户，跳过落库")
+            return
+
+        # 还原决策中的deviceId为原ID
+        decision["deviceId"] = original_device_id
+        # 临时存储数据库Device ID到decision，方便写入时使用
+        decision["_db_device_id"] = db_device_id
+        # 分片并行求解时回调来自多个线程，setdefault保证按用户归组不丢失
+        self.user_decision_map.setdefault(user_id, []).append(decision)
+
+
+def solver_mode():
+    """实际生效的求解方式：旧版JAR只能按legacy方式单次调用，否则为SOLVER_MODE（pool/subprocess）"""
+    if is_legacy_jar(config.SOLVER_JAR_PATH):
+        return "legacy"
+    return config.SOLVER_MODE
+
+
+def warm_start_enabled():
+    """热启动只在新版JAR生效（旧版JAR输入不支持warmStart，查询历史决策纯属浪费）"""
+    return config.SOLVER_WARM_START == "on" and solver_mode() != "legacy"
+
+
+def incremental_admission_enabled():
+    """增量接入只在常驻进程池、不分片时生效（会话需独占一个求解进程持续迭代）"""
+    return (
+        config.SOLVER_ADMISSION == "incremental"
+        and solver_mode() == "pool"
+        and config.SOLVER_SHARD_MODE == "none"
+    )
+
+
+async def call_jar_model(cycle_time, upload_deadline=None):
+    """
+    调用JAR模型（用户关联，设备数据取自封存的列式快照）
+    传入upload_deadline时为增量接入：上传窗口内即开始求解，截止时封存并取回最终结果
+    """
     # 校验JAR文件存在性
-    JAR_PATH = "game-model-1.0.jar"
-    if not __import__("os").path.exists(JAR_PATH):
-        log.error(f"JAR文件不存在：{JAR_PATH}")
-        with STORAGE_LOCK:
-            CYCLE_STATUS[cycle_time] = "failed"
+    if not os.path.exists(config.SOLVER_JAR_PATH):
+        log.error(f"JAR文件不存在：{config.SOLVER_JAR_PATH}")
+        CYCLE_STORE.set_status(cycle_time, "failed")
         return None
 
-    # 提取当前周期设备数据
-    with STORAGE_LOCK:
-        current_devices = DEVICE_DATA.get(cycle_time, {})  # {serial_number: device_data}
+    if upload_deadline is not None:
+        session = None
+        if incremental_admission_enabled():
+            try:
+                pool = get_solver_pool()
+                session = await asyncio.to_thread(pool.open_session, iter_solver_input([], cycle_header()))
+            except SolverError as e:
+                log.error(f"增量求解会话打开失败，本周期回退为窗口关闭后整体求解：{str(e)}")
+        if session is not None:
+            return await solve_incremental(cycle_time, session, upload_deadline)
+        # 无法增量求解时等待上传窗口关闭
+        wait_time = upload_deadline - time.time()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    # 封存当前周期：此后上传被拒绝，快照直接引用分片数据，不拷贝
+    current_devices = CYCLE_STORE.seal(cycle_time)  # SealedCycle：按rows()遍历各分片列存
     if not current_devices:
         log.warning(f"周期{cycle_time}无设备数据，跳过博弈")
-        with STORAGE_LOCK:
-            CYCLE_STATUS[cycle_time] = "completed"
+        CYCLE_STORE.set_status(cycle_time, "completed")
         return None
 
-    # 关联设备 用户+构建纯净设备列表
-    db = SessionLocal()
-    new_id_original_id_map = {}  # {新ID: 原device.id}
-    original_id_serial_map = {}  # 存储数据库Device ID
-    serial_user_map = {}  # {serial_number: user_id}
-    processed_devices = []
-
     try:
-        for idx, (serial_num, device_data) in enumerate(current_devices.items()):
-            # 验证device_data必须有id
-            if "id" not in device_data or not isinstance(device_data["id"], (int, str)):
-                log.warning(f"设备{serial_num}缺失有效id，跳过")
-                continue
+        # 关联设备 用户+构建纯净设备列表（查询设备归属/热启动决策失败时同样标记周期失败）
+        cycle_devices = CycleDevices()
+        cycle_devices.add(current_devices.rows())
+        processed_devices = cycle_devices.devices
+
+        # 按母线分片时的分组键（与processed_devices一一对应）
+        group_keys = cycle_devices.powerlines if config.SOLVER_SHARD_MODE == "powerline" else None
+
+        # 无有效设备数据 → 标记完成
+        if not processed_devices:
+            log.warning(f"周期{cycle_time}无有效设备数据，跳过博弈")
+            CYCLE_STORE.set_status(cycle_time, "completed")
+            return None
 
-            # 关联设备→用户ID + 数据库Device主键ID
-            device_db = db.query(Device).filter_by(serial_number=serial_num).first()
-            if not device_db or not device_db.user_id:
-                log.warning(f"设备{serial_num}未关联用户，跳过")
-                continue
-            serial_user_map[serial_num] = device_db.user_id
-            # 核心修改：存储「原ID→(序列号, 数据库Device主键ID)」
-            original_id_serial_map[device_data["id"]] = (serial_num, device_db.id)
-
-            # 重置ID为0开始的连续索引
-            new_device_id = idx  # 新ID从0开始
-            new_id_original_id_map[new_device_id] = device_data["id"]  # 新ID→原ID 构造映射
-
-            # 构建纯净设备数据（使用新的ID）
-            clean_device = {
-                "id": new_device_id,  # 使用新ID（从0开始）
-                "produce": device_data.get("produce", []),
-                "chargeCost": device_data.get("chargeCost", []),
-                "currentStorage": device_data.get("currentStorage", []),
-                "chargeSpeed": device_data.get("chargeSpeed", []),
-                "dischargeSpeed": device_data.get("dischargeSpeed", []),
-                "overallCapacity": device_data.get("overallCapacity", 0.0),
-                "demands": device_data.get("demands", []),
-                "dischargeCost": device_data.get("dischargeCost", [])
-            }
-
-            # 修复produce字段：强制补全为长度3的数组（不跳过设备）
-            if clean_device["produce"] is None:
-                clean_device["produce"] = [0.0] * config.TIME_SLOTS
-            elif not isinstance(clean_device["produce"], list):
-                clean_device["produce"] = [0.0] * config.TIME_SLOTS
-            else:
-                # 长度不足补0，过长截断
-                if len(clean_device["produce"]) < config.TIME_SLOTS:
-                    clean_device["produce"] += [0.0] * (config.TIME_SLOTS - len(clean_device["produce"]))
-                elif len(clean_device["produce"]) > config.TIME_SLOTS:
-                    clean_device["produce"] = clean_device["produce"][:config.TIME_SLOTS]
-
-            # 日志仅提示，不跳过设备
-            if len(clean_device["produce"]) != config.TIME_SLOTS:
-                log.warning(f"设备原ID={device_data['id']}的produce字段已强制补全为长度{config.TIME_SLOTS}的数组")
-
-            processed_devices.append(clean_device)
-            log.debug(f"设备映射：新ID={new_device_id} → 原ID={device_data['id']} → 序列号={serial_num} → 数据库Device ID={device_db.id}")
-    finally:
-        db.close()
+        # 调用JAR
+        log.info(
+            f"JAR输入：设备数={len(processed_devices)}，新ID范围0-{len(processed_devices) - 1}，用户数={len(set(cycle_devices.serial_user_map.values()))}")
+
+        try:
+            # 旧版JAR不支持capacityShare，分片后各分片都按站点总容量求解，只能整周期求解
+            shards = [list(range(len(processed_devices)))] if solver_mode() == "legacy" \
+                else partition_devices(len(processed_devices), group_keys)
+            summary = await solve_shards(processed_devices, shards, cycle_devices.on_decision, cycle_header())
+        except SolverError as e:
+            log.error(f"JAR求解失败：{str(e)}")
+            CYCLE_STORE.set_status(cycle_time, "failed")
+            return None
+        return save_cycle_result(cycle_time, summary, cycle_devices)
 
-    # 无有效设备数据 → 标记完成
-    if not processed_devices:
-        log.warning(f"周期{cycle_time}无有效设备数据，跳过博弈")
-        with STORAGE_LOCK:
-            CYCLE_STATUS[cycle_time] = "completed"
+    except Exception as e:
+        log.error(f"JAR调用/落库异常：{str(e)}", exc_info=True)
+        CYCLE_STORE.set_status(cycle_time, "failed")
         return None
 
-    # 调用JAR
-    devices_json = json.dumps(processed_devices, ensure_ascii=False)
+
+async def solve_incremental(cycle_time, session, upload_deadline):
+    """
+    增量接入求解：周期开始即打开求解会话，上传窗口内按SOLVER_ADMIT_INTERVAL轮询新上传的设备并加入会话
+    求解进程在等待上传期间持续做最优响应迭代，截止时封存周期、加入剩余设备后取回收敛结果
+    """
+    cycle_devices = CycleDevices()
+    cursor = None
+
+    async def _admit():
+        nonlocal cursor
+        cursor, batch = CYCLE_STORE.changes(cycle_time, cursor)
+        admitted = cycle_devices.add(batch.rows())
+        if admitted:
+            total = await asyncio.to_thread(session.admit, admitted)
+            log.debug(f"周期{cycle_time}增量加入{len(admitted)}台设备，会话内共{total}台")
+
+    try:
+        try:
+            while time.time() < upload_deadline:
+                await _admit()
+                await asyncio.sleep(max(0.0, min(config.SOLVER_ADMIT_INTERVAL, upload_deadline - time.time())))
+
+            # 封存后再读一次，取到封存前最后写入的设备
+            CYCLE_STORE.seal(cycle_time)
+            await _admit()
+            if not cycle_devices.devices:
+                log.warning(f"周期{cycle_time}无有效设备数据，跳过博弈")
+                await asyncio.to_thread(session.abort)
+                CYCLE_STORE.set_status(cycle_time, "completed")
+                return None
+
+            log.info(
+                f"JAR输入（增量接入）：设备数={len(cycle_devices.devices)}，用户数={len(set(cycle_devices.serial_user_map.values()))}")
+            keeper = SnapshotKeeper(cycle_devices.on_decision)
+            try:
+                summary = await asyncio.to_thread(session.finish, keeper.deliver, keeper.on_snapshot)
+            except SolverError as e:
+                summary = keeper.fallback(e)
+        except SolverError as e:
+            log.error(f"JAR增量求解失败：{str(e)}")
+            CYCLE_STORE.set_status(cycle_time, "failed")
+            return None
+        log.info(
+            f"增量求解完成：加入{summary.get('admissions', 0)}批设备，上传窗口内迭代{summary.get('earlyRounds', 0)}轮，"
+            f"截止后收敛耗时{summary.get('finishMillis', 0)}毫秒")
+        return save_cycle_result(cycle_time, summary, cycle_devices)
+
+    except Exception as e:
+        log.error(f"JAR调用/落库异常：{str(e)}", exc_info=True)
+        CYCLE_STORE.set_status(cycle_time, "failed")
+        return None
+    finally:
+        # 异常/取消退出时放弃会话，求解进程归还进程池
+        await asyncio.to_thread(session.abort)
+
+
+def save_cycle_result(cycle_time, summary, cycle_devices):
+    """组装完整结果并整周期一个事务落库，更新周期状态"""
+    decisions = cycle_devices.decisions
+    summary.pop("type", None)
+    summary.pop("op", None)
+    # 记录本周期均衡决策供下一周期热启动，并估算热启动节省的迭代次数（随汇总写入result_json）
+    # 旧版JAR的迭代次数与新版不可比，不计入冷启动基线，也不估算iterationsSaved
+    WARM_STARTS.remember(cycle_devices.serial_decisions)
+    if solver_mode() != "legacy":
+        WARM_STARTS.record(summary, len(cycle_devices.devices))
+    full_result = {**summary, "decisions": decisions}
     log.info(
-        f"JAR输入：设备数={len(processed_devices)}，新ID范围0-{len(processed_devices) - 1}，用户数={len(set(serial_user_map.values()))}")
+        f"JAR博弈完成：生成{len(decisions)}条设备决策，迭代{summary.get('iteration', 0)}次，"
+        f"热启动设备{summary.get('warmStartKept', 0)}/{summary.get('warmStartDevices', 0)}，"
+        f"估算节省迭代{summary.get('iterationsSaved')}次，"
+        f"更新方式{summary.get('schedule')}：{summary.get('rounds', 0)}轮/{summary.get('solveMillis', 0)}毫秒"
+        f"{'（时间预算用尽，返回截止时的决策）' if summary.get('deadlineReached') else ''}"
+        f"{'（求解未正常结束，结果取自最新决策快照）' if summary.get('partial') else ''}")
+
+    if archive_enabled():
+        try:
+            archive_solver_input(cycle_time, summary, cycle_devices)
+        except Exception as e:
+            log.warning(f"求解输入归档失败：{str(e)}")
 
+    # 整个周期一个事务批量写入
+    db = SessionLocal()
     try:
-        # 异步调用JAR
-        result = await asyncio.to_thread(
-            subprocess.run,
-            ["java", "-jar", JAR_PATH, devices_json],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        write_strategy_to_db(db, cycle_time, full_result, cycle_devices.user_decision_map)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        log.error(f"批量落库失败：{str(e)}")
+    finally:
+        db.close()
 
-        # 处理JAR输出
-        if result.returncode != 0:
-            log.error(f"JAR执行失败：\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}")
-            with STORAGE_LOCK:
-                CYCLE_STATUS[cycle_time] = "failed"
-            return None
+    # 更新内存状态
+    CYCLE_STORE.set_strategies(cycle_time, decisions)
+    # 取自决策快照的结果照常下发，状态标记为partial便于监控区分
+    CYCLE_STORE.set_status(cycle_time, "partial" if summary.get("partial") else "completed")
 
-        # 提取JSON结果
-        json_match = re.search(r'\{[\s\S]*\}', result.stdout, re.DOTALL)
-        if not json_match:
-            log.error(f"JAR输出无JSON：{result.stdout}")
-            with STORAGE_LOCK:
-                CYCLE_STATUS[cycle_time] = "failed"
-            return None
+    return full_result
 
-        java_result = json.loads(json_match.group())
-        full_result = java_result.get("full_result", java_result)
-        decisions = full_result.get("decisions", [])
-        log.info(f"JAR博弈完成：生成{len(decisions)}条设备决策")
 
-        # 按用户拆分结果并写入数据库
-        user_decision_map = {}
-        for decision in decisions:
-            new_device_id = decision.get("deviceId")  # JAR返回的是新ID
-            original_device_id = new_id_original_id_map.get(new_device_id)  # 新ID→原ID
-            # 从映射表获取序列号+数据库Device ID
-            serial_db_tuple = original_id_serial_map.get(original_device_id)
-            if not serial_db_tuple:
-                log.warning(f"决策新ID={new_device_id}（原ID={original_device_id}）无对应设备信息，跳过落库")
-                continue
-            serial_num, db_device_id = serial_db_tuple  # 解包序列号+数据库ID
-            user_id = serial_user_map.get(serial_num)  # 序列号→用户ID
+def archive_solver_input(cycle_time, summary, cycle_devices):
+    """
+    归档本周期的最终求解输入（整周期不分片；增量接入时为截止时的设备数据，含热启动决策）
+    头信息固定本次求解实际使用的seed与prices，重放时不再依赖当前时间与price.xlsx
+    """
+    devices = cycle_devices.devices
+    header = {
+        **solver_header(len(devices)),
+        "seed": summary.get("seed"),
+        "prices": summary.get("prices"),
+        "shards": summary.get("shards", 1),
+        "type": "header",
+        "deviceCount": len(devices)
+    }
+    path = archive_cycle(cycle_time, header, devices, summary)
+    log.debug(f"周期{cycle_time}求解输入已归档：{path}")
+
+
+def resolve_device_owners(db, serial_numbers):
+    """单次查询：序列号 → (数据库Device主键ID, 用户ID, 用户母线信息)"""
+    serial_numbers = list(serial_numbers)
+    if not serial_numbers:
+        return {}
+    rows = db.query(
+        Device.serial_number, Device.id, Device.user_id, YstcUser.powerline_info
+    ).outerjoin(
+        YstcUser, YstcUser.id == Device.user_id
+    ).filter(
+        Device.serial_number.in_(serial_numbers)
+    ).all()
+    return {serial: (device_id, user_id, powerline_info) for serial, device_id, user_id, powerline_info in rows}
+
+
+async def solve_shards(processed_devices, shards, on_decision, header=None):
+    """
+    分片并行求解：每个分片的设备ID重新从0编号，作为独立博弈求解，并发数受SOLVER_MAX_PARALLEL限制
+    各分片按设备占比分得站点充放电容量（capacityShare），合并后的决策仍满足站点总容量约束
+    header为周期级头信息（seed），各分片共用
+    """
+    if len(shards) == 1:
+        return await asyncio.to_thread(run_solver, processed_devices, on_decision, header)
 
-            if not user_id:
-                log.warning(f"决策新ID={new_device_id}（原ID={original_device_id}）无法关联用户，跳过落库")
-                continue
-            if user_id not in user_decision_map:
-                user_decision_map[user_id] = []
+    total = len(processed_devices)
+    semaphore = asyncio.Semaphore(max(1, config.SOLVER_MAX_PARALLEL))
+    log.info(f"分片并行求解：设备数={total}，分片数={len(shards)}，最大并发={config.SOLVER_MAX_PARALLEL}")
 
-            # 还原决策中的deviceId为原ID
-            decision["deviceId"] = original_device_id
-            # 临时存储数据库Device ID到decision，方便写入时使用
-            decision["_db_device_id"] = db_device_id
-            user_decision_map[user_id].append(decision)
+    async def _solve_shard(shard_no, members):
+        shard_devices = [{**processed_devices[global_id], "id": local_id} for local_id, global_id in enumerate(members)]
 
-        # 复用数据库连接，批量写入
-        db = SessionLocal()
-        try:
-            for user_id, user_decisions in user_decision_map.items():
-                user_full_result = {**full_result, "decisions": user_decisions}
-                # 传入映射表，避免写入时再次查找
-                write_strategy_to_db(db, cycle_time, user_full_result, user_id, original_id_serial_map)
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            log.error(f"批量落库失败：{str(e)}")
-        finally:
-            db.close()
+        def _on_shard_decision(decision):
+            # 分片内ID → 周期内ID
+            decision["deviceId"] = members[decision["deviceId"]]
+            on_decision(decision)
 
-        # 更新内存状态
-        with STORAGE_LOCK:
-            DEVICE_STRATEGIES[cycle_time] = decisions
-            CYCLE_STATUS[cycle_time] = "completed"
+        shard_header = {**(header or {}), "shard": shard_no, "capacityShare": len(members) / total}
+        async with semaphore:
+            return await asyncio.to_thread(run_solver, shard_devices, _on_shard_decision, shard_header)
 
-        return java_result
+    summaries = await asyncio.gather(*[_solve_shard(no, members) for no, members in enumerate(shards)])
+    return merge_summaries(summaries)
 
-    except Exception as e:
-        log.error(f"JAR调用/落库异常：{str(e)}", exc_info=True)
-        with STORAGE_LOCK:
-            CYCLE_STATUS[cycle_time] = "failed"
-        return None
 
+class SnapshotKeeper:
+    """
+    保留求解过程中最新的决策快照（params.snapshotMs间隔输出）
+    求解超时/进程异常时以最新快照作为本次结果：未回调过的设备按快照决策补齐，汇总标记partial
+    """
 
-def write_strategy_to_db(db, cycle_time, full_result, current_user_id, original_id_serial_map):
+    def __init__(self, on_decision):
+        self._on_decision = on_decision
+        self.snapshot = None
+        self._delivered = set()  # 已回调的求解器设备ID（回调方可能改写deviceId，回调前记录）
+
+    def on_snapshot(self, snapshot):
+        self.snapshot = snapshot
+
+    def deliver(self, decision):
+        self._delivered.add(decision.get("deviceId"))
+        self._on_decision(decision)
+
+    def fallback(self, error):
+        """无快照时原样抛出求解异常，否则补齐决策并返回快照汇总"""
+        if self.snapshot is None:
+            raise error
+        snapshot = dict(self.snapshot)
+        decisions = snapshot.pop("decisions", [])
+        snapshot.pop("type", None)
+        for decision in decisions:
+            if decision.get("deviceId") not in self._delivered:
+                self.deliver({**decision, "type": "decision"})
+        log.warning(
+            f"求解未正常结束，使用最新决策快照（迭代{snapshot.get('iteration', 0)}次/{snapshot.get('rounds', 0)}轮）"
+            f"作为结果：{str(error)}")
+        return {
+            **snapshot,
+            "decisionCount": len(decisions),
+            "partial": True,
+            "partialReason": str(error)
+        }
+
+
+def run_solver(processed_devices, on_decision, header=None):
     """
-    严格按数据库表设计写入博弈结果（核心修改：使用数据库Device主键ID）
-    匹配表：ystc_game_strategy / ystc_strategy_detail / ystc_control_command
+    求解入口：优先使用常驻求解进程池，进程池不可用时回退为单次java -jar调用
+    决策逐条回调on_decision，返回求解汇总信息（benefit/iteration/timeConsumption/revenue等）
+    求解超时/失败但已收到决策快照时，返回快照结果（汇总带partial）而不是整周期失败
     """
+    mode = solver_mode()
+    if mode == "legacy":
+        return run_jar_legacy(processed_devices, on_decision)
+    keeper = SnapshotKeeper(on_decision)
     try:
-        # 解析周期时间
-        cycle_start_time = datetime.fromisoformat(cycle_time).astimezone(AUS_TZ)
-        cycle_end_time = cycle_start_time + timedelta(seconds=config.CYCLE_INTERVAL)
-        time_slices = len(full_result["decisions"][0]["dc"]) if full_result.get("decisions") and full_result["decisions"] else 1
-        time_slice_interval_sec = config.CYCLE_INTERVAL / time_slices  # 时间片间隔（秒）
-
-        # 验证用户存在
-        user = db.query(YstcUser).get(current_user_id)
-        if not user:
-            log.warning(f"用户ID{current_user_id}不存在，跳过落库")
-            return False
-
-        # 写入ystc_game_strategy表
-        # 深拷贝避免修改原数据
-        full_result_copy = json.loads(json.dumps(full_result))
-        for decision in full_result_copy.get("decisions", []):
-            original_device_id = decision.get("deviceId")
-            serial_db_tuple = original_id_serial_map.get(original_device_id)
-            if serial_db_tuple:
-                _, db_device_id = serial_db_tuple
-                decision["deviceId"] = db_device_id  # 替换为数据库Device主键ID
-        strategy_json_str = json.dumps(full_result_copy, ensure_ascii=False)
-
-        strategy_dict = json.loads(strategy_json_str)
-        # 遍历decisions，删除每个decision中的_db_device_id字段
-        for decision in strategy_dict.get("decisions", []):
-            decision.pop("_db_device_id", None)
-        # 重新生成无_db_device_id的JSON字符串
-        strategy_json_str = json.dumps(strategy_dict, ensure_ascii=False)
-
-        game_strategy = GameStrategy(
-            user_id=current_user_id,
-            strategy_name=f"周期{cycle_time[:19]}_用户{user.username}_博弈策略",
-            strategy_type="博弈优化策略",
-            algorithm_version="1.0",
-            start_time=cycle_start_time,
-            end_time=cycle_end_time,
-            time_slices=time_slices,
-            time_slice_interval=time_slice_interval_sec,
-            strategy_params=json.dumps({
-                "iteration": full_result.get("iteration", 0),
-                "time_consumption": full_result.get("timeConsumption", 0.0),
-                "total_benefit": full_result.get("benefit", 0.0),
-                "total_cost": full_result.get("cost", 0.0),
-                "revenue": full_result.get("revenue", 0.0)
-            }, ensure_ascii=False),
-            strategy_json=strategy_json_str,
-            external_conditions="默认市场电价+基准电网负荷",
-            is_active=True,
-            status="已生成",
-            create_by=user.username,
-            create_time=datetime.now(AUS_TZ),
-            update_by=user.username,
-            update_time=datetime.now(AUS_TZ)
-        )
-        db.add(game_strategy)
-        db.flush()
-        strategy_id = game_strategy.id
+        if mode == "pool":
+            pool = get_solver_pool()
+            try:
+                pool.start()
+            except SolverError as e:
+                log.error(f"求解进程池启动失败，本周期回退为单次JAR调用：{str(e)}")
+            else:
+                return pool.solve(iter_solver_input(processed_devices, header), keeper.deliver, keeper.on_snapshot)
+        return run_jar_once(processed_devices, keeper.deliver, header, keeper.on_snapshot)
+    except SolverError as e:
+        return keeper.fallback(e)
 
-        # 写入ystc_strategy_detail表
-        for decision in full_result.get("decisions", []):
-            # 直接从临时字段获取数据库Device ID
-            db_device_id = decision.get("_db_device_id")
-            if not db_device_id:
-                original_device_id = decision.get("deviceId")
-                serial_db_tuple = original_id_serial_map.get(original_device_id)
-                if not serial_db_tuple:
-                    log.warning(f"决策原ID={original_device_id}无对应设备信息，跳过详情写入")
+
+def solver_params(device_count=None):
+    """
+    求解参数块：时间片数与上传校验的TIME_SLOTS一致，求解器不再使用内置ConstNum
+    设备数达到SOLVER_LARGE_CYCLE_DEVICES时改用较小的种群/迭代次数，以质量换时延
+    时间预算（timeBudgetMs）到时求解器返回当前决策，应小于SOLVER_TIMEOUT
+    快照间隔（snapshotMs）内求解器输出一次当前决策快照，求解超时/异常时作为兜底结果
+    """
+    large = config.SOLVER_LARGE_CYCLE_DEVICES > 0 and (device_count or 0) >= config.SOLVER_LARGE_CYCLE_DEVICES
+    return {
+        "timeSlots": config.TIME_SLOTS,
+        "slotMinutes": config.SOLVER_SLOT_MINUTES,
+        "popSize": config.SOLVER_LARGE_POP_SIZE if large else config.SOLVER_POP_SIZE,
+        "iterationFoA": config.SOLVER_LARGE_FOA_ITERATIONS if large else config.SOLVER_FOA_ITERATIONS,
+        "tolerance": config.SOLVER_TOLERANCE,
+        "timeBudgetMs": int(config.SOLVER_TIME_BUDGET * 1000),
+        "snapshotMs": int(config.SOLVER_SNAPSHOT_INTERVAL * 1000)
+    }
+
+
+def solver_header(device_count=None):
+    """每次求解请求都携带的求解器配置（头信息），分片等调用方的头信息在其后合并"""
+    return {
+        "sumMode": config.SOLVER_SUM_MODE,
+        "schedule": config.SOLVER_SCHEDULE,
+        "params": solver_params(device_count)
+    }
+
+
+def cycle_header():
+    """
+    周期级头信息：随机种子（SOLVER_SEED未设置时每周期随机生成），求解器以此初始化全部随机数
+    seed与求解器返回的电价（汇总prices）一起归档，重放时可复现本周期求解
+    """
+    seed = int(config.SOLVER_SEED) if config.SOLVER_SEED else random.getrandbits(48)
+    return {"seed": seed}
+
+
+def iter_solver_input(processed_devices, header=None):
+    """逐条生成求解输入（NDJSON）：首行为头信息，其后每行一台设备"""
+    yield {
+        **solver_header(len(processed_devices)), **(header or {}),
+        "type": "header", "deviceCount": len(processed_devices)
+    }
+    for device in processed_devices:
+        yield device
+
+
+def _drain(stream, sink):
+    sink.append(stream.read())
+
+
+def read_solver_output(lines, on_decision, on_snapshot=None):
+    """逐行解析结果文件：决策逐条回调，决策快照交给on_snapshot，返回汇总记录"""
+    summary = None
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json_codec.loads(line)
+        if record.get("type") == "decision":
+            on_decision(record)
+        elif record.get("type") == "snapshot":
+            if on_snapshot is not None:
+                on_snapshot(record)
+        elif record.get("type") == "summary":
+            summary = record
+    if summary is None:
+        raise SolverError("结果文件缺少汇总记录（求解未正常结束）")
+    return summary
+
+
+def read_snapshots(output_path, on_snapshot):
+    """求解超时/失败时从结果文件中取出已写入的决策快照（文件末行可能不完整，解析失败即停止）"""
+    if on_snapshot is None:
+        return
+    try:
+        with open(output_path, "rb") as f:
+            for line in f:
+                if not line.strip():
                     continue
-                _, db_device_id = serial_db_tuple
+                record = json_codec.loads(line)
+                if record.get("type") == "snapshot":
+                    on_snapshot(record)
+    except (OSError, ValueError):
+        pass
+
 
-            # 验证设备归属当前用户
-            device = db.query(Device).filter_by(id=db_device_id, user_id=current_user_id).first()
-            if not device:
-                log.warning(f"用户{current_user_id}无设备ID={db_device_id}，跳过详情写入")
+def run_jar_legacy(processed_devices, on_decision):
+    """
+    旧版JAR的调用方式：设备列表整体JSON作为命令行参数，结果Result整体JSON打印到stdout
+    旧版Device不识别热启动等新增字段（未知字段会导致反序列化失败），只传基础字段；旧版决策不带deviceId，按输出顺序编号
+    """
+    legacy_fields = ("id", "overallCapacity", "produce", "demands", "currentStorage",
+                     "chargeSpeed", "chargeCost", "dischargeSpeed", "dischargeCost")
+    devices = [{field: device[field] for field in legacy_fields if field in device} for device in processed_devices]
+    try:
+        proc = subprocess.run(
+            ["java", "-jar", config.SOLVER_JAR_PATH, json_codec.dumps(devices)],
+            capture_output=True,
+            timeout=config.SOLVER_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        raise SolverError(f"JAR执行超时（>{config.SOLVER_TIMEOUT}秒）")
+    stdout = proc.stdout.decode("utf-8", errors="replace")
+    if proc.returncode != 0:
+        stderr = proc.stderr.decode("utf-8", errors="replace")
+        raise SolverError(f"JAR执行失败：\nSTDOUT: {stdout}\nSTDERR: {stderr}")
+    # stdout中博弈过程日志在前，结果JSON为最后一个以{开头的行
+    result = None
+    for line in reversed(stdout.splitlines()):
+        if line.lstrip().startswith("{"):
+            result = json_codec.loads(line)
+            break
+    if result is None:
+        raise SolverError(f"JAR输出无JSON：{stdout}")
+    result = result.get("full_result", result)
+    decisions = result.pop("decisions", [])
+    for device_id, decision in enumerate(decisions):
+        decision["deviceId"] = device_id
+        on_decision(decision)
+    return {**result, "decisionCount": len(decisions)}
+
+
+def run_jar_once(processed_devices, on_decision, header=None, on_snapshot=None):
+    """
+    单次启动java -jar求解，输入传输方式由SOLVER_INPUT_MODE决定：
+    stdin=经标准输入逐行流式写入；file=写入临时NDJSON文件后传路径；argv=整体JSON作为命令行参数（受ARG_MAX限制）
+    结果写入独立的NDJSON结果文件（--output），stdout仅作日志；argv方式不携带头信息
+    求解过程中的决策快照同样写入结果文件，超时/失败时先交给on_snapshot再抛出异常
+    """
+    mode = config.SOLVER_INPUT_MODE
+    os.makedirs(config.DATA_DIR, exist_ok=True)
+    input_path = None
+    fd, output_path = tempfile.mkstemp(suffix=".result.ndjson", dir=config.DATA_DIR)
+    os.close(fd)
+    if mode == "argv":
+        cmd = ["java", "-jar", config.SOLVER_JAR_PATH, json_codec.dumps(processed_devices)]
+    elif mode == "file":
+        with tempfile.NamedTemporaryFile(suffix=".ndjson", dir=config.DATA_DIR, delete=False) as f:
+            input_path = f.name
+            for record in iter_solver_input(processed_devices, header):
+                f.write(json_codec.dumps_bytes(record))
+                f.write(b"\n")
+        cmd = ["java", "-jar", config.SOLVER_JAR_PATH, f"--input={input_path}"]
+    else:
+        cmd = ["java", "-jar", config.SOLVER_JAR_PATH, "--input=-"]
+    cmd.append(f"--output={output_path}")
+
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if mode == "stdin" else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        # stdout/stderr由后台线程读取，避免写stdin时双方互相阻塞
+        stdout_chunks, stderr_chunks = [], []
+        readers = [
+            threading.Thread(target=_drain, args=(proc.stdout, stdout_chunks), daemon=True),
+            threading.Thread(target=_drain, args=(proc.stderr, stderr_chunks), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            if mode == "stdin":
+                try:
+                    for record in iter_solver_input(processed_devices, header):
+                        proc.stdin.write(json_codec.dumps_bytes(record))
+                        proc.stdin.write(b"\n")
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    # 求解进程提前退出，以其返回码和stderr为准
+                    pass
+            returncode = proc.wait(timeout=config.SOLVER_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            read_snapshots(output_path, on_snapshot)
+            raise SolverError(f"JAR执行超时（>{config.SOLVER_TIMEOUT}秒）")
+        for reader in readers:
+            reader.join()
+
+        # 处理JAR输出
+        if returncode != 0:
+            stdout = b"".join(stdout_chunks).decode("utf-8", errors="replace")
+            stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+            read_snapshots(output_path, on_snapshot)
+            raise SolverError(f"JAR执行失败：\nSTDOUT: {stdout}\nSTDERR: {stderr}")
+
+        with open(output_path, "rb") as f:
+            return read_solver_output(f, on_decision, on_snapshot)
+    finally:
+        for path in (input_path, output_path):
+            if not path:
                 continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
-            # 遍历时间片写入详情
-            for time_slice_idx in range(time_slices):
-                time_point = cycle_start_time + timedelta(seconds=time_slice_idx * time_slice_interval_sec)
-                dc_value = decision["dc"][time_slice_idx]
-                action_type = {
-                    0: "idle",
-                    1: "charge",
-                    -1: "discharge"
-                }.get(dc_value, "unknown")
-
-                speed_value = decision["speed"][time_slice_idx]
-                cost_value = decision["cost"][time_slice_idx] if len(decision.get("cost", [])) > time_slice_idx else 0.0
-                total_benefit = decision.get("benefit", 0.0)
-
-                strategy_detail = StrategyDetail(
-                    strategy_id=strategy_id,
-                    time_slice_index=time_slice_idx,
-                    time_point=time_point,
-                    action_type=action_type,
-                    power_setpoint=speed_value,
-                    expected_price=cost_value,
-                    expected_benefit=total_benefit,
-                    create_by=user.username,
-                    create_time=datetime.now(AUS_TZ),
-                    update_by=user.username,
-                    update_time=datetime.now(AUS_TZ)
-                )
-                db.add(strategy_detail)
-
-        # 写入ystc_control_command表
-        for decision in full_result.get("decisions", []):
-            # 直接从临时字段获取数据库Device ID
+
+def write_strategy_to_db(db, cycle_time, full_result, user_decision_map):
+    """
+    按周期批量写入博弈结果（使用数据库Device主键ID）
+    匹配表：ystc_game_strategy / ystc_strategy_detail / ystc_control_command
+    设备归属在求解前已由序列号解析确定，每张表一条executemany语句，语句数与设备数量无关；由调用方统一提交事务
+    """
+    if not user_decision_map:
+        return {}
+
+    # 解析周期时间
+    cycle_start_time = datetime.fromisoformat(cycle_time).astimezone(AUS_TZ)
+    cycle_end_time = cycle_start_time + timedelta(seconds=config.CYCLE_INTERVAL)
+    strategy_cycle_time = cycle_key(cycle_time)
+    decisions = full_result.get("decisions") or []
+    time_slices = len(decisions[0]["dc"]) if decisions else 1
+    time_slice_interval_sec = config.CYCLE_INTERVAL / time_slices  # 时间片间隔（秒）
+    now = datetime.now(AUS_TZ)
+
+    # 一次查询取回所有用户名（同时验证用户存在）
+    usernames = dict(
+        db.query(YstcUser.id, YstcUser.username).filter(YstcUser.id.in_(list(user_decision_map.keys()))).all()
+    )
+    for user_id in user_decision_map:
+        if user_id not in usernames:
+            log.warning(f"用户ID{user_id}不存在，跳过落库")
+
+    valid_users = [user_id for user_id in user_decision_map if user_id in usernames]
+    if not valid_users:
+        return {}
+
+    # 求解器全局字段（除决策列表外）每周期只写一行ystc_cycle_result，用户策略通过cycle_result_id引用
+    shared_fields = {key: value for key, value in full_result.items() if key != "decisions"}
+    cycle_result = CycleResult(
+        start_time=cycle_start_time,
+        end_time=cycle_end_time,
+        time_slices=time_slices,
+        time_slice_interval=time_slice_interval_sec,
+        device_count=len(decisions),
+        user_count=len(valid_users),
+        iteration=full_result.get("iteration", 0),
+        time_consumption=full_result.get("timeConsumption", 0.0),
+        total_benefit=full_result.get("benefit", 0.0),
+        total_cost=full_result.get("cost", 0.0),
+        revenue=full_result.get("revenue", 0.0),
+        result_json=shared_fields,
+        create_time=now
+    )
+    db.add(cycle_result)
+    db.flush()
+
+    # 写入ystc_game_strategy表：每个用户只保存自己的决策切片
+    strategy_rows = []
+    for user_id in valid_users:
+        username = usernames[user_id]
+        # 单次遍历构建落库决策：deviceId替换为数据库Device主键ID，不携带内部字段
+        strategy_json = {
+            "cycle_result_id": cycle_result.id,
+            "decisions": [
+                {
+                    "deviceId": decision.get("_db_device_id") or decision.get("deviceId"),
+                    "dc": decision.get("dc", []),
+                    "speed": decision.get("speed", []),
+                    "cost": decision.get("cost", []),
+                    "benefit": decision.get("benefit", 0.0)
+                }
+                for decision in user_decision_map[user_id]
+            ]
+        }
+
+        strategy_rows.append({
+            "user_id": user_id,
+            "cycle_result_id": cycle_result.id,
+            "cycle_time": strategy_cycle_time,
+            "strategy_name": f"周期{cycle_time[:19]}_用户{username}_博弈策略",
+            "strategy_type": "博弈优化策略",
+            "algorithm_version": "1.0",
+            "start_time": cycle_start_time,
+            "end_time": cycle_end_time,
+            "time_slices": time_slices,
+            "time_slice_interval": time_slice_interval_sec,
+            "strategy_params": None,
+            "strategy_json": strategy_json,
+            "external_conditions": "默认市场电价+基准电网负荷",
+            "is_active": True,
+            "status": "已生成",
+            "create_by": username,
+            "create_time": now,
+            "update_by": username,
+            "update_time": now
+        })
+    if not strategy_rows:
+        return {}
+    db.execute(GameStrategy.__table__.insert(), strategy_rows)
+
+    # 一次查询取回本周期新策略的主键（本周期结果行下每个用户一条策略）
+    strategy_ids = {}
+    for strategy_id, user_id in db.query(GameStrategy.id, GameStrategy.user_id).filter(
+            GameStrategy.cycle_result_id == cycle_result.id
+    ).all():
+        strategy_ids[user_id] = max(strategy_id, strategy_ids.get(user_id, 0))
+
+    # 构建ystc_strategy_detail / ystc_control_command行
+    detail_rows = []
+    command_rows = []
+    action_types = {0: "idle", 1: "charge", -1: "discharge"}
+    command_types = {0: "idle_exec", 1: "charge_exec", -1: "discharge_exec"}
+    time_points = [cycle_start_time + timedelta(seconds=idx * time_slice_interval_sec) for idx in range(time_slices)]
+    for user_id, user_decisions in user_decision_map.items():
+        strategy_id = strategy_ids.get(user_id)
+        if not strategy_id:
+            continue
+        username = usernames[user_id]
+        for decision in user_decisions:
             db_device_id = decision.get("_db_device_id")
             if not db_device_id:
-                original_device_id = decision.get("deviceId")
-                serial_db_tuple = original_id_serial_map.get(original_device_id)
-                if not serial_db_tuple:
-                    continue
-                _, db_device_id = serial_db_tuple
-
-            # 验证设备归属当前用户
-            device = db.query(Device).filter_by(id=db_device_id, user_id=current_user_id).first()
-            if not device:
+                log.warning(f"决策原ID={decision.get('deviceId')}无对应设备信息，跳过详情写入")
                 continue
 
-            # 解析命令类型
-            dc_value = decision["dc"][0]
-            command_type = {
-                0: "idle_exec",
-                1: "charge_exec",
-                -1: "discharge_exec"
-            }.get(dc_value, "unknown_exec")
-
-            scheduled_at = cycle_start_time + timedelta(seconds=0 * time_slice_interval_sec)
-            expire_at = scheduled_at + timedelta(seconds=time_slice_interval_sec)
-
-            # 构建控制命令（核心：device_id使用数据库主键ID）
-            control_command = ControlCommand(
-                device_id=db_device_id,  # 最终写入数据库的设备ID（主键）
-                strategy_id=strategy_id,
-                command_type=command_type,
-                command_params=json.dumps({
+            # 遍历时间片写入详情
+            cost = decision.get("cost", [])
+            for time_slice_idx in range(time_slices):
+                detail_rows.append({
+                    "strategy_id": strategy_id,
+                    "time_slice_index": time_slice_idx,
+                    "time_point": time_points[time_slice_idx],
+                    "action_type": action_types.get(decision["dc"][time_slice_idx], "unknown"),
+                    "power_setpoint": decision["speed"][time_slice_idx],
+                    "expected_price": cost[time_slice_idx] if len(cost) > time_slice_idx else 0.0,
+                    "expected_benefit": decision.get("benefit", 0.0),
+                    "create_by": username,
+                    "create_time": now,
+                    "update_by": username,
+                    "update_time": now
+                })
+
+            # 控制命令（核心：device_id使用数据库主键ID）
+            scheduled_at = cycle_start_time
+            command_rows.append({
+                "device_id": db_device_id,
+                "strategy_id": strategy_id,
+                "command_type": command_types.get(decision["dc"][0], "unknown_exec"),
+                "command_params": {
                     "dc": decision.get("dc", []),
                     "speed": decision.get("speed", []),
                     "cost": decision.get("cost", []),
                     "benefit": decision.get("benefit", 0.0),
                     "deviceId": db_device_id  # 数据库ID
-                }, ensure_ascii=False),
-                priority=1,
-                issued_at=datetime.now(AUS_TZ),
-                scheduled_at=scheduled_at,
-                expire_at=expire_at,
-                executed_at=None,
-                status="pending",
-                result=None,
-                error_message=None,
-                retry_count=0,
-                max_retries=3,
-                create_by=user.username,
-                create_time=datetime.now(AUS_TZ),
-                update_by=user.username,
-                update_time=datetime.now(AUS_TZ)
-            )
-            db.add(control_command)
-
-        # 最终提交所有变更
-        db.commit()
-        log.info(f"用户{current_user_id}（{user.username}）周期{cycle_time}博弈结果落库成功 | 策略ID：{strategy_id}")
-        return True
-
-    except Exception as e:
-        db.rollback()
-        log.error(f"用户{current_user_id}周期{cycle_time}落库失败：{str(e)}", exc_info=True)
-        raise e
\ No newline at end of file
+                },
+                "priority": 1,
+                "issued_at": now,
+                "scheduled_at": scheduled_at,
+                "expire_at": scheduled_at + timedelta(seconds=time_slice_interval_sec),
+                "executed_at": None,
+                "status": "pending",
+                "result": None,
+                "error_message": None,
+                "retry_count": 0,
+                "max_retries": 3,
+                "create_by": username,
+                "create_time": now,
+                "update_by": username,
+                "update_time": now
+            })
+
+    if detail_rows:
+        db.execute(StrategyDetail.__table__.insert(), detail_rows)
+    if command_rows:
+        db.execute(ControlCommand.__table__.insert(), command_rows)
+
+    log.info(f"周期{cycle_time}博弈结果批量落库：策略{len(strategy_rows)}条，详情{len(detail_rows)}条，命令{len(command_rows)}条")
+    return strategy_ids
@@ -0,0 +1,68 @@
+import logging
+from ..config import config
+
+log = logging.getLogger("pt.shard")
+
+
+def partition_devices(device_count, group_keys=None):
+    """
+    将周期内设备划分为可独立求解的分片，返回分片列表（每片为设备下标列表）
+    SOLVER_SHARD_MODE：none=不分片；powerline=按母线（powerline_info）分组；size=按固定大小切分
+    分组后仍超过SOLVER_SHARD_SIZE的分片继续按大小切分
+    """
+    mode = config.SOLVER_SHARD_MODE
+    shard_size = config.SOLVER_SHARD_SIZE
+    if mode == "none" or device_count == 0:
+        return [list(range(device_count))]
+
+    groups = {}
+    if mode == "powerline" and group_keys is not None:
+        for idx in range(device_count):
+            groups.setdefault(group_keys[idx], []).append(idx)
+    else:
+        groups[None] = list(range(device_count))
+
+    shards = []
+    for members in groups.values():
+        if shard_size > 0 and len(members) > shard_size:
+            shards.extend(members[i:i + shard_size] for i in range(0, len(members), shard_size))
+        else:
+            shards.append(members)
+    return shards
+
+
+def merge_summaries(summaries):
+    """合并各分片求解汇总：收益/成本/营收/迭代数/热启动设备数累加，耗时与轮数取最大值（分片并行执行）"""
+    merged = {
+        "benefit": 0.0,
+        "cost": 0,
+        "iteration": 0,
+        "timeConsumption": 0.0,
+        "revenue": 0.0,
+        "decisionCount": 0,
+        "warmStartDevices": 0,
+        "warmStartKept": 0,
+        "rounds": 0,
+        "solveMillis": 0,
+        "shards": len(summaries)
+    }
+    for summary in summaries:
+        merged["benefit"] += summary.get("benefit", 0.0)
+        merged["cost"] += summary.get("cost", 0)
+        merged["iteration"] += summary.get("iteration", 0)
+        merged["revenue"] += summary.get("revenue", 0.0)
+        merged["decisionCount"] += summary.get("decisionCount", 0)
+        merged["warmStartDevices"] += summary.get("warmStartDevices", 0)
+        merged["warmStartKept"] += summary.get("warmStartKept", 0)
+        merged["timeConsumption"] = max(merged["timeConsumption"], summary.get("timeConsumption", 0.0))
+        merged["rounds"] = max(merged["rounds"], summary.get("rounds", 0))
+        merged["solveMillis"] = max(merged["solveMillis"], summary.get("solveMillis", 0))
+        merged.setdefault("schedule", summary.get("schedule"))
+        # 各分片使用同一seed与电价
+        merged.setdefault("seed", summary.get("seed"))
+        merged.setdefault("prices", summary.get("prices"))
+        merged["deadlineReached"] = merged.get("deadlineReached", False) or bool(summary.get("deadlineReached"))
+        if summary.get("partial"):
+            merged["partial"] = True
+            merged.setdefault("partialReason", summary.get("partialReason"))
+    return merged
@@ -0,0 +1,43 @@
+import os
+import logging
+from app.utils import cycle_key
+from app.utils import json_codec
+from ..config import config
+
+log = logging.getLogger("pt.archive")
+
+
+def archive_enabled():
+    return bool(config.SOLVER_ARCHIVE_DIR)
+
+
+def archive_cycle(cycle_time, header, devices, summary):
+    """
+    归档本周期求解输入，供离线重放（app/test/replay_cycles.py）：
+    首行为头信息（含本次求解的seed与prices），其后每行一台设备，末行为本次求解汇总（"type":"summary"，重放时作为对照）
+    归档文件超过SOLVER_ARCHIVE_KEEP个时删除最旧的
+    """
+    os.makedirs(config.SOLVER_ARCHIVE_DIR, exist_ok=True)
+    name = f"cycle_{cycle_key(cycle_time).strftime('%Y%m%dT%H%M%S')}.ndjson"
+    path = os.path.join(config.SOLVER_ARCHIVE_DIR, name)
+    # 先写临时文件再改名，重放不会读到写了一半的归档
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for record in [header, *devices, {**summary, "type": "summary"}]:
+            f.write(json_codec.dumps_bytes(record))
+            f.write(b"\n")
+    os.replace(tmp_path, path)
+    prune_archive()
+    return path
+
+
+def prune_archive():
+    keep = config.SOLVER_ARCHIVE_KEEP
+    if keep <= 0:
+        return
+    names = sorted(n for n in os.listdir(config.SOLVER_ARCHIVE_DIR) if n.startswith("cycle_") and n.endswith(".ndjson"))
+    for name in names[:-keep]:
+        try:
+            os.remove(os.path.join(config.SOLVER_ARCHIVE_DIR, name))
+        except OSError as e:
+            log.warning(f"删除过期求解归档失败：{name}，{str(e)}")
@@ -0,0 +1,376 @@
+import os
+import atexit
+import queue
+import struct
+import logging
+import zipfile
+import threading
+import subprocess
+from app.utils import json_codec
+from ..config import config
+
+log = logging.getLogger("pt.solver")
+
+# 常驻求解进程入口（与MainMethod同在博弈模型JAR内）
+SERVER_MAIN_CLASS = "main.java.method.SolverServer"
+# 帧头：4字节大端无符号整数，表示后续JSON正文的字节长度
+FRAME_HEADER = struct.Struct(">I")
+
+
+_jar_checks = {}  # {(JAR路径, 修改时间): 是否旧版JAR}
+
+
+def is_legacy_jar(jar_path):
+    """
+    旧版JAR（未按AU_smartGrid/build_jar.sh重新构建）不含SolverServer，只支持argv整体JSON输入、stdout整体JSON输出
+    按文件修改时间缓存检查结果，替换JAR后自动重新检查
+    """
+    try:
+        key = (jar_path, os.path.getmtime(jar_path))
+    except OSError:
+        return False
+    if key not in _jar_checks:
+        server_class = SERVER_MAIN_CLASS.replace(".", "/") + ".class"
+        try:
+            with zipfile.ZipFile(jar_path) as jar:
+                _jar_checks[key] = server_class not in jar.namelist()
+        except (OSError, zipfile.BadZipFile):
+            _jar_checks[key] = False
+        if _jar_checks[key]:
+            log.warning(f"{jar_path}为旧版JAR（不含{SERVER_MAIN_CLASS}），求解回退为单次argv调用，"
+                        f"进程池/增量接入/分片/热启动等不生效，请用AU_smartGrid/build_jar.sh重新构建")
+    return _jar_checks[key]
+
+
+class SolverError(Exception):
+    """求解进程异常（进程退出/协议错误/求解失败）"""
+
+
+class SolverWorker:
+    """单个常驻JVM求解进程：通过stdin/stdout收发长度前缀JSON帧"""
+
+    def __init__(self, worker_id, jar_path):
+        self.worker_id = worker_id
+        self.jar_path = jar_path
+        self.proc = None
+        self.solved_count = 0
+        self._io_lock = threading.Lock()
+
+    def start(self):
+        """启动JVM进程（健康检查由进程池负责）"""
+        self.proc = subprocess.Popen(
+            ["java", "-cp", self.jar_path, SERVER_MAIN_CLASS],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        # stderr承载博弈过程日志，必须持续读取，否则管道写满会阻塞求解进程
+        threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True).start()
+        self.solved_count = 0
+        log.info(f"求解进程#{self.worker_id}已启动：PID={self.proc.pid}")
+
+    def _drain_stderr(self, proc):
+        for line in iter(proc.stderr.readline, b""):
+            log.debug(f"求解进程#{self.worker_id}：{line.decode('utf-8', errors='replace').rstrip()}")
+
+    def is_alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def kill(self):
+        """强制结束进程（超时/协议错乱时使用，读线程会因EOF解除阻塞）"""
+        if self.proc is None:
+            return
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception as e:
+            log.warning(f"结束求解进程#{self.worker_id}失败：{str(e)}")
+        self.proc = None
+
+    def _send(self, message):
+        body = json_codec.dumps_bytes(message)
+        self.proc.stdin.write(FRAME_HEADER.pack(len(body)))
+        self.proc.stdin.write(body)
+        self.proc.stdin.flush()
+
+    def _read_exact(self, size):
+        data = self.proc.stdout.read(size)
+        if data is None or len(data) != size:
+            raise SolverError(f"求解进程#{self.worker_id}输出中断（进程可能已崩溃）")
+        return data
+
+    def _recv(self):
+        (size,) = FRAME_HEADER.unpack(self._read_exact(FRAME_HEADER.size))
+        return json_codec.loads(self._read_exact(size))
+
+    def request(self, message, records=(), on_record=None, on_snapshot=None):
+        """
+        发送一帧请求（及其后逐条跟随的数据帧）并阻塞等待响应（超时由调用方控制）
+        响应中type=decision的帧逐条交给on_record处理，type=snapshot的帧（求解中的决策快照）交给on_snapshot，带op的帧为最终响应
+        """
+        if not self.is_alive():
+            raise SolverError(f"求解进程#{self.worker_id}未运行")
+        with self._io_lock:
+            try:
+                self._send(message)
+                for record in records:
+                    self._send(record)
+                while True:
+                    response = self._recv()
+                    if response.get("type") == "snapshot":
+                        if on_snapshot is not None:
+                            on_snapshot(response)
+                        continue
+                    if response.get("type") != "decision":
+                        break
+                    if on_record is not None:
+                        on_record(response)
+            except (OSError, ValueError, AttributeError, struct.error) as e:
+                raise SolverError(f"求解进程#{self.worker_id}通信失败：{str(e)}") from e
+        if response.get("op") == "error":
+            raise SolverError(f"求解进程#{self.worker_id}返回错误：{response.get('msg')}")
+        return response
+
+
+class SolverPool:
+    """常驻求解进程池：进程复用、健康检查、崩溃重启、单次请求超时"""
+
+    def __init__(self, jar_path=None, size=None, timeout=None):
+        self.jar_path = jar_path or config.SOLVER_JAR_PATH
+        self.size = size or config.SOLVER_POOL_SIZE
+        self.timeout = timeout or config.SOLVER_TIMEOUT
+        self.workers = [SolverWorker(i, self.jar_path) for i in range(self.size)]
+        self._idle = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动全部求解进程（重复调用无副作用）"""
+        with self._lock:
+            if self._started:
+                return
+            if not os.path.exists(self.jar_path):
+                raise SolverError(f"JAR文件不存在：{self.jar_path}")
+            for worker in self.workers:
+                self._restart(worker)
+            for worker in self.workers:
+                self._idle.put(worker)
+            self._started = True
+        log.info(f"求解进程池启动完成：{self.size}个进程")
+
+    def _call(self, worker, message, timeout, records=(), on_record=None, on_snapshot=None):
+        """在独立线程中完成一次请求，超时则杀掉进程使阻塞的读写操作返回"""
+        result = {}
+
+        def _run():
+            try:
+                result["response"] = worker.request(message, records, on_record, on_snapshot)
+            except SolverError as e:
+                result["error"] = e
+
+        caller = threading.Thread(target=_run, daemon=True)
+        caller.start()
+        caller.join(timeout)
+        if caller.is_alive():
+            worker.kill()
+            caller.join(5)
+            raise SolverError(f"求解进程#{worker.worker_id}请求超时（>{timeout}秒），已终止")
+        if "error" in result:
+            raise result["error"]
+        return result["response"]
+
+    def _ping(self, worker):
+        response = self._call(worker, {"op": "ping"}, config.SOLVER_STARTUP_TIMEOUT)
+        return response.get("op") == "pong"
+
+    def _restart(self, worker):
+        """重启单个求解进程，并用ping确认其可用"""
+        worker.kill()
+        worker.start()
+        try:
+            if self._ping(worker):
+                return
+            error = "健康检查响应异常"
+        except SolverError as e:
+            error = str(e)
+        worker.kill()
+        raise SolverError(f"求解进程#{worker.worker_id}健康检查失败：{error}")
+
+    def _acquire(self):
+        worker = self._idle.get(timeout=self.timeout)
+        if not worker.is_alive():
+            log.warning(f"求解进程#{worker.worker_id}已退出，重启中")
+            try:
+                self._restart(worker)
+            except SolverError:
+                self._idle.put(worker)
+                raise
+        return worker
+
+    def solve(self, records, on_decision, on_snapshot=None):
+        """
+        同步求解：占用一个空闲进程，超时则杀掉并重启该进程
+        records为求解输入流：首条为头信息（含deviceCount），其后每条一台设备，逐帧发送不整体拼接
+        决策逐帧回调on_decision，求解中的决策快照回调on_snapshot，返回汇总信息（benefit/iteration等）
+        """
+        records = iter(records)
+        header = next(records)
+        self.start()
+        try:
+            worker = self._acquire()
+        except queue.Empty:
+            raise SolverError(f"{self.timeout}秒内无空闲求解进程")
+
+        try:
+            response = self._call(worker, {**header, "op": "solve"}, self.timeout, records, on_decision, on_snapshot)
+            worker.solved_count += 1
+            return response
+        except SolverError:
+            # 出错时帧流可能未读完，进程状态不可信，直接重启
+            worker.kill()
+            raise
+        finally:
+            self._release(worker)
+
+    def _release(self, worker):
+        """归还进程：已退出的进程先重启再放回空闲队列"""
+        if not worker.is_alive():
+            try:
+                self._restart(worker)
+            except SolverError as e:
+                log.error(f"求解进程#{worker.worker_id}重启失败：{str(e)}")
+        self._idle.put(worker)
+
+    def open_session(self, records):
+        """
+        打开增量求解会话：占用一个空闲进程直至会话结束，records格式同solve（首批设备可为空）
+        返回SolverSession，后续设备经admit()逐批加入，finish()取回结果
+        """
+        records = iter(records)
+        header = next(records)
+        self.start()
+        try:
+            worker = self._acquire()
+        except queue.Empty:
+            raise SolverError(f"{self.timeout}秒内无空闲求解进程")
+        try:
+            self._call(worker, {**header, "op": "open"}, self.timeout, records)
+        except SolverError:
+            worker.kill()
+            self._release(worker)
+            raise
+        return SolverSession(self, worker)
+
+    def health_check(self):
+        """周期间隙调用：对空闲进程逐个ping，失败即重启"""
+        if not self._started:
+            return
+        checked = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked.append(worker)
+        try:
+            for worker in checked:
+                try:
+                    if worker.is_alive() and self._ping(worker):
+                        continue
+                except SolverError as e:
+                    log.warning(str(e))
+                log.warning(f"求解进程#{worker.worker_id}健康检查未通过，重启中")
+                try:
+                    self._restart(worker)
+                except SolverError as e:
+                    log.error(f"求解进程#{worker.worker_id}重启失败：{str(e)}")
+        finally:
+            for worker in checked:
+                self._idle.put(worker)
+
+    def shutdown(self):
+        """关闭全部求解进程（退出时调用，无响应的进程超时后直接杀掉，不阻塞进程退出）"""
+        with self._lock:
+            for worker in self.workers:
+                if worker.is_alive():
+                    try:
+                        self._call(worker, {"op": "shutdown"}, config.SOLVER_STARTUP_TIMEOUT)
+                    except SolverError:
+                        pass
+                worker.kill()
+            self._started = False
+            self._idle = queue.Queue()
+        log.info("求解进程池已关闭")
+
+
+class SolverSession:
+    """
+    增量求解会话：求解进程在后台对已加入的设备持续迭代，调用方在上传窗口内分批加入新到达/重复上传的设备
+    会话独占一个求解进程，finish()或abort()后归还进程池；出错时杀掉进程，由进程池重启
+    """
+
+    def __init__(self, pool, worker):
+        self.pool = pool
+        self.worker = worker
+        self.device_count = 0
+        self._closed = False
+
+    def _request(self, message, records=(), on_record=None, on_snapshot=None):
+        if self._closed:
+            raise SolverError("增量求解会话已结束")
+        try:
+            return self.pool._call(self.worker, message, self.pool.timeout, records, on_record, on_snapshot)
+        except SolverError:
+            self._close(failed=True)
+            raise
+
+    def admit(self, devices):
+        """加入一批设备（id为连续编号：新设备顺延，重复上传沿用原编号），返回会话内设备总数"""
+        devices = list(devices)
+        if not devices:
+            return self.device_count
+        response = self._request({"op": "admit", "deviceCount": len(devices)}, devices)
+        self.device_count = response.get("deviceCount", self.device_count)
+        return self.device_count
+
+    def finish(self, on_decision, on_snapshot=None):
+        """停止加入设备，等待迭代收敛：决策逐帧回调on_decision，快照回调on_snapshot，返回汇总信息（含admissions/earlyRounds）"""
+        response = self._request({"op": "finish"}, on_record=on_decision, on_snapshot=on_snapshot)
+        self.worker.solved_count += 1
+        self._close()
+        return response
+
+    def abort(self):
+        """放弃会话（周期异常退出时调用）"""
+        if self._closed:
+            return
+        try:
+            self._request({"op": "abort"})
+        except SolverError as e:
+            log.warning(f"放弃增量求解会话失败：{str(e)}")
+            return
+        self._close()
+
+    def _close(self, failed=False):
+        if self._closed:
+            return
+        self._closed = True
+        if failed:
+            # 会话中途出错时帧流状态不可信，直接重启
+            self.worker.kill()
+        self.pool._release(self.worker)
+
+
+# 全局进程池（首次使用时创建）
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_solver_pool():
+    """获取全局求解进程池（懒加载单例）"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = SolverPool()
+            atexit.register(_POOL.shutdown)
+        return _POOL
@@ -0,0 +1,114 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+import pytz
+from sqlalchemy import func
+from app.utils import SessionLocal
+from app.models import ControlCommand
+from app.models.strategy import decode_legacy_json
+from ..config import config
+
+log = logging.getLogger("pt.warm_start")
+AUS_TZ = pytz.timezone(config.TZ)
+
+# 冷启动基线的平滑系数（越大越偏向最近周期）
+EWMA_ALPHA = 0.3
+
+
+class WarmStartCache:
+    """
+    热启动决策缓存：记录每台设备（按序列号）上一周期的均衡决策，作为下一周期博弈的初始决策
+    进程内未命中时（重启后/多worker时上一周期由其他worker求解）回退查询该设备最近一条控制命令
+    同时维护冷启动时每台设备平均迭代次数的滑动平均，用于估算热启动节省的迭代次数
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age  # 超过该时长（秒）的决策不再用于热启动
+        self._decisions = {}  # {serial_number: (决策时间, {"dc", "speed", "cost"})}
+        self._lock = threading.Lock()
+        self.cold_iterations_per_device = None
+
+    def lookup(self, device_ids):
+        """device_ids: {serial_number: 数据库Device主键ID}，返回{serial_number: 热启动决策}"""
+        cutoff = datetime.now(AUS_TZ) - timedelta(seconds=self.max_age)
+        found = {}
+        with self._lock:
+            for serial in device_ids:
+                cached = self._decisions.get(serial)
+                if cached and cached[0] >= cutoff:
+                    found[serial] = cached[1]
+        missing = {db_id: serial for serial, db_id in device_ids.items() if serial not in found and db_id}
+        if missing:
+            found.update(self._load_commands(missing, cutoff))
+        return found
+
+    def _load_commands(self, missing, cutoff):
+        """单次查询：每台设备最近一条（计划执行时间在cutoff之后的）控制命令参数"""
+        db = SessionLocal()
+        try:
+            latest = db.query(func.max(ControlCommand.id)).filter(
+                ControlCommand.device_id.in_(list(missing.keys())),
+                ControlCommand.scheduled_at >= cutoff
+            ).group_by(ControlCommand.device_id)
+            rows = db.query(ControlCommand.device_id, ControlCommand.command_params).filter(
+                ControlCommand.id.in_(latest)
+            ).all()
+        except Exception as e:
+            log.warning(f"读取热启动控制命令失败，相关设备冷启动：{str(e)}")
+            return {}
+        finally:
+            db.close()
+        found = {}
+        for db_id, params in rows:
+            # 旧数据的command_params为json.dumps字符串；单条不合法只让该设备冷启动
+            params = decode_legacy_json(params)
+            if not isinstance(params, dict) or not params.get("dc") or not params.get("speed"):
+                continue
+            try:
+                found[missing[db_id]] = _warm_decision(params)
+            except (TypeError, ValueError) as e:
+                log.warning(f"设备（数据库ID={db_id}）控制命令参数不可用于热启动，该设备冷启动：{str(e)}")
+        return found
+
+    def remember(self, serial_decisions):
+        """serial_decisions: {serial_number: 决策}，周期求解完成后调用，同时清理过期决策"""
+        now = datetime.now(AUS_TZ)
+        cutoff = now - timedelta(seconds=self.max_age)
+        with self._lock:
+            for serial, decision in serial_decisions.items():
+                self._decisions[serial] = (now, _warm_decision(decision))
+            for serial in [s for s, (ts, _) in self._decisions.items() if ts < cutoff]:
+                del self._decisions[serial]
+
+    def record(self, summary, device_count):
+        """
+        记录本周期迭代次数：无热启动的周期更新冷启动基线（每设备迭代次数的滑动平均）
+        有热启动时按基线估算节省的迭代次数，写入summary的iterationsSaved（无基线时为None）
+        """
+        iterations = summary.get("iteration", 0)
+        if not device_count:
+            return
+        if not summary.get("warmStartKept"):
+            rate = iterations / device_count
+            if self.cold_iterations_per_device is None:
+                self.cold_iterations_per_device = rate
+            else:
+                self.cold_iterations_per_device += EWMA_ALPHA * (rate - self.cold_iterations_per_device)
+            summary["iterationsSaved"] = 0
+            return
+        if self.cold_iterations_per_device is None:
+            summary["iterationsSaved"] = None
+            return
+        expected = self.cold_iterations_per_device * device_count
+        summary["iterationsSaved"] = max(0, round(expected - iterations))
+
+
+def _warm_decision(decision):
+    return {
+        "dc": list(decision.get("dc", [])),
+        "speed": list(decision.get("speed", [])),
+        "cost": list(decision.get("cost", []))
+    }
+
+
+WARM_STARTS = WarmStartCache(config.SOLVER_WARM_START_MAX_AGE)
@@ -0,0 +1,15 @@
+"""
+数据库迁移：create_all只负责建新表，已有表的新增列/索引由此处迁移补齐
+每个迁移模块提供REVISION、DESCRIPTION和upgrade(conn)，upgrade需可重复执行（新库已由create_all建好时直接跳过）
+新增迁移时追加到MIGRATIONS末尾
+"""
+from app.migrations import (
+    m001_cycle_result, m002_strategy_cycle_time, m003_hot_query_indexes, m004_token_digest
+)
+
+MIGRATIONS = [
+    m001_cycle_result,
+    m002_strategy_cycle_time,
+    m003_hot_query_indexes,
+    m004_token_digest,
+]
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from app.utils.migrate import has_column
+
+REVISION = "001"
+DESCRIPTION = "博弈策略关联周期全局结果（ystc_game_strategy.cycle_result_id）"
+
+
+def upgrade(conn):
+    # ystc_cycle_result表由create_all创建，这里只给已有的策略表补列
+    if has_column(conn, "ystc_game_strategy", "cycle_result_id"):
+        return
+    conn.execute(text(
+        "ALTER TABLE ystc_game_strategy "
+        "ADD COLUMN cycle_result_id INT NULL COMMENT '关联周期全局结果', "
+        "ADD CONSTRAINT fk_game_strategy_cycle_result "
+        "FOREIGN KEY (cycle_result_id) REFERENCES ystc_cycle_result (id)"
+    ))
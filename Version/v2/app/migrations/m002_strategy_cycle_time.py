@@ -0,0 +1,30 @@
+from sqlalchemy import text
+from app.utils.migrate import has_column, has_index
+
+REVISION = "002"
+DESCRIPTION = "博弈策略新增cycle_time列及(user_id, cycle_time)索引，回填历史数据"
+
+
+def upgrade(conn):
+    if not has_column(conn, "ystc_game_strategy", "cycle_time"):
+        conn.execute(text(
+            "ALTER TABLE ystc_game_strategy "
+            "ADD COLUMN cycle_time DATETIME NULL "
+            "COMMENT '周期标识（周期开始时间，精确到秒，AUS_TZ本地时间）' AFTER cycle_result_id"
+        ))
+
+    # 回填：策略名格式为"周期{cycle_time[:19]}_用户{username}_博弈策略"，从中解析周期时间
+    conn.execute(text(
+        "UPDATE ystc_game_strategy "
+        "SET cycle_time = STR_TO_DATE(SUBSTRING(strategy_name, 3, 19), '%Y-%m-%dT%H:%i:%s') "
+        "WHERE cycle_time IS NULL AND strategy_name LIKE '周期____-__-__T__:__:__%'"
+    ))
+    # 策略名不符合格式的旧数据使用策略开始时间
+    conn.execute(text(
+        "UPDATE ystc_game_strategy SET cycle_time = start_time WHERE cycle_time IS NULL"
+    ))
+
+    if not has_index(conn, "ystc_game_strategy", "ix_game_strategy_user_cycle"):
+        conn.execute(text(
+            "CREATE INDEX ix_game_strategy_user_cycle ON ystc_game_strategy (user_id, cycle_time)"
+        ))
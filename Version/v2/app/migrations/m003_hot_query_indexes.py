@@ -0,0 +1,21 @@
+from sqlalchemy import text
+from app.utils.migrate import has_index
+
+REVISION = "003"
+DESCRIPTION = "策略详情/控制命令热点查询复合索引"
+
+# (表名, 索引名, 列) —— 与models中__table_args__声明一致
+# 鉴权Token的索引由迁移004按摘要列直接建立；ystc_device.user_id使用外键自带的索引，不另建
+INDEXES = [
+    ("ystc_strategy_detail", "ix_strategy_detail_strategy_slice",
+     ["strategy_id", "time_slice_index", "time_point", "action_type", "power_setpoint", "expected_benefit"]),
+    ("ystc_control_command", "ix_control_command_strategy_device", ["strategy_id", "device_id"]),
+    ("ystc_control_command", "ix_control_command_status_scheduled", ["status", "scheduled_at"]),
+]
+
+
+def upgrade(conn):
+    for table, index_name, columns in INDEXES:
+        if has_index(conn, table, index_name):
+            continue
+        conn.execute(text(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})"))
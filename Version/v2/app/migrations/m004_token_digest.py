@@ -0,0 +1,36 @@
+from sqlalchemy import text
+from app.utils.migrate import has_column, has_index
+
+REVISION = "004"
+DESCRIPTION = "Token改为保存SHA-256摘要：token_hash/refresh_token_hash改为CHAR(64)，token_hash唯一索引"
+
+
+def upgrade(conn):
+    # 旧数据token_hash保存的是Token原文（JWT长度远大于64），转为SHA-256摘要
+    conn.execute(text(
+        "UPDATE ystc_user_auth_token "
+        "SET token_hash = SHA2(token_hash, 256) WHERE CHAR_LENGTH(token_hash) > 64"
+    ))
+    conn.execute(text(
+        "UPDATE ystc_user_auth_token "
+        "SET refresh_token_hash = SHA2(refresh_token_hash, 256) WHERE CHAR_LENGTH(refresh_token_hash) > 64"
+    ))
+    # 旧Token不含jti，同一用户多次登录的Token相同；相同摘要只保留最新一行（旧行此前登录时已失效）
+    conn.execute(text(
+        "DELETE t FROM ystc_user_auth_token t "
+        "JOIN (SELECT token_hash, MAX(id) AS id FROM ystc_user_auth_token "
+        "GROUP BY token_hash HAVING COUNT(*) > 1) latest "
+        "ON t.token_hash = latest.token_hash AND t.id < latest.id"
+    ))
+    if has_column(conn, "ystc_user_auth_token", "token_digest"):
+        conn.execute(text("ALTER TABLE ystc_user_auth_token DROP COLUMN token_digest"))
+    conn.execute(text(
+        "ALTER TABLE ystc_user_auth_token "
+        "MODIFY COLUMN token_hash CHAR(64) NOT NULL COMMENT 'token摘要（SHA-256十六进制，唯一，鉴权点查）', "
+        "MODIFY COLUMN refresh_token_hash CHAR(64) NOT NULL COMMENT '刷新token摘要（SHA-256十六进制）'"
+    ))
+
+    if not has_index(conn, "ystc_user_auth_token", "ix_auth_token_user_valid"):
+        conn.execute(text("CREATE INDEX ix_auth_token_user_valid ON ystc_user_auth_token (user_id, is_valid)"))
+    if not has_index(conn, "ystc_user_auth_token", "ux_auth_token_hash"):
+        conn.execute(text("CREATE UNIQUE INDEX ux_auth_token_hash ON ystc_user_auth_token (token_hash)"))
@@ -1,11 +1,12 @@
 from app.models.user import YstcUser
 from app.models.device import Device
-from app.models.strategy import GameStrategy, StrategyDetail, ControlCommand
+from app.models.strategy import CycleResult, GameStrategy, StrategyDetail, ControlCommand
 from app.models.token import UserAuthToken
 
 __all__ = [
     "YstcUser",
     "Device",
+    "CycleResult",
     "GameStrategy",
     "StrategyDetail",
     "ControlCommand",
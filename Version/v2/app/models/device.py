@@ -30,4 +30,4 @@ class Device(Base):
     create_by = Column(String(50), nullable=False, comment="创建人")  
     create_time = Column(DateTime, default=lambda: datetime.now(AUS_TZ), nullable=False, comment="注册时间")
     update_by = Column(String(50), nullable=True, comment="更新人")  
-    update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), nullable=True, comment="更新时间")
\ No newline at end of file
+    update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), nullable=True, comment="更新时间")
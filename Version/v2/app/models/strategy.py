@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Float, Boolean
+import json
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Float, Boolean, Index
 from app.utils.db import Base
 from datetime import datetime
 import pytz
@@ -6,11 +7,42 @@ from app.config import config
 
 AUS_TZ = pytz.timezone(config.TZ)
 
+
+def decode_legacy_json(value):
+    """旧数据的JSON列（strategy_params/strategy_json/command_params）当时以json.dumps字符串写入，读出为str，解码为对象；无法解码时原样返回"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+class CycleResult(Base):
+    __tablename__ = "ystc_cycle_result"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    start_time = Column(DateTime, nullable=False, comment="周期开始时间")
+    end_time = Column(DateTime, nullable=False, comment="周期结束时间")
+    time_slices = Column(Integer, default=config.TIME_SLOTS, comment="时间片数量")
+    time_slice_interval = Column(Float, nullable=False, comment="时间片间隔（秒）")
+    device_count = Column(Integer, default=0, comment="参与博弈设备数")
+    user_count = Column(Integer, default=0, comment="参与博弈用户数")
+    iteration = Column(Integer, default=0, comment="博弈迭代次数")
+    time_consumption = Column(Float, nullable=True, comment="求解耗时")
+    total_benefit = Column(Float, nullable=True, comment="全局总收益")
+    total_cost = Column(Float, nullable=True, comment="全局总成本")
+    revenue = Column(Float, nullable=True, comment="全局营收")
+    result_json = Column(JSON, nullable=True, comment="求解器全局结果字段（不含决策列表）")
+    create_time = Column(DateTime, default=lambda: datetime.now(AUS_TZ), comment="创建时间")
+
 class GameStrategy(Base):
     __tablename__ = "ystc_game_strategy"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("ystc_user.id"), nullable=False, comment="所属用户ID")
+    cycle_result_id = Column(Integer, ForeignKey("ystc_cycle_result.id"), nullable=True, comment="关联周期全局结果")
+    cycle_time = Column(DateTime, nullable=True, comment="周期标识（周期开始时间，精确到秒，AUS_TZ本地时间）")
     strategy_name = Column(String(100), default="cycle_strategy", comment="策略名称")
     strategy_type = Column(String(30), default="game_theory", comment="策略类型")
     algorithm_version = Column(String(20), default="1.0", comment="算法版本")
@@ -19,7 +51,7 @@ class GameStrategy(Base):
     time_slices = Column(Integer, default=config.TIME_SLOTS, comment="时间片数量")
     time_slice_interval = Column(Float, nullable=False, comment="时间片间隔（秒）")  
     strategy_params = Column(JSON, nullable=True, comment="策略参数")  
-    strategy_json = Column(JSON, nullable=False, comment="完整策略JSON")
+    strategy_json = Column(JSON, nullable=False, comment="该用户的决策切片（全局字段见ystc_cycle_result）")
     external_conditions = Column(String(200), nullable=True, comment="外部条件")  
     is_active = Column(Boolean, default=True, comment="是否激活")  
     status = Column(String(20), default="completed", comment="策略状态")
@@ -28,6 +60,17 @@ class GameStrategy(Base):
     update_by = Column(String(50), nullable=True, comment="更新人")  
     update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), comment="更新时间")  
 
+    @staticmethod
+    def legacy_total_benefit(params):
+        """旧数据（无cycle_result_id）的全局收益：strategy_params当时以JSON字符串写入，需先解码"""
+        params = decode_legacy_json(params)
+        return params.get("total_benefit") if isinstance(params, dict) else None
+
+    __table_args__ = (
+        # 策略查询按用户+周期精确定位
+        Index("ix_game_strategy_user_cycle", "user_id", "cycle_time"),
+    )
+
 class StrategyDetail(Base):
     __tablename__ = "ystc_strategy_detail"
 
@@ -44,6 +87,12 @@ class StrategyDetail(Base):
     update_by = Column(String(50), nullable=True, comment="更新人")  
     update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), comment="更新时间")  
 
+    __table_args__ = (
+        # 策略查询按strategy_id取详情并按时间片排序，包含返回字段，查询无需回表
+        Index("ix_strategy_detail_strategy_slice", "strategy_id", "time_slice_index",
+              "time_point", "action_type", "power_setpoint", "expected_benefit"),
+    )
+
 class ControlCommand(Base):
     __tablename__ = "ystc_control_command"
 
@@ -65,4 +114,11 @@ class ControlCommand(Base):
     create_by = Column(String(50), nullable=False, comment="创建人")  
     create_time = Column(DateTime, default=lambda: datetime.now(AUS_TZ), comment="创建时间")
     update_by = Column(String(50), nullable=True, comment="更新人")  
-    update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), comment="更新时间")
\ No newline at end of file
+    update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), comment="更新时间")
+
+    __table_args__ = (
+        # 策略查询按策略+设备取命令
+        Index("ix_control_command_strategy_device", "strategy_id", "device_id"),
+        # 命令下发按状态扫描到期命令
+        Index("ix_control_command_status_scheduled", "status", "scheduled_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, CHAR, ForeignKey, DateTime, Boolean, Index
 from app.utils.db import Base
 from datetime import datetime, timedelta
 import pytz
@@ -11,8 +11,8 @@ class UserAuthToken(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("ystc_user.id"), nullable=False, comment="关联用户ID")
-    token_hash = Column(String(256), nullable=False, comment="token哈希")
-    refresh_token_hash = Column(String(256), nullable=False, comment="刷新token哈希")
+    token_hash = Column(CHAR(64), nullable=False, comment="token摘要（SHA-256十六进制，唯一，鉴权点查）")
+    refresh_token_hash = Column(CHAR(64), nullable=False, comment="刷新token摘要（SHA-256十六进制）")
     expires_at = Column(DateTime, default=lambda: datetime.now(AUS_TZ) + timedelta(days=365 * 100), nullable=False,
                         comment="过期时间")
     refresh_expires_at = Column(DateTime, default=lambda: datetime.now(AUS_TZ) + timedelta(days=365 * 100),
@@ -23,4 +23,11 @@ class UserAuthToken(Base):
     create_by = Column(String(50), nullable=False, comment="创建人")
     create_time = Column(DateTime, default=lambda: datetime.now(AUS_TZ), comment="创建时间")
     update_by = Column(String(50), nullable=True, comment="更新人")
-    update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), comment="更新时间")
\ No newline at end of file
+    update_time = Column(DateTime, onupdate=lambda: datetime.now(AUS_TZ), comment="更新时间")
+
+    __table_args__ = (
+        # 鉴权按token摘要点查
+        Index("ux_auth_token_hash", "token_hash", unique=True),
+        # 登录时失效该用户的有效Token
+        Index("ix_auth_token_user_valid", "user_id", "is_valid"),
+    )
\ No newline at end of file
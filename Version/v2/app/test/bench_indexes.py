@@ -0,0 +1,280 @@
+"""
+索引基准测试：构造大量策略历史数据，对比各接口查询在"无新索引/旧查询方式"与"新索引/新查询方式"下的耗时
+用法：
+    python bench_indexes.py --seed --users 1000 --cycles 1000   # 造数：1000用户 x 1000周期 = 100万策略行
+    python bench_indexes.py --samples 200                       # 跑基准
+    python bench_indexes.py --clean                             # 清理bench_前缀的测试数据
+"""
+import sys
+import os
+import time
+import random
+import hashlib
+import argparse
+import statistics
+from datetime import datetime, timedelta
+import pytz
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到系统路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# 项目模块导入
+from config import config
+from app.models import YstcUser, Device, UserAuthToken, GameStrategy, StrategyDetail, ControlCommand
+
+AUS_TZ = pytz.timezone(config.TZ if hasattr(config, 'TZ') else 'Australia/Melbourne')
+BENCH_PREFIX = "bench_"
+BATCH_SIZE = 5000
+TIME_SLOTS = 3
+CYCLE_INTERVAL = 120
+
+# 每个接口在请求路径上执行的查询：before为未加索引/旧写法，after为新索引/新写法
+ENDPOINT_QUERIES = {
+    "login_required": [
+        (
+            "SELECT * FROM ystc_user_auth_token IGNORE INDEX (ux_auth_token_hash) "
+            "WHERE user_id = :user_id AND token_hash = :token_hash AND is_valid = 1 LIMIT 1",
+            "SELECT id FROM ystc_user_auth_token "
+            "WHERE token_hash = :token_hash AND user_id = :user_id AND is_valid = 1"
+        ),
+    ],
+    "get_strategy": [
+        (
+            "SELECT * FROM ystc_game_strategy IGNORE INDEX (ix_game_strategy_user_cycle) "
+            "WHERE user_id = :user_id AND strategy_name LIKE :cycle_like LIMIT 1",
+            "SELECT * FROM ystc_game_strategy "
+            "WHERE user_id = :user_id AND cycle_time = :cycle_time ORDER BY id DESC LIMIT 1"
+        ),
+        (
+            "SELECT * FROM ystc_strategy_detail IGNORE INDEX (ix_strategy_detail_strategy_slice) "
+            "WHERE strategy_id = :strategy_id ORDER BY time_slice_index",
+            "SELECT time_slice_index, time_point, action_type, power_setpoint, expected_benefit "
+            "FROM ystc_strategy_detail WHERE strategy_id = :strategy_id ORDER BY time_slice_index"
+        ),
+        (
+            "SELECT * FROM ystc_control_command IGNORE INDEX (ix_control_command_strategy_device) "
+            "WHERE strategy_id = :strategy_id AND device_id = :device_id LIMIT 1",
+            "SELECT command_params FROM ystc_control_command "
+            "WHERE strategy_id = :strategy_id AND device_id = :device_id LIMIT 1"
+        ),
+    ],
+    "command_dispatch": [
+        (
+            "SELECT id FROM ystc_control_command IGNORE INDEX (ix_control_command_status_scheduled) "
+            "WHERE status = 'pending' AND scheduled_at <= :now ORDER BY scheduled_at LIMIT 100",
+            "SELECT id FROM ystc_control_command "
+            "WHERE status = 'pending' AND scheduled_at <= :now ORDER BY scheduled_at LIMIT 100"
+        ),
+    ],
+}
+
+
+def get_engine():
+    return create_engine(config.SQLALCHEMY_DATABASE_URI, pool_size=2, max_overflow=0, pool_recycle=300)
+
+
+def bulk_insert(conn, table, rows):
+    for i in range(0, len(rows), BATCH_SIZE):
+        conn.execute(table.insert(), rows[i:i + BATCH_SIZE])
+
+
+def seed_data(engine, user_count, cycle_count):
+    """造数：每用户1台设备、1个有效Token，每周期1条策略 + TIME_SLOTS条详情 + 1条命令"""
+    now = datetime.now(AUS_TZ).replace(tzinfo=None, microsecond=0)
+    base_cycle = now - timedelta(seconds=CYCLE_INTERVAL * cycle_count)
+    start = time.time()
+
+    with engine.begin() as conn:
+        bulk_insert(conn, YstcUser.__table__, [{
+            "username": f"{BENCH_PREFIX}{i:06d}",
+            "password_hash": "bench",
+            "name": f"{BENCH_PREFIX}{i:06d}",
+            "create_by": "bench",
+            "create_time": now,
+            "is_active": True
+        } for i in range(user_count)])
+        user_ids = [row[0] for row in conn.execute(
+            text("SELECT id FROM ystc_user WHERE username LIKE :p ORDER BY id"), {"p": f"{BENCH_PREFIX}%"}
+        )]
+        bulk_insert(conn, Device.__table__, [{
+            "serial_number": f"{BENCH_PREFIX}SN{user_id}",
+            "type": "battery",
+            "user_id": user_id,
+            "status": "offline",
+            "create_by": "bench",
+            "create_time": now,
+            "is_active": True
+        } for user_id in user_ids])
+        bulk_insert(conn, UserAuthToken.__table__, [{
+            "user_id": user_id,
+            "token_hash": hashlib.sha256(f"{BENCH_PREFIX}token_{user_id}".encode("utf-8")).hexdigest(),
+            "refresh_token_hash": hashlib.sha256(f"{BENCH_PREFIX}refresh_{user_id}".encode("utf-8")).hexdigest(),
+            "expires_at": now + timedelta(days=365),
+            "refresh_expires_at": now + timedelta(days=365),
+            "is_valid": True,
+            "create_by": "bench",
+            "create_time": now
+        } for user_id in user_ids])
+        device_ids = dict(conn.execute(
+            text("SELECT user_id, id FROM ystc_device WHERE serial_number LIKE :p"), {"p": f"{BENCH_PREFIX}%"}
+        ).fetchall())
+    print(f"✅ 用户/设备/Token造数完成：{len(user_ids)}个用户")
+
+    # 按周期分批写入，避免单个事务过大
+    for cycle_idx in range(cycle_count):
+        cycle_start = base_cycle + timedelta(seconds=CYCLE_INTERVAL * cycle_idx)
+        cycle_name = cycle_start.isoformat()[:19]
+        with engine.begin() as conn:
+            last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM ystc_game_strategy")).scalar()
+            bulk_insert(conn, GameStrategy.__table__, [{
+                "user_id": user_id,
+                "cycle_time": cycle_start,
+                "strategy_name": f"周期{cycle_name}_用户{BENCH_PREFIX}{user_id}_博弈策略",
+                "strategy_type": "博弈优化策略",
+                "start_time": cycle_start,
+                "end_time": cycle_start + timedelta(seconds=CYCLE_INTERVAL),
+                "time_slices": TIME_SLOTS,
+                "time_slice_interval": CYCLE_INTERVAL / TIME_SLOTS,
+                "strategy_json": {"decisions": []},
+                "status": "已生成",
+                "create_by": "bench",
+                "create_time": now
+            } for user_id in user_ids])
+            strategy_ids = conn.execute(
+                text("SELECT id, user_id FROM ystc_game_strategy WHERE id > :last_id AND create_by = 'bench'"),
+                {"last_id": last_id}
+            ).fetchall()
+            detail_rows = []
+            command_rows = []
+            for strategy_id, user_id in strategy_ids:
+                for slot in range(TIME_SLOTS):
+                    detail_rows.append({
+                        "strategy_id": strategy_id,
+                        "time_slice_index": slot,
+                        "time_point": cycle_start + timedelta(seconds=slot * CYCLE_INTERVAL / TIME_SLOTS),
+                        "action_type": random.choice(["charge", "discharge", "idle"]),
+                        "power_setpoint": random.uniform(0, 5),
+                        "expected_benefit": random.uniform(0, 1),
+                        "create_by": "bench",
+                        "create_time": now
+                    })
+                command_rows.append({
+                    "device_id": device_ids[user_id],
+                    "strategy_id": strategy_id,
+                    "command_type": "idle_exec",
+                    "command_params": {"dc": [0] * TIME_SLOTS},
+                    "scheduled_at": cycle_start,
+                    "expire_at": cycle_start + timedelta(seconds=CYCLE_INTERVAL),
+                    "status": random.choice(["pending", "executed", "executed", "executed"]),
+                    "create_by": "bench",
+                    "create_time": now
+                })
+            bulk_insert(conn, StrategyDetail.__table__, detail_rows)
+            bulk_insert(conn, ControlCommand.__table__, command_rows)
+        if (cycle_idx + 1) % 50 == 0:
+            print(f"📥 已写入{cycle_idx + 1}/{cycle_count}个周期，耗时{time.time() - start:.1f}秒")
+
+    with engine.begin() as conn:
+        for table in ["ystc_user_auth_token", "ystc_device", "ystc_game_strategy",
+                      "ystc_strategy_detail", "ystc_control_command"]:
+            conn.execute(text(f"ANALYZE TABLE {table}"))
+    print(f"✅ 造数完成：{len(user_ids) * cycle_count}条策略，耗时{time.time() - start:.1f}秒")
+
+
+def clean_data(engine):
+    """清理bench_前缀的测试数据（按外键顺序）"""
+    with engine.begin() as conn:
+        user_filter = "SELECT id FROM ystc_user WHERE username LIKE 'bench_%'"
+        conn.execute(text(
+            f"DELETE c FROM ystc_control_command c JOIN ystc_game_strategy s ON c.strategy_id = s.id "
+            f"WHERE s.user_id IN ({user_filter})"
+        ))
+        conn.execute(text(
+            f"DELETE d FROM ystc_strategy_detail d JOIN ystc_game_strategy s ON d.strategy_id = s.id "
+            f"WHERE s.user_id IN ({user_filter})"
+        ))
+        for table in ["ystc_game_strategy", "ystc_user_auth_token", "ystc_device"]:
+            conn.execute(text(f"DELETE FROM {table} WHERE user_id IN ({user_filter})"))
+        conn.execute(text("DELETE FROM ystc_user WHERE username LIKE 'bench_%'"))
+    print("🗑️  bench_测试数据已清理")
+
+
+def load_samples(conn, sample_count):
+    """随机抽取样本：用户、Token、设备及该用户的某个历史周期策略"""
+    users = conn.execute(text(
+        "SELECT u.id, t.token_hash, d.id FROM ystc_user u "
+        "JOIN ystc_user_auth_token t ON t.user_id = u.id AND t.is_valid = 1 "
+        "JOIN ystc_device d ON d.user_id = u.id "
+        "WHERE u.username LIKE 'bench_%'"
+    )).fetchall()
+    if not users:
+        return []
+    samples = []
+    for user_id, token_hash, device_id in random.sample(users, min(sample_count, len(users))):
+        strategy_id, cycle_time = conn.execute(text(
+            "SELECT id, cycle_time FROM ystc_game_strategy WHERE user_id = :u ORDER BY RAND() LIMIT 1"
+        ), {"u": user_id}).fetchone()
+        samples.append({
+            "user_id": user_id,
+            "token_hash": token_hash,
+            "device_id": device_id,
+            "strategy_id": strategy_id,
+            "cycle_time": cycle_time,
+            "cycle_like": f"%{cycle_time.isoformat()[:19]}%",
+            "now": datetime.now(AUS_TZ).replace(tzinfo=None)
+        })
+    return samples
+
+
+def run_endpoint(conn, queries, samples, variant):
+    """逐个样本执行接口的全部查询，返回每次请求的总耗时（毫秒）"""
+    latencies = []
+    for params in samples:
+        start = time.perf_counter()
+        for query_pair in queries:
+            conn.execute(text(query_pair[variant]), params).fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_benchmark(engine, sample_count):
+    with engine.connect() as conn:
+        strategy_rows = conn.execute(text("SELECT COUNT(*) FROM ystc_game_strategy")).scalar()
+        samples = load_samples(conn, sample_count)
+        if not samples:
+            print("❌ 无bench_测试数据，请先执行 --seed")
+            return
+        print(f"📊 策略行数：{strategy_rows} | 样本数：{len(samples)}")
+        print(f"{'接口':<20}{'before p50':>12}{'before p95':>12}{'after p50':>12}{'after p95':>12}{'提升':>10}")
+        for endpoint, queries in ENDPOINT_QUERIES.items():
+            before = run_endpoint(conn, queries, samples, 0)
+            after = run_endpoint(conn, queries, samples, 1)
+            speedup = statistics.median(before) / max(statistics.median(after), 1e-6)
+            print(
+                f"{endpoint:<20}{statistics.median(before):>10.2f}ms{percentile(before, 0.95):>10.2f}ms"
+                f"{statistics.median(after):>10.2f}ms{percentile(after, 0.95):>10.2f}ms{speedup:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ystc_*索引基准测试")
+    parser.add_argument("--seed", action="store_true", help="写入测试数据")
+    parser.add_argument("--clean", action="store_true", help="清理测试数据")
+    parser.add_argument("--users", type=int, default=1000, help="测试用户数")
+    parser.add_argument("--cycles", type=int, default=1000, help="每用户历史周期数")
+    parser.add_argument("--samples", type=int, default=200, help="每个接口的采样请求数")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.clean:
+        clean_data(engine)
+    elif args.seed:
+        seed_data(engine, args.users, args.cycles)
+    else:
+        run_benchmark(engine, args.samples)
@@ -0,0 +1,94 @@
+"""
+上传压测：对比Flask多线程服务（main.py，默认8080）与ASGI服务（asgi_main.py，默认8081）的持续上传吞吐
+每个Locust用户对应一台设备：on_start注册+登录，之后持续上传设备数据，偶尔查询当前周期
+压测时建议服务端设置UPLOAD_WINDOW=CYCLE_INTERVAL，使上传窗口常开，避免窗口关闭的403干扰吞吐统计
+
+用法（无界面模式，结果看Aggregated行的req/s）：
+    locust -f locust_upload.py --headless -u 2000 -r 200 -t 60s --host http://127.0.0.1:8080
+    locust -f locust_upload.py --headless -u 2000 -r 200 -t 60s --host http://127.0.0.1:8081
+"""
+import random
+import uuid
+from locust import HttpUser, task, between
+
+PASSWORD = "Test@123456"
+REQUEST_INTERVAL = (0.5, 1.0)  # 每台设备的上传间隔（秒）
+
+
+def generate_device_data(device_id):
+    """生成单台设备的完整参数（与batch_test.py一致）"""
+    charge_speed = [round(random.uniform(0.05, 1.4), 2) for _ in range(10)]
+    charge_cost = [round(random.uniform(0.005, 0.17), 3) for _ in range(10)]
+    device_data = {
+        "id": device_id,
+        "overallCapacity": round(random.uniform(0.4, 2.0), 1),
+        "currentStorage": [round(random.uniform(0.08, 1.3), 2) for _ in range(3)],
+        "demands": [round(random.uniform(0.08, 0.55), 2) for _ in range(3)],
+        "chargeSpeed": charge_speed,
+        "chargeCost": charge_cost,
+        "dischargeSpeed": [round(s + random.uniform(-0.05, 0.05), 2) for s in charge_speed],
+        "dischargeCost": [round(c + random.uniform(-0.005, 0.005), 3) for c in charge_cost]
+    }
+    if device_id % 2 == 1:
+        device_data["produce"] = [round(random.uniform(0.05, 0.2), 2) for _ in range(3)]
+    return device_data
+
+
+class UploadDeviceUser(HttpUser):
+    wait_time = between(*REQUEST_INTERVAL)
+
+    def on_start(self):
+        """注册压测账号（load_前缀）并登录获取Token"""
+        suffix = uuid.uuid4().hex[:12]
+        self.username = f"load_{suffix}"
+        self.device_id = random.randint(0, 10 ** 6)
+        self.token = None
+
+        self.client.post("/api/device/register", json={
+            "username": self.username,
+            "password": PASSWORD,
+            "serial_number": f"LOAD{suffix}",
+            "device_name": self.username,
+            "device_type": "battery"
+        }, name="注册")
+        res = self.client.post("/api/device/login", json={
+            "username": self.username,
+            "password": PASSWORD
+        }, name="登录")
+        if res.status_code == 200:
+            self.token = res.json().get("access_token")
+
+    @task(10)
+    def upload(self):
+        if not self.token:
+            return
+        with self.client.post(
+                "/api/device/upload",
+                json={"device_data": generate_device_data(self.device_id)},
+                headers={"Authorization": f"Bearer {self.token}"},
+                name="数据上传",
+                catch_response=True
+        ) as res:
+            # 上传窗口关闭属于业务拒绝，单独标记便于区分服务端异常
+            if res.status_code == 403:
+                res.failure("上传窗口已关闭")
+            elif res.status_code != 200:
+                res.failure(f"HTTP {res.status_code}")
+
+    @task(1)
+    def current_cycle(self):
+        if not self.token:
+            return
+        self.client.get(
+            "/api/device/current_cycle",
+            headers={"Authorization": f"Bearer {self.token}"},
+            name="当前周期"
+        )
+
+
+# 启动入口
+if __name__ == "__main__":
+    import os
+
+    # 直接运行脚本时，自动调用Locust命令
+    os.system(f"locust -f {__file__} --web-port 8089")
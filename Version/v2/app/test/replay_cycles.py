@@ -0,0 +1,192 @@
+"""
+求解重放：离线重跑归档的周期求解输入（SOLVER_ARCHIVE_DIR），报告耗时、迭代次数与收益，作为可复现的性能回归语料
+归档头信息固定了seed与prices，同一JAR重放的迭代次数与收益应与归档汇总一致（时间预算截止、增量接入的周期除外）
+用法：
+    python replay_cycles.py data/solver_archive                      # 重放目录下全部归档周期
+    python replay_cycles.py cycle_20260101T120000.ndjson --repeat 5  # 单个周期重复5次取耗时中位数
+    python replay_cycles.py data/solver_archive --no-budget          # 去掉时间预算，跑到收敛（排除机器负载对迭代次数的影响）
+    python replay_cycles.py data/solver_archive --save base.json     # 保存本次结果作为基准
+    python replay_cycles.py data/solver_archive --compare base.json  # 与基准对比耗时
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BENEFIT_TOLERANCE = 1e-6
+
+
+def iter_archives(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.startswith("cycle_") and name.endswith(".ndjson"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def load_archive(path):
+    """归档文件 → (头信息, 设备行列表, 归档汇总)"""
+    header, devices, summary = None, [], None
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("type") == "header":
+                header = record
+            elif record.get("type") == "summary":
+                summary = record
+            else:
+                devices.append(line.rstrip(b"\n"))
+    if header is None:
+        raise ValueError(f"{path}缺少头信息")
+    return header, devices, summary or {}
+
+
+def run_once(jar, header, devices, timeout):
+    """以file方式单次调用JAR（与SOLVER_INPUT_MODE=file一致），返回(墙钟耗时毫秒, 汇总)"""
+    fd, input_path = tempfile.mkstemp(suffix=".ndjson")
+    os.close(fd)
+    fd, output_path = tempfile.mkstemp(suffix=".result.ndjson")
+    os.close(fd)
+    try:
+        with open(input_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8"))
+            f.write(b"\n")
+            for line in devices:
+                f.write(line)
+                f.write(b"\n")
+        start = time.perf_counter()
+        proc = subprocess.run(
+            ["java", "-jar", jar, f"--input={input_path}", f"--output={output_path}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"JAR执行失败：{proc.stderr.decode('utf-8', errors='replace')}")
+        summary = None
+        with open(output_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if record.get("type") == "summary":
+                        summary = record
+        if summary is None:
+            raise RuntimeError("结果文件缺少汇总记录")
+        return wall_ms, summary
+    finally:
+        for path in (input_path, output_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def replay(path, args):
+    header, devices, archived = load_archive(path)
+    header = dict(header)
+    params = dict(header.get("params") or {})
+    if args.no_budget:
+        params["timeBudgetMs"] = 0
+    # 重放不需要决策快照
+    params["snapshotMs"] = 0
+    header["params"] = params
+    if args.seed is not None:
+        header["seed"] = args.seed
+
+    walls, summary = [], None
+    for _ in range(args.repeat):
+        wall_ms, summary = run_once(args.jar, header, devices, args.timeout)
+        walls.append(wall_ms)
+
+    # 指定seed/prices且未截止时结果应可复现
+    reproducible = header.get("seed") is not None and bool(header.get("prices"))
+    matched = None
+    if archived and reproducible and args.seed is None and not archived.get("deadlineReached") \
+            and not summary.get("deadlineReached") and header.get("shards", 1) == 1:
+        matched = summary.get("iteration") == archived.get("iteration") \
+            and abs(summary.get("benefit", 0) - archived.get("benefit", 0)) <= BENEFIT_TOLERANCE
+    return {
+        "cycle": os.path.basename(path),
+        "devices": len(devices),
+        "wallMs": round(statistics.median(walls), 1),
+        "solveMillis": summary.get("solveMillis", 0),
+        "iteration": summary.get("iteration", 0),
+        "rounds": summary.get("rounds", 0),
+        "benefit": summary.get("benefit", 0.0),
+        "deadlineReached": summary.get("deadlineReached", False),
+        "archivedIteration": archived.get("iteration"),
+        "archivedBenefit": archived.get("benefit"),
+        "matched": matched
+    }
+
+
+def print_report(results, baseline):
+    print(f"{'周期':<34}{'设备':>6}{'墙钟ms':>10}{'求解ms':>10}{'迭代':>8}{'轮数':>8}{'收益':>14}{'归档迭代':>10}{'一致':>6}"
+          + (f"{'基准ms':>10}{'变化':>9}" if baseline else ""))
+    for r in results:
+        matched = {True: "是", False: "否", None: "-"}[r["matched"]]
+        line = (f"{r['cycle']:<34}{r['devices']:>6}{r['wallMs']:>10.1f}{r['solveMillis']:>10}{r['iteration']:>8}"
+                f"{r['rounds']:>8}{r['benefit']:>14.4f}{str(r['archivedIteration']):>10}{matched:>6}")
+        if baseline:
+            base = baseline.get(r["cycle"])
+            if base:
+                line += f"{base['wallMs']:>10.1f}{(r['wallMs'] / base['wallMs'] - 1) * 100 if base['wallMs'] else 0:>+8.1f}%"
+            else:
+                line += f"{'-':>10}{'-':>9}"
+        print(line)
+    if results:
+        total = sum(r["wallMs"] for r in results)
+        mismatched = [r["cycle"] for r in results if r["matched"] is False]
+        print(f"\n共{len(results)}个周期，墙钟合计{total:.1f}ms，迭代合计{sum(r['iteration'] for r in results)}次")
+        if baseline:
+            base_total = sum(baseline[r["cycle"]]["wallMs"] for r in results if r["cycle"] in baseline)
+            if base_total:
+                print(f"基准墙钟合计{base_total:.1f}ms")
+        if mismatched:
+            print(f"与归档结果不一致的周期：{', '.join(mismatched)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线重放归档的周期求解输入")
+    parser.add_argument("paths", nargs="+", help="归档文件或目录（SOLVER_ARCHIVE_DIR）")
+    parser.add_argument("--jar", default=os.getenv("SOLVER_JAR_PATH", "game-model-1.0.jar"), help="求解JAR路径")
+    parser.add_argument("--repeat", type=int, default=1, help="每个周期重复次数，耗时取中位数")
+    parser.add_argument("--timeout", type=float, default=300, help="单次求解超时（秒）")
+    parser.add_argument("--no-budget", action="store_true", help="去掉时间预算（params.timeBudgetMs=0）")
+    parser.add_argument("--seed", type=int, default=None, help="以指定seed代替归档seed（不再与归档结果比对）")
+    parser.add_argument("--save", help="结果保存为JSON（作为后续--compare的基准）")
+    parser.add_argument("--compare", help="与--save保存的基准结果对比耗时")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.jar):
+        print(f"JAR文件不存在：{args.jar}")
+        sys.exit(1)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {r["cycle"]: r for r in json.load(f)}
+
+    results = []
+    for path in iter_archives(args.paths):
+        try:
+            results.append(replay(path, args))
+        except Exception as e:
+            print(f"重放失败：{path}，{str(e)}")
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if any(r["matched"] is False for r in results):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
-from app.utils.auth import login_required, page_login_required
+from app.utils.auth import login_required, page_login_required, token_digest
 from app.utils.cycle import (
-    STATE, DEVICE_DATA, DEVICE_STRATEGIES, CYCLE_STATUS, STORAGE_LOCK,
-    get_current_cycle, is_upload_window_open, clean_expired_data, clean_cycle_data
+    STATE, get_current_cycle, cycle_key, is_upload_window_open, clean_expired_data, clean_cycle_data
 )
+from app.utils.cycle_store import CYCLE_STORE
 from app.utils.db import init_db, get_db, SessionLocal
+from app.utils.token_cache import TOKEN_CACHE
+from app.utils.presence import PRESENCE
 
 __all__ = [
     # 鉴权
-    "login_required", "page_login_required",
+    "login_required", "page_login_required", "token_digest",
     # 周期工具
-    "STATE", "DEVICE_DATA", "DEVICE_STRATEGIES", "CYCLE_STATUS", "STORAGE_LOCK",
-    "get_current_cycle", "is_upload_window_open", "clean_expired_data","clean_cycle_data",
+    "STATE", "CYCLE_STORE",
+    "get_current_cycle", "cycle_key", "is_upload_window_open", "clean_expired_data","clean_cycle_data",
     # 数据库工具
-    "init_db", "get_db", "SessionLocal"
+    "init_db", "get_db", "SessionLocal",
+    # 鉴权缓存 / 设备在线状态
+    "TOKEN_CACHE", "PRESENCE"
 ]
\ No newline at end of file
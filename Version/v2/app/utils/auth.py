@@ -1,20 +1,27 @@
 import logging
+import hashlib
 from functools import wraps
-from datetime import datetime
 import pytz
 import jwt
 from jwt.exceptions import InvalidTokenError
 from flask import request, jsonify, g, redirect, url_for
 from app.utils.db import SessionLocal
 from app.models import YstcUser, Device, UserAuthToken
+from app.utils.token_cache import TOKEN_CACHE, snapshot
+from app.utils.presence import PRESENCE
 from ..config import config
 
 log = logging.getLogger("pt.auth")
 AUS_TZ = pytz.timezone(config.TZ)
 
 
+def token_digest(token):
+    """Token摘要（SHA-256十六进制，64位定长），数据库中只保存摘要，不保存Token原文"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def login_required(f):
-    """API接口鉴权装饰器：验证Token有效性"""
+    """API接口鉴权装饰器：验证Token有效性（命中已校验Token缓存时不访问数据库）"""
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -24,6 +31,12 @@ def login_required(f):
             return jsonify({"code": 401, "msg": "未提供有效认证Token"}), 401
 
         token = token[7:]
+        cached = TOKEN_CACHE.get(token)
+        if cached is not None:
+            g.user, g.device = cached
+            PRESENCE.mark_online(g.device.id)
+            return f(*args, **kwargs)
+
         db = SessionLocal()
 
         try:
@@ -36,19 +49,15 @@ def login_required(f):
             )
 
             user_id = payload.get("user_id")
-            # 生成Token哈希
-            token_hash = jwt.encode(payload, config.JWT_SECRET_KEY, algorithm="HS256")
-            if isinstance(token_hash, bytes):
-                token_hash = token_hash.decode("utf-8")
 
-            # 验证Token是否有效（未失效、用户/设备存在）
-            auth_token = db.query(UserAuthToken).filter(
+            # 验证Token是否有效（未失效、用户/设备存在），按摘要唯一索引点查
+            auth_token_id = db.query(UserAuthToken.id).filter(
+                UserAuthToken.token_hash == token_digest(token),
                 UserAuthToken.user_id == user_id,
-                UserAuthToken.token_hash == token_hash,
                 UserAuthToken.is_valid == True
-            ).first()
+            ).scalar()
 
-            if not auth_token:
+            if not auth_token_id:
                 return jsonify({"code": 401, "msg": "Token无效或已注销"}), 401
 
             # 验证用户和设备存在
@@ -56,19 +65,17 @@ def login_required(f):
             device = db.query(Device).filter(Device.user_id == user_id).first()
 
             if not user or not device:
-                auth_token.is_valid = False
+                db.query(UserAuthToken).filter(UserAuthToken.id == auth_token_id).update(
+                    {"is_valid": False}, synchronize_session=False
+                )
                 db.commit()
                 return jsonify({"code": 401, "msg": "账号/设备已失效"}), 401
 
-            # 更新设备在线状态
-            device.status = "online"
-            device.last_online = datetime.now(AUS_TZ)
-            db.commit()
-
-            # 存入g对象
-            g.user = user
-            g.device = device
-            return f(*args, **kwargs)
+            # 存入g对象并缓存；在线状态只记录在内存中，由后台批量落库
+            g.user = snapshot(user)
+            g.device = snapshot(device)
+            TOKEN_CACHE.put(token, g.user, g.device)
+            PRESENCE.mark_online(device.id)
 
         except InvalidTokenError as e:
             return jsonify({"code": 401, "msg": f"Token解析失败：{str(e)}"}), 401
@@ -78,6 +85,8 @@ def login_required(f):
         finally:
             db.close()
 
+        return f(*args, **kwargs)
+
     return decorated_function
 
 
@@ -97,6 +106,11 @@ def page_login_required(f):
             return redirect(url_for("auth.login_page"))
 
         token = token[7:]
+        cached = TOKEN_CACHE.get(token)
+        if cached is not None:
+            g.user, g.device = cached
+            return f(*args, **kwargs)
+
         db = SessionLocal()
 
         try:
@@ -109,27 +123,24 @@ def page_login_required(f):
             )
 
             user_id = payload.get("user_id")
-            token_hash = jwt.encode(payload, config.JWT_SECRET_KEY, algorithm="HS256")
-            if isinstance(token_hash, bytes):
-                token_hash = token_hash.decode("utf-8")
 
-            # 验证Token有效性
-            auth_token = db.query(UserAuthToken).filter(
+            # 验证Token有效性（按摘要唯一索引点查）
+            auth_token_id = db.query(UserAuthToken.id).filter(
+                UserAuthToken.token_hash == token_digest(token),
                 UserAuthToken.user_id == user_id,
-                UserAuthToken.token_hash == token_hash,
                 UserAuthToken.is_valid == True
-            ).first()
+            ).scalar()
 
             user = db.query(YstcUser).filter(YstcUser.id == user_id).first()
             device = db.query(Device).filter(Device.user_id == user_id).first()
 
-            if not auth_token or not user or not device:
+            if not auth_token_id or not user or not device:
                 return redirect(url_for("auth.login_page"))
 
-            # 存入g对象
-            g.user = user
-            g.device = device
-            return f(*args, **kwargs)
+            # 存入g对象并缓存
+            g.user = snapshot(user)
+            g.device = snapshot(device)
+            TOKEN_CACHE.put(token, g.user, g.device)
 
         except Exception as e:
             log.error(f"页面鉴权异常：{str(e)}")
@@ -137,4 +148,6 @@ def page_login_required(f):
         finally:
             db.close()
 
+        return f(*args, **kwargs)
+
     return decorated_function
\ No newline at end of file
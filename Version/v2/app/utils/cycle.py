@@ -1,9 +1,9 @@
-import threading
 import logging
 import time
 from datetime import datetime
 import pytz
 from ..config import config  # 修正导入路径（避免跨包导入错误）
+from .cycle_store import CYCLE_STORE
 
 # 全局存储（非持久化，周期结束后清理）
 STATE = {
@@ -12,10 +12,7 @@ STATE = {
     "last_cycle_end": None,
     "last_error": None
 }
-DEVICE_DATA = {}  # {cycle_time: {serial_number: device_data}}
-DEVICE_STRATEGIES = {}  # {cycle_time: {device_id: strategy}}
-CYCLE_STATUS = {}  # {cycle_time: "running"/"completed"/"failed"}
-STORAGE_LOCK = threading.Lock()  # 线程锁，保证数据安全
+# 周期设备数据/策略/状态统一存放于CYCLE_STORE（分片存储，见cycle_store.py）
 
 # 日志
 log = logging.getLogger("pt.utils.cycle")
@@ -31,7 +28,8 @@ def get_current_cycle():
 
     # 核心修复：强制初始化基准时间（避免None）
     if get_current_cycle_start_time is None:
-        get_current_cycle_start_time = time.time()
+        # 多worker部署时沿用共享基准时间，保证各worker的周期标识一致
+        get_current_cycle_start_time = CYCLE_STORE.shared_epoch(time.time())
         log.warning("周期基准时间未初始化，自动补充初始化（当前时间戳）")
 
     # 计算当前周期起始时间戳
@@ -45,6 +43,18 @@ def get_current_cycle():
     return cycle_start_dt.isoformat()
 
 
+def cycle_key(cycle_time):
+    """
+    周期标识（ISO字符串）转为落库/查询用的周期键：AUS_TZ本地时间、精确到秒、不带时区
+    与策略名中的cycle_time[:19]一致；格式错误时抛出ValueError
+    """
+    AUS_TZ = pytz.timezone(config.TZ)
+    cycle_dt = datetime.fromisoformat(cycle_time)
+    if cycle_dt.tzinfo is not None:
+        cycle_dt = cycle_dt.astimezone(AUS_TZ)
+    return cycle_dt.replace(tzinfo=None, microsecond=0)
+
+
 # 绑定基准时间到函数（兼容原有逻辑）
 get_current_cycle.start_time = get_current_cycle_start_time
 
@@ -58,29 +68,13 @@ def is_upload_window_open(cycle_time):
 
 def clean_expired_data():
     """清理过期周期数据（保留最近1个周期）"""
-    with STORAGE_LOCK:
-        current_cycle = get_current_cycle()
-        expired_cycles = [ct for ct in DEVICE_DATA.keys() if ct != current_cycle]
-        for ct in expired_cycles:
-            if ct in DEVICE_DATA:
-                del DEVICE_DATA[ct]
-            if ct in DEVICE_STRATEGIES:
-                del DEVICE_STRATEGIES[ct]
-            if ct in CYCLE_STATUS:
-                del CYCLE_STATUS[ct]
-    log.info(f"清理过期周期数据，剩余有效周期：{list(DEVICE_DATA.keys())}")
+    current_cycle = get_current_cycle()
+    CYCLE_STORE.drop_except(current_cycle)
+    log.info(f"清理过期周期数据，剩余有效周期：{CYCLE_STORE.cycles()}")
 
 
 def clean_cycle_data(cycle_time):
     """新增：清理指定周期的非持久化数据（周期结束后立即清理）"""
-    with STORAGE_LOCK:
-        # 删除当前周期设备数据
-        if cycle_time in DEVICE_DATA:
-            del DEVICE_DATA[cycle_time]
-        # 删除当前周期策略数据
-        if cycle_time in DEVICE_STRATEGIES:
-            del DEVICE_STRATEGIES[cycle_time]
-        # 标记周期状态为已清理
-        if cycle_time in CYCLE_STATUS:
-            del CYCLE_STATUS[cycle_time]
-    log.info(f"周期{cycle_time}非持久化数据已清理")
\ No newline at end of file
+    # 设备数据、策略数据与周期状态同属一个存储桶，整体删除
+    CYCLE_STORE.drop(cycle_time)
+    log.info(f"周期{cycle_time}非持久化数据已清理")
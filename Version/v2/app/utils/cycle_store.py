@@ -0,0 +1,384 @@
+import os
+import time
+import socket
+import threading
+import logging
+from abc import ABC, abstractmethod
+from ..config import config
+from . import json_codec
+from .device_columns import DeviceColumns, PackedDevice
+from .device_schema import pack_device
+
+log = logging.getLogger("pt.utils.cycle_store")
+
+try:
+    import redis
+except ImportError:  # redis为可选依赖，仅CYCLE_STORE_BACKEND=redis时需要
+    redis = None
+
+
+class SealedCycle:
+    """
+    封存后的周期设备数据快照：直接引用各分片的列式存储（DeviceColumns），不做拷贝
+    封存后分片不再写入，可在求解线程中无锁遍历
+    """
+
+    def __init__(self, cycle_time, shards):
+        self.cycle_time = cycle_time
+        self._shards = shards
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def __bool__(self):
+        return any(self._shards)
+
+    def keys(self):
+        for shard in self._shards:
+            yield from shard.serials
+
+    def rows(self):
+        """遍历(serial_number, 原id, 分片列存, 槽位)，按需用columns.solver_device(slot, new_id)生成JAR输入"""
+        for shard in self._shards:
+            for serial_number, device_id, slot in shard.rows():
+                yield serial_number, device_id, shard, slot
+
+
+class CycleBucket:
+    """单个周期的存储桶：设备数据按序列号哈希分片，每片一个列式存储+独立锁，上传只锁所在分片"""
+
+    def __init__(self, cycle_time, shard_count):
+        self.cycle_time = cycle_time
+        self.shards = [DeviceColumns() for _ in range(shard_count)]
+        self.locks = [threading.Lock() for _ in range(shard_count)]
+        self.change_logs = [[] for _ in range(shard_count)]  # 各分片按写入顺序记录序列号（含重复上传），供增量读取
+        self.sealed = False
+        self.status = None
+        self.strategies = None
+
+    def append(self, serial_number, packed):
+        idx = hash(serial_number) % len(self.shards)
+        with self.locks[idx]:
+            if self.sealed:
+                return False
+            self.shards[idx].put(serial_number, packed)
+            self.change_logs[idx].append(serial_number)
+        return True
+
+    def changes(self, cursor):
+        """读取各分片自cursor之后写入的设备（同一设备只取最新数据），返回(新cursor, DeviceColumns)"""
+        cursor = list(cursor or [0] * len(self.shards))
+        batch = DeviceColumns()
+        for idx, shard in enumerate(self.shards):
+            with self.locks[idx]:
+                change_log = self.change_logs[idx]
+                if cursor[idx] >= len(change_log):
+                    continue
+                for serial_number in dict.fromkeys(change_log[cursor[idx]:]):
+                    batch.put(serial_number, shard.packed(shard.slots[serial_number]))
+                cursor[idx] = len(change_log)
+        return cursor, batch
+
+    def seal(self):
+        # 依次持有全部分片锁后置封存标记，保证封存后不会再有写入落入快照
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            self.sealed = True
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
+        return SealedCycle(self.cycle_time, self.shards)
+
+
+class CycleStore(ABC):
+    """
+    周期数据存储接口：按周期保存设备上传数据、博弈策略与周期状态
+    上传只追加写入；周期上传窗口结束后由周期管理器seal()封存，得到只读快照交给求解器
+    多worker部署时，claim()保证每个周期只有一个worker封存并求解，shared_epoch()保证各worker的周期划分一致
+    """
+
+    @abstractmethod
+    def append(self, cycle_time, serial_number, device_data):
+        """写入设备上传数据，周期已封存时返回False，数据不合法时抛出DeviceSchemaError"""
+
+    @abstractmethod
+    def device_count(self, cycle_time):
+        """周期内已上传的设备数"""
+
+    @abstractmethod
+    def seal(self, cycle_time):
+        """封存周期：之后的上传被拒绝，返回SealedCycle快照"""
+
+    @abstractmethod
+    def changes(self, cycle_time, cursor=None):
+        """
+        增量读取：返回(新cursor, SealedCycle)，SealedCycle只包含自cursor之后新上传或重复上传的设备（数据为拷贝）
+        cursor首次传None，之后传回上次返回值；封存后再调用一次即可取到封存前的剩余数据
+        """
+
+    @abstractmethod
+    def is_sealed(self, cycle_time):
+        """周期是否已封存"""
+
+    @abstractmethod
+    def set_status(self, cycle_time, status):
+        """设置周期状态（sealed/completed/partial/failed）"""
+
+    @abstractmethod
+    def get_status(self, cycle_time):
+        """周期状态，未设置时返回None"""
+
+    @abstractmethod
+    def set_strategies(self, cycle_time, decisions):
+        """保存周期的设备决策列表"""
+
+    @abstractmethod
+    def get_strategies(self, cycle_time):
+        """周期的设备决策列表，未求解时返回None"""
+
+    @abstractmethod
+    def cycles(self):
+        """存储中的全部周期标识"""
+
+    @abstractmethod
+    def drop(self, cycle_time):
+        """删除周期的全部数据"""
+
+    @abstractmethod
+    def claim(self, cycle_time):
+        """争抢周期的执行权，返回True表示由当前worker封存并求解"""
+
+    @abstractmethod
+    def shared_epoch(self, proposed_ts):
+        """获取各worker共用的周期基准时间戳，未设置时以proposed_ts为准"""
+
+    # 方法调用是否为阻塞网络IO（异步接口需放到线程池中调用，避免阻塞事件循环）
+    blocking_io = False
+
+    def publish(self, channel, message):
+        """向其他worker广播消息（进程内存储只有单worker，无需广播）"""
+
+    def subscribe(self, channel, handler):
+        """订阅其他worker的广播，handler(message)在后台线程中调用；本worker发出的消息不回调"""
+
+    def drop_except(self, keep_cycle_time):
+        """删除除指定周期外的全部周期，返回删除的周期列表"""
+        expired = [ct for ct in self.cycles() if ct != keep_cycle_time]
+        for ct in expired:
+            self.drop(ct)
+        return expired
+
+
+class MemoryCycleStore(CycleStore):
+    """
+    进程内存储（默认）：每个周期一个存储桶，桶内按序列号哈希分片
+    上传只锁所在分片，不同分片的上传互不阻塞；封存后的快照直接引用分片列存，不拷贝
+    只在单进程内可见，只能以单worker运行
+    """
+
+    def __init__(self, shard_count):
+        self.shard_count = max(1, shard_count)
+        self._buckets = {}  # {cycle_time: CycleBucket}
+
+    def _bucket(self, cycle_time, create=False):
+        bucket = self._buckets.get(cycle_time)
+        if bucket is None and create:
+            # setdefault为原子操作，并发创建同一周期时只保留一个桶
+            bucket = self._buckets.setdefault(cycle_time, CycleBucket(cycle_time, self.shard_count))
+        return bucket
+
+    def append(self, cycle_time, serial_number, device_data):
+        # 校验与格式转换在分片锁外完成，锁内只做列式追加
+        packed = pack_device(device_data)
+        return self._bucket(cycle_time, create=True).append(serial_number, packed)
+
+    def device_count(self, cycle_time):
+        bucket = self._bucket(cycle_time)
+        return sum(len(shard) for shard in bucket.shards) if bucket else 0
+
+    def seal(self, cycle_time):
+        snapshot = self._bucket(cycle_time, create=True).seal()
+        self.set_status(cycle_time, "sealed")
+        return snapshot
+
+    def changes(self, cycle_time, cursor=None):
+        cursor, batch = self._bucket(cycle_time, create=True).changes(cursor)
+        return cursor, SealedCycle(cycle_time, [batch])
+
+    def is_sealed(self, cycle_time):
+        bucket = self._bucket(cycle_time)
+        return bool(bucket and bucket.sealed)
+
+    def set_status(self, cycle_time, status):
+        self._bucket(cycle_time, create=True).status = status
+
+    def get_status(self, cycle_time):
+        bucket = self._bucket(cycle_time)
+        return bucket.status if bucket else None
+
+    def set_strategies(self, cycle_time, decisions):
+        self._bucket(cycle_time, create=True).strategies = decisions
+
+    def get_strategies(self, cycle_time):
+        bucket = self._bucket(cycle_time)
+        return bucket.strategies if bucket else None
+
+    def cycles(self):
+        return list(self._buckets)
+
+    def drop(self, cycle_time):
+        self._buckets.pop(cycle_time, None)
+
+    def claim(self, cycle_time):
+        # 单进程内只有一个周期管理器
+        return True
+
+    def shared_epoch(self, proposed_ts):
+        return proposed_ts
+
+
+class RedisCycleStore(CycleStore):
+    """
+    Redis共享存储：多个worker进程/节点共用同一份周期数据，上传可水平扩展
+    键：{prefix}:cycle:{cycle_time}:data（哈希表，序列号→设备数据JSON）/ log（列表，按写入顺序记录序列号）/ sealed / status / strategies / owner
+    所有周期键带过期时间（CYCLE_STORE_TTL），异常退出时不会残留；周期基准时间（epoch）由各worker每周期续期，全部worker停止后过期
+    """
+
+    blocking_io = True
+
+    # 追加写入：未封存时才写入哈希表（脚本在Redis内原子执行，与封存互斥）
+    APPEND_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return 0
+    end
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    redis.call('SADD', KEYS[3], ARGV[4])
+    redis.call('RPUSH', KEYS[4], ARGV[1])
+    redis.call('EXPIRE', KEYS[4], ARGV[3])
+    return 1
+    """
+
+    def __init__(self, url, prefix, ttl):
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._ttl = ttl
+        self._index_key = f"{prefix}:cycles"
+        self._epoch_key = f"{prefix}:epoch"
+        self._append_script = self._redis.register_script(self.APPEND_SCRIPT)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _key(self, cycle_time, name):
+        return f"{self._prefix}:cycle:{cycle_time}:{name}"
+
+    def append(self, cycle_time, serial_number, device_data):
+        keys = [
+            self._key(cycle_time, "sealed"), self._key(cycle_time, "data"), self._index_key, self._key(cycle_time, "log")
+        ]
+        # 存入转换后的数据（时间片字段已定长），封存时直接装入列式存储
+        args = [serial_number, json_codec.dumps(pack_device(device_data).to_dict()), self._ttl, cycle_time]
+        return self._append_script(keys=keys, args=args) == 1
+
+    def device_count(self, cycle_time):
+        return self._redis.hlen(self._key(cycle_time, "data"))
+
+    def seal(self, cycle_time):
+        # 事务内先置封存标记再读取全部数据：封存后的追加脚本全部返回0，读到的即最终数据
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.set(self._key(cycle_time, "sealed"), 1, ex=self._ttl)
+        pipe.hgetall(self._key(cycle_time, "data"))
+        pipe.set(self._key(cycle_time, "status"), "sealed", ex=self._ttl)
+        _, raw, _ = pipe.execute()
+        columns = DeviceColumns()
+        for serial, data in raw.items():
+            # 写入时已校验，直接装入列存
+            columns.put(serial.decode("utf-8"), PackedDevice.from_dict(json_codec.loads(data)))
+        return SealedCycle(cycle_time, [columns])
+
+    def changes(self, cycle_time, cursor=None):
+        # 日志只追加：读到的条目数即下次起点，同一设备多次上传只取哈希表中的最新数据
+        cursor = cursor or 0
+        entries = self._redis.lrange(self._key(cycle_time, "log"), cursor, -1)
+        columns = DeviceColumns()
+        serials = list(dict.fromkeys(entries))
+        if serials:
+            for serial, data in zip(serials, self._redis.hmget(self._key(cycle_time, "data"), serials)):
+                columns.put(serial.decode("utf-8"), PackedDevice.from_dict(json_codec.loads(data)))
+        return cursor + len(entries), SealedCycle(cycle_time, [columns])
+
+    def is_sealed(self, cycle_time):
+        return bool(self._redis.exists(self._key(cycle_time, "sealed")))
+
+    def set_status(self, cycle_time, status):
+        self._redis.set(self._key(cycle_time, "status"), status, ex=self._ttl)
+
+    def get_status(self, cycle_time):
+        status = self._redis.get(self._key(cycle_time, "status"))
+        return status.decode("utf-8") if status is not None else None
+
+    def set_strategies(self, cycle_time, decisions):
+        self._redis.set(self._key(cycle_time, "strategies"), json_codec.dumps(decisions), ex=self._ttl)
+
+    def get_strategies(self, cycle_time):
+        data = self._redis.get(self._key(cycle_time, "strategies"))
+        return json_codec.loads(data) if data is not None else None
+
+    def cycles(self):
+        return sorted(ct.decode("utf-8") for ct in self._redis.smembers(self._index_key))
+
+    def drop(self, cycle_time):
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(*[self._key(cycle_time, name) for name in ("data", "log", "sealed", "status", "strategies")])
+        pipe.srem(self._index_key, cycle_time)
+        pipe.execute()
+
+    def claim(self, cycle_time):
+        # 各worker每周期都会调用，顺带为周期基准时间续期
+        self._redis.expire(self._epoch_key, self._ttl)
+        # SET NX：同一周期只有第一个worker抢到执行权
+        owner_key = self._key(cycle_time, "owner")
+        if self._redis.set(owner_key, self.worker_id, nx=True, ex=self._ttl):
+            return True
+        owner = self._redis.get(owner_key)
+        return owner is not None and owner.decode("utf-8") == self.worker_id
+
+    def shared_epoch(self, proposed_ts):
+        # 第一个启动的worker写入基准时间，之后启动的worker沿用；带过期时间，上一次部署残留的基准时间不会一直沿用
+        self._redis.set(self._epoch_key, repr(proposed_ts), nx=True, ex=self._ttl)
+        epoch = self._redis.get(self._epoch_key)
+        return float(epoch) if epoch is not None else proposed_ts
+
+    def publish(self, channel, message):
+        self._redis.publish(f"{self._prefix}:{channel}", json_codec.dumps({**message, "origin": self.worker_id}))
+
+    def subscribe(self, channel, handler):
+        def _on_message(item):
+            message = json_codec.loads(item["data"])
+            if message.pop("origin", None) != self.worker_id:
+                handler(message)
+
+        def _on_error(e, pubsub, thread):
+            # 连接断开时稍后重试（重连后自动重新订阅），断开期间丢失的消息由各自缓存的TTL兜底
+            log.warning(f"Redis订阅{channel}异常，1秒后重试：{str(e)}")
+            time.sleep(1)
+
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{f"{self._prefix}:{channel}": _on_message})
+        pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_on_error)
+
+
+def create_cycle_store(backend=None):
+    """按配置创建周期存储：memory=进程内分片存储（单worker），redis=Redis共享存储（多worker/多节点）"""
+    backend = backend or config.CYCLE_STORE_BACKEND
+    if backend == "redis":
+        if redis is not None:
+            log.info(f"周期存储：Redis（{config.REDIS_URL}）")
+            return RedisCycleStore(config.REDIS_URL, config.CYCLE_STORE_PREFIX, config.CYCLE_STORE_TTL)
+        log.warning("未安装redis，周期存储回退为进程内存储（只能以单worker运行）")
+    elif backend != "memory":
+        log.warning(f"周期存储后端{backend}不可用，回退为进程内存储")
+    return MemoryCycleStore(config.CYCLE_STORE_SHARDS)
+
+
+CYCLE_STORE = create_cycle_store()
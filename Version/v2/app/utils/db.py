@@ -1,6 +1,7 @@
 import logging
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.utils import json_codec
 from ..config import config
 # 基础模型类
 Base = declarative_base()
@@ -12,12 +13,38 @@ engine = create_engine(
     max_overflow=30,
     pool_pre_ping=True,
     echo=False,
-    connect_args={"charset": "utf8mb4"}
+    connect_args={"charset": "utf8mb4"},
+    # JSON列统一由可插拔编解码器序列化（写入时传dict，仅序列化一次）
+    json_serializer=json_codec.dumps,
+    json_deserializer=json_codec.loads
 )
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎与会话工厂（ASGI模式使用，首次调用时创建；依赖aiomysql驱动）
+_async_session_factory = None
+
+
+def get_async_session_factory():
+    """获取异步会话工厂：async with factory() as db: await db.execute(...)"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        async_engine = create_async_engine(
+            config.SQLALCHEMY_DATABASE_URI.replace("mysql+pymysql://", "mysql+aiomysql://"),
+            pool_size=config.ASYNC_DB_POOL_SIZE,
+            max_overflow=config.ASYNC_DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            echo=False,
+            json_serializer=json_codec.dumps,
+            json_deserializer=json_codec.loads
+        )
+        # 提交后不过期，快照/响应构建时无需再次查询
+        _async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    return _async_session_factory
+
 # 日志
 log = logging.getLogger("pt.db")
 
@@ -31,6 +58,9 @@ def init_db():
 
         # 创建所有表
         Base.metadata.create_all(bind=engine)
+        # 已有表的结构变更（新增列/索引）
+        from app.utils.migrate import run_migrations
+        run_migrations(engine)
         log.info(f"数据库表初始化完成：{config.DB_NAME}")
         return True
     except Exception as e:
@@ -0,0 +1,119 @@
+import logging
+from array import array
+from ..config import config
+
+log = logging.getLogger("pt.utils.device_columns")
+
+# 按时间片取值的字段：每台设备定长TIME_SLOTS
+SLOT_FIELDS = ("currentStorage", "demands", "produce")
+# 按充放电档位取值的字段：档位数由设备决定，变长
+LEVEL_FIELDS = ("chargeSpeed", "dischargeSpeed", "chargeCost", "dischargeCost")
+
+
+class PackedDevice:
+    """单台设备上传数据校验转换后的结果（见device_schema.pack_device）：数值字段均为array('d')，写入DeviceColumns前在锁外完成"""
+
+    __slots__ = ("device_id", "overall_capacity", "slot_rows", "level_rows")
+
+    def __init__(self, device_id, overall_capacity, slot_rows, level_rows):
+        self.device_id = device_id
+        self.overall_capacity = overall_capacity
+        self.slot_rows = slot_rows  # {字段: array('d')，长度TIME_SLOTS}
+        self.level_rows = level_rows  # {字段: array('d')}
+
+    def to_dict(self):
+        """还原为JAR输入格式的设备字典（id为设备上传的原id）"""
+        device = {"id": self.device_id, "overallCapacity": self.overall_capacity}
+        for field, row in self.slot_rows.items():
+            device[field] = row.tolist()
+        for field, row in self.level_rows.items():
+            device[field] = row.tolist()
+        return device
+
+    @classmethod
+    def from_dict(cls, device):
+        """由to_dict()的结果还原（数据已在上传时校验，不再校验）"""
+        return cls(
+            device["id"],
+            device["overallCapacity"],
+            {field: array("d", device[field]) for field in SLOT_FIELDS},
+            {field: array("d", device[field]) for field in LEVEL_FIELDS}
+        )
+
+
+class DeviceColumns:
+    """
+    设备数据列式存储（struct-of-arrays）：每台设备占一个槽位，各字段数值连续存放于array('d')
+    时间片字段定长，槽位slot的数据位于[slot*TIME_SLOTS, (slot+1)*TIME_SLOTS)
+    档位字段变长，按槽位记录在扁平数组中的偏移与长度
+    同一设备重复上传时原位覆盖定长字段，变长字段追加新数据并改写偏移（旧数据随周期整体释放）
+    """
+
+    def __init__(self, time_slots=None):
+        self.time_slots = time_slots or config.TIME_SLOTS
+        self.serials = []  # 槽位→序列号
+        self.device_ids = []  # 槽位→设备上传的原id
+        self.slots = {}  # {serial_number: 槽位}
+        self.overall_capacity = array("d")
+        self.slot_values = {field: array("d") for field in SLOT_FIELDS}
+        self.level_values = {field: array("d") for field in LEVEL_FIELDS}
+        self.level_offsets = {field: array("q") for field in LEVEL_FIELDS}
+        self.level_lengths = {field: array("I") for field in LEVEL_FIELDS}
+
+    def __len__(self):
+        return len(self.serials)
+
+    def put(self, serial_number, packed):
+        """写入一台设备（调用方负责加锁），返回槽位"""
+        slot = self.slots.get(serial_number)
+        if slot is None:
+            slot = len(self.serials)
+            self.serials.append(serial_number)
+            self.device_ids.append(packed.device_id)
+            self.overall_capacity.append(packed.overall_capacity)
+            for field, row in packed.slot_rows.items():
+                self.slot_values[field].extend(row)
+            for field, row in packed.level_rows.items():
+                self.level_offsets[field].append(len(self.level_values[field]))
+                self.level_lengths[field].append(len(row))
+                self.level_values[field].extend(row)
+            self.slots[serial_number] = slot
+            return slot
+
+        # 同一周期内重复上传以最后一次为准
+        start = slot * self.time_slots
+        self.device_ids[slot] = packed.device_id
+        self.overall_capacity[slot] = packed.overall_capacity
+        for field, row in packed.slot_rows.items():
+            self.slot_values[field][start:start + self.time_slots] = row
+        for field, row in packed.level_rows.items():
+            self.level_offsets[field][slot] = len(self.level_values[field])
+            self.level_lengths[field][slot] = len(row)
+            self.level_values[field].extend(row)
+        return slot
+
+    def solver_device(self, slot, device_id):
+        """按槽位切片生成JAR输入的设备字典（id替换为求解用的连续编号）"""
+        start = slot * self.time_slots
+        device = {"id": device_id, "overallCapacity": self.overall_capacity[slot]}
+        for field in SLOT_FIELDS:
+            device[field] = self.slot_values[field][start:start + self.time_slots].tolist()
+        for field in LEVEL_FIELDS:
+            offset = self.level_offsets[field][slot]
+            device[field] = self.level_values[field][offset:offset + self.level_lengths[field][slot]].tolist()
+        return device
+
+    def packed(self, slot):
+        """按槽位复制出一台设备的数据（增量读取时在分片锁内调用，之后与列存再无关联）"""
+        start = slot * self.time_slots
+        slot_rows = {field: self.slot_values[field][start:start + self.time_slots] for field in SLOT_FIELDS}
+        level_rows = {}
+        for field in LEVEL_FIELDS:
+            offset = self.level_offsets[field][slot]
+            level_rows[field] = self.level_values[field][offset:offset + self.level_lengths[field][slot]]
+        return PackedDevice(self.device_ids[slot], self.overall_capacity[slot], slot_rows, level_rows)
+
+    def rows(self):
+        """遍历(serial_number, 原id, 槽位)"""
+        for slot, serial_number in enumerate(self.serials):
+            yield serial_number, self.device_ids[slot], slot
@@ -0,0 +1,136 @@
+import math
+import logging
+from array import array
+from ..config import config
+from .device_columns import PackedDevice
+
+log = logging.getLogger("pt.utils.device_schema")
+
+
+class DeviceSchemaError(ValueError):
+    """设备上传数据校验失败，field为出错字段（数组元素形如chargeSpeed[3]）"""
+
+    def __init__(self, field, msg):
+        super().__init__(f"{field}：{msg}")
+        self.field = field
+
+
+class FieldSpec:
+    """
+    字段规则：kind=id（设备原id）/ number（单个数值）/ slots（按时间片，长度TIME_SLOTS）/ levels（按充放电档位，变长）
+    pad=True时长度不符补0/截断（兼容未上报完整produce的设备），same_length为须与之等长的字段
+    """
+
+    __slots__ = ("name", "kind", "required", "pad", "min_length", "same_length")
+
+    def __init__(self, name, kind, required=True, pad=False, min_length=0, same_length=None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.pad = pad
+        self.min_length = min_length
+        self.same_length = same_length
+
+
+# 设备上传数据（JAR输入）的字段规则，数值一律要求为非负有限数
+DEVICE_SCHEMA = (
+    FieldSpec("id", "id"),
+    FieldSpec("overallCapacity", "number"),
+    FieldSpec("currentStorage", "slots"),
+    FieldSpec("demands", "slots"),
+    FieldSpec("produce", "slots", required=False, pad=True),  # 无光伏设备可不上报，缺省补0
+    FieldSpec("chargeSpeed", "levels", min_length=1),
+    FieldSpec("chargeCost", "levels", min_length=1, same_length="chargeSpeed"),
+    FieldSpec("dischargeSpeed", "levels", min_length=1),
+    FieldSpec("dischargeCost", "levels", min_length=1, same_length="dischargeSpeed"),
+)
+
+
+def _to_float(value):
+    """数值转float，超出浮点范围的大整数返回None"""
+    try:
+        return float(value)
+    except OverflowError:
+        return None
+
+
+def _number_array(field, values):
+    """整列转换为array('d')并校验：正常路径只做一次C层转换+fsum/min，出错时再逐个定位元素"""
+    if not isinstance(values, list):
+        raise DeviceSchemaError(field, "应为数组")
+    # array('d')会把True/False静默转为1.0/0.0，先按元素类型集合（C层遍历）排除布尔值
+    if bool in set(map(type, values)):
+        i = next(i for i, value in enumerate(values) if isinstance(value, bool))
+        raise DeviceSchemaError(f"{field}[{i}]", "应为数值")
+    try:
+        row = array("d", values)
+    except (TypeError, OverflowError):
+        # TypeError：非数值元素；OverflowError：超出浮点范围的大整数（如10**400）
+        for i, value in enumerate(values):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise DeviceSchemaError(f"{field}[{i}]", "应为数值")
+            if _to_float(value) is None:
+                raise DeviceSchemaError(f"{field}[{i}]", "应为非负有限数值")
+        raise DeviceSchemaError(field, "应为数值数组")
+    if row and (not math.isfinite(math.fsum(row)) or min(row) < 0):
+        for i, value in enumerate(row):
+            if not math.isfinite(value) or value < 0:
+                raise DeviceSchemaError(f"{field}[{i}]", "应为非负有限数值")
+    return row
+
+
+def pack_device(device_data, time_slots=None):
+    """
+    按DEVICE_SCHEMA校验设备上传数据并转为PackedDevice，不合法时抛出DeviceSchemaError
+    在上传接口中调用，求解前不再做任何逐设备修补
+    """
+    if not isinstance(device_data, dict):
+        raise DeviceSchemaError("device_data", "应为对象")
+    time_slots = time_slots or config.TIME_SLOTS
+
+    device_id = None
+    overall_capacity = 0.0
+    slot_rows = {}
+    level_rows = {}
+    for spec in DEVICE_SCHEMA:
+        value = device_data.get(spec.name)
+        if value is None:
+            if spec.required:
+                raise DeviceSchemaError(spec.name, "缺少必填字段")
+            if spec.kind == "slots":
+                slot_rows[spec.name] = array("d", [0.0] * time_slots)
+            continue
+
+        if spec.kind == "id":
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise DeviceSchemaError(spec.name, "应为整数或字符串")
+            device_id = value
+
+        elif spec.kind == "number":
+            number = None if isinstance(value, bool) or not isinstance(value, (int, float)) else _to_float(value)
+            if number is None or not math.isfinite(number) or number < 0:
+                raise DeviceSchemaError(spec.name, "应为非负有限数值")
+            overall_capacity = number
+
+        elif spec.kind == "slots":
+            row = _number_array(spec.name, value)
+            if len(row) != time_slots:
+                if not spec.pad:
+                    raise DeviceSchemaError(spec.name, f"长度应为{time_slots}，实际为{len(row)}")
+                if len(row) < time_slots:
+                    row.extend([0.0] * (time_slots - len(row)))
+                else:
+                    del row[time_slots:]
+            slot_rows[spec.name] = row
+
+        else:
+            row = _number_array(spec.name, value)
+            if len(row) < spec.min_length:
+                raise DeviceSchemaError(spec.name, f"至少需要{spec.min_length}个档位")
+            if spec.same_length and len(row) != len(level_rows[spec.same_length]):
+                raise DeviceSchemaError(
+                    spec.name, f"长度应与{spec.same_length}一致（{len(level_rows[spec.same_length])}），实际为{len(row)}"
+                )
+            level_rows[spec.name] = row
+
+    return PackedDevice(device_id, overall_capacity, slot_rows, level_rows)
@@ -0,0 +1,80 @@
+import json
+import logging
+from ..config import config
+
+log = logging.getLogger("pt.utils.json")
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+
+
+class JsonCodec:
+    """JSON编解码器：dumps返回str，dumps_bytes返回UTF-8字节，loads接受str/bytes"""
+
+    def __init__(self, name, dumps, dumps_bytes, loads):
+        self.name = name
+        self.dumps = dumps
+        self.dumps_bytes = dumps_bytes
+        self.loads = loads
+
+
+def _std_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+STD_CODEC = JsonCodec(
+    "json",
+    _std_dumps,
+    lambda obj: _std_dumps(obj).encode("utf-8"),
+    json.loads
+)
+
+CODECS = {"json": STD_CODEC}
+if orjson is not None:
+    CODECS["orjson"] = JsonCodec(
+        "orjson",
+        lambda obj: orjson.dumps(obj).decode("utf-8"),
+        orjson.dumps,
+        orjson.loads
+    )
+
+
+def register_codec(codec):
+    """注册自定义编解码器（如ujson/rapidjson），之后可通过use_codec切换"""
+    CODECS[codec.name] = codec
+
+
+def get_codec(name=None):
+    """按名称获取编解码器：auto=已安装orjson则用orjson，否则用标准库json"""
+    name = name or config.JSON_CODEC
+    if name == "auto":
+        name = "orjson" if "orjson" in CODECS else "json"
+    codec = CODECS.get(name)
+    if codec is None:
+        log.warning(f"JSON编解码器{name}不可用，回退为标准库json")
+        codec = STD_CODEC
+    return codec
+
+
+_CODEC = get_codec()
+
+
+def use_codec(name):
+    """切换全局编解码器"""
+    global _CODEC
+    _CODEC = get_codec(name)
+    log.info(f"JSON编解码器：{_CODEC.name}")
+
+
+def dumps(obj):
+    return _CODEC.dumps(obj)
+
+
+def dumps_bytes(obj):
+    return _CODEC.dumps_bytes(obj)
+
+
+def loads(data):
+    return _CODEC.loads(data)
@@ -0,0 +1,50 @@
+import logging
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+log = logging.getLogger("pt.migrate")
+
+VERSION_TABLE = "ystc_schema_version"
+
+
+def has_column(conn, table, column):
+    """判断表中是否已存在指定列（新库由create_all建表时迁移需跳过）"""
+    return any(col["name"] == column for col in inspect(conn).get_columns(table))
+
+
+def has_index(conn, table, index_name):
+    """判断表中是否已存在指定索引"""
+    return any(idx["name"] == index_name for idx in inspect(conn).get_indexes(table))
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        "revision VARCHAR(32) NOT NULL PRIMARY KEY, "
+        "description VARCHAR(255) NULL, "
+        "applied_at DATETIME NOT NULL)"
+    ))
+
+
+def run_migrations(engine):
+    """
+    按版本号顺序执行app.migrations中尚未执行的迁移，已执行版本记录在ystc_schema_version
+    每个迁移在独立事务中执行，失败时抛出异常并停止后续迁移
+    """
+    from app.migrations import MIGRATIONS
+
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        applied = {row[0] for row in conn.execute(text(f"SELECT revision FROM {VERSION_TABLE}"))}
+
+    for migration in MIGRATIONS:
+        if migration.REVISION in applied:
+            continue
+        log.info(f"执行数据库迁移：{migration.REVISION} {migration.DESCRIPTION}")
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(
+                text(f"INSERT INTO {VERSION_TABLE} (revision, description, applied_at) VALUES (:r, :d, :t)"),
+                {"r": migration.REVISION, "d": migration.DESCRIPTION, "t": datetime.now()}
+            )
+        log.info(f"数据库迁移完成：{migration.REVISION}")
@@ -0,0 +1,90 @@
+import atexit
+import logging
+import threading
+from datetime import datetime
+import pytz
+from sqlalchemy import case, update
+from app.utils.db import SessionLocal
+from app.models import Device
+from ..config import config
+
+log = logging.getLogger("pt.utils.presence")
+AUS_TZ = pytz.timezone(config.TZ)
+
+FLUSH_BATCH_SIZE = 1000  # 单条UPDATE最多覆盖的设备数
+
+
+class PresenceTracker:
+    """
+    设备在线状态写回缓存：请求路径只在内存中记录，后台线程按PRESENCE_FLUSH_INTERVAL批量UPDATE一次
+    同一设备在一个间隔内的多次请求只保留最后一次状态
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}  # {device_id: (status, last_online)}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def mark_online(self, device_id):
+        self._record(device_id, "online", datetime.now(AUS_TZ))
+
+    def mark_offline(self, device_id):
+        self._record(device_id, "offline", None)
+
+    def _record(self, device_id, status, last_online):
+        with self._lock:
+            if last_online is None and device_id in self._pending:
+                # 下线不修改最后在线时间，保留同一间隔内已记录的在线时间
+                last_online = self._pending[device_id][1]
+            self._pending[device_id] = (status, last_online)
+            if self._thread is None:
+                self._start()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="presence-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        """将累积的在线状态写入数据库：每批一条UPDATE（CASE按设备ID取值），返回写入设备数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        device_ids = list(pending.keys())
+        db = SessionLocal()
+        try:
+            for i in range(0, len(device_ids), FLUSH_BATCH_SIZE):
+                batch = device_ids[i:i + FLUSH_BATCH_SIZE]
+                values = {"status": case({device_id: pending[device_id][0] for device_id in batch}, value=Device.id)}
+                online_times = {device_id: pending[device_id][1] for device_id in batch
+                                if pending[device_id][1] is not None}
+                if online_times:
+                    values["last_online"] = case(online_times, value=Device.id, else_=Device.last_online)
+                db.execute(update(Device).where(Device.id.in_(batch)).values(**values))
+            db.commit()
+            return len(device_ids)
+        except Exception as e:
+            db.rollback()
+            log.error(f"设备在线状态落库失败：{str(e)}")
+            # 写回失败的状态放回队列，下个间隔重试（期间更新的状态优先）
+            with self._lock:
+                for device_id, state in pending.items():
+                    self._pending.setdefault(device_id, state)
+            return 0
+        finally:
+            db.close()
+
+
+PRESENCE = PresenceTracker(config.PRESENCE_FLUSH_INTERVAL)
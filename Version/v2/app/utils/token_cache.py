@@ -0,0 +1,141 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from ..config import config
+from .cycle_store import CYCLE_STORE
+
+log = logging.getLogger("pt.utils.token_cache")
+
+# 多worker（CYCLE_STORE_BACKEND=redis）时广播Token失效的频道
+INVALIDATE_CHANNEL = "token_invalidate"
+
+
+def snapshot(obj):
+    """ORM对象转为只读快照（复制全部列值），会话关闭后仍可访问，不触发数据库查询"""
+    return SimpleNamespace(**{column.key: getattr(obj, column.key) for column in obj.__table__.columns})
+
+
+class TokenCache:
+    """
+    已校验Token缓存：token → (用户快照, 设备快照)
+    TTL过期 + LRU淘汰；命中时不访问数据库。退出登录、重新登录（旧Token失效）、/reset时需显式失效
+    失效经共享存储（bus，Redis时为pub/sub）广播到其他worker；广播丢失时（Redis断线）其他worker最多在TTL内沿用旧缓存
+    """
+
+    def __init__(self, ttl, max_size, bus=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # {token: (expire_ts, user, device)}
+        self._user_tokens = {}  # {user_id: {token, ...}}，按用户失效用
+        self._digests = {}  # {token摘要: token}，按广播的摘要失效用（广播不携带Token原文）
+        self._lock = threading.Lock()
+        self._bus = bus
+        self._subscribed_pid = None
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, token):
+        """命中返回(user, device)快照，未命中或已过期返回None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry[1], entry[2]
+
+    def put(self, token, user, device):
+        if not self.enabled:
+            return
+        self._ensure_subscribed()
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (time.monotonic() + self.ttl, user, device)
+            self._user_tokens.setdefault(user.id, set()).add(token)
+            self._digests[_digest(token)] = token
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, token):
+        with self._lock:
+            self._remove(token)
+        self._broadcast({"digest": _digest(token)})
+
+    def invalidate_user(self, user_id):
+        """失效该用户的全部缓存Token（重新登录时旧Token已在数据库中失效）"""
+        self._invalidate_user(user_id)
+        self._broadcast({"user_id": user_id})
+
+    def clear(self):
+        self._clear()
+        self._broadcast({"clear": True})
+
+    def _invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._user_tokens.get(user_id, ())):
+                self._remove(token)
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+            self._digests.clear()
+        log.info("Token缓存已清空")
+
+    def _ensure_subscribed(self):
+        """首次写入缓存时订阅其他worker的失效广播（按进程订阅，fork出的worker各自订阅）"""
+        if self._bus is None or self._subscribed_pid == os.getpid():
+            return
+        self._subscribed_pid = os.getpid()
+        try:
+            self._bus.subscribe(INVALIDATE_CHANNEL, self._on_broadcast)
+        except Exception as e:
+            log.warning(f"订阅Token失效广播失败，其他worker的失效最多在TTL（{self.ttl}秒）内不可见：{str(e)}")
+
+    def _broadcast(self, message):
+        if self._bus is None or not self.enabled:
+            return
+        try:
+            self._bus.publish(INVALIDATE_CHANNEL, message)
+        except Exception as e:
+            log.warning(f"广播Token失效失败，其他worker最多在TTL（{self.ttl}秒）内沿用旧缓存：{str(e)}")
+
+    def _on_broadcast(self, message):
+        if message.get("clear"):
+            self._clear()
+        elif "user_id" in message:
+            self._invalidate_user(message["user_id"])
+        elif "digest" in message:
+            with self._lock:
+                token = self._digests.get(message["digest"])
+                if token is not None:
+                    self._remove(token)
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        self._digests.pop(_digest(token), None)
+        tokens = self._user_tokens.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[entry[1].id]
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+TOKEN_CACHE = TokenCache(config.TOKEN_CACHE_TTL, config.TOKEN_CACHE_SIZE, CYCLE_STORE)